@@ -1,9 +1,18 @@
-import uuid, json
-from flask import request
-from flask_restx import Namespace, Resource, fields
-from app.constants import SageMakerConstants as sm_constants
-from app.core.SagemakerManager import SagemakerManager
-from app.core.auth_utils import get_header, token_required
+import uuid
+from flask import redirect, request, Response
+from flask_restx import Namespace, Resource, fields, inputs
+from app.api.inference.handler import (
+    submit_inference,
+    get_inference_result,
+    submit_batch_inference,
+    get_batch_inference_output,
+)
+from app.constants import InferenceStatus as inference_status
+from app.core.inference import run_uploaded_inference
+from app.core import payload as payload_formats
+from app.core.payload import read_payload, has_top_level_key
+from app.core.auth_utils import token_required
+from app.core.inference_cache import inference_cache
 from app.models.models import ModelRegistryModel, InferenceModel, UserModel, MLModel
 
 ns = Namespace("Inference", description="Inference operations")
@@ -13,7 +22,11 @@ get_parser.add_argument("uuid", type=str, required=True, help="The inference UUI
 
 upload_parser = ns.parser()
 upload_parser.add_argument(
-    "inference_data", location="files", type="file", required=True, help="A json file"
+    "inference_data",
+    location="files",
+    type="file",
+    required=True,
+    help="A .json, .npy or .msgpack (msgpack-numpy) file",
 )
 upload_parser.add_argument(
     "uuid",
@@ -21,6 +34,21 @@ upload_parser.add_argument(
     required=True,
     help="The model registry UUID",
 )
+upload_parser.add_argument(
+    "async",
+    type=inputs.boolean,
+    required=False,
+    default=False,
+    help="Queue the inference and return its UUID immediately",
+)
+upload_parser.add_argument(
+    "response_format",
+    type=str,
+    required=False,
+    default=payload_formats.JSON,
+    choices=[payload_formats.JSON, payload_formats.NPY, payload_formats.MSGPACK],
+    help="Format of the inference outputs returned by a synchronous inference",
+)
 
 delete_parser = ns.parser()
 delete_parser.add_argument("uuid", type=str, required=True, help="The inference UUID")
@@ -38,7 +66,7 @@ inference_result_model = ns.model(
     {
         "inference_uuid": fields.String(description="Inference UUID"),
         "status": fields.String(description="Inference status"),
-        "inference": fields.String(description="Inference result"),
+        "inference": fields.Raw(description="Inference result"),
     },
 )
 
@@ -52,11 +80,11 @@ class Inference(Resource):
     def get(user_id, self):
         """Get inference result by inference id"""
         inference_uuid = request.args.get("uuid")
-        inference_result = {
-            "inference_uuid": inference_uuid,
-            "status": "completed",
-            "inference": "This is a dummy inference result",
-        }
+        inference_result = get_inference_result(user_id, inference_uuid)
+
+        if inference_result is None:
+            return {"message": "Inference not found"}, 404
+
         return {
             "message": "Inference Results retrieved successfully",
             "inference_result": inference_result,
@@ -65,6 +93,7 @@ class Inference(Resource):
     # flask status code 200
     @ns.expect(upload_parser)
     @ns.response(200, "Success", inference_model)
+    @ns.response(202, "Inference queued", inference_model)
     @ns.doc(security="Bearer")
     @token_required
     def post(user_id, self):
@@ -72,68 +101,108 @@ class Inference(Resource):
         # Process the JSON data here
         # You can perform any required operations
         # json data in the format of {"inputs": ndarray.tolist()}
+        # or a binary tensor (.npy / msgpack-numpy) converted to that format
         json_data = request.files.get("inference_data")
         model_registry_uuid = request.args.get("uuid")
-        sm = SagemakerManager(
-            role=sm_constants.ROLE,
-            bucket_name=sm_constants.BUCKET_NAME,
+        try:
+            run_async = inputs.boolean(request.args.get("async", False))
+        except ValueError:
+            return "Invalid async flag, expected true or false", 400
+        response_format = request.args.get("response_format", payload_formats.JSON)
+
+        data_format = (
+            payload_formats.detect_format(json_data.filename, json_data.mimetype)
+            if json_data
+            else None
         )
-        
-        if json_data and model_registry_uuid and json_data.filename.endswith(".json"):
-            model = ModelRegistryModel.get_record_by_uuid(
-                model_registry_uuid
-            )
+
+        if data_format and model_registry_uuid:
+            model = ModelRegistryModel.resolve_endpoint(model_registry_uuid)
 
             if model is None:
                 return "Model not found", 400
-            
-            model_endpoint = model.model_endpoint
 
-            base = "https://"
-            host = "runtime.sagemaker.ap-southeast-1.amazonaws.com"
-            canonical_uri = f"/endpoints/{model_endpoint}/invocations"
+            if data_format == payload_formats.JSON:
+                # read and hash the upload once, it is forwarded to the endpoint as-is
+                body, payload_hash = read_payload(json_data.stream)
 
-            inference_endpoint = base + host + canonical_uri
+                if not has_top_level_key(body, "inputs"):
+                    return "Invalid JSON data provided", 400
+            else:
+                try:
+                    body = payload_formats.tensor_to_json(
+                        json_data.stream.read(), data_format
+                    )
+                except ValueError as e:
+                    return f"Invalid {data_format} data provided: {e}", 400
+                payload_hash = payload_formats.hash_body(body)
 
-            # load the json data from the file
-            json_data = json.load(json_data)
+            cacheable = model.cache_enabled
 
-            if "inputs" not in json_data:
-                return "Invalid JSON data provided", 400
+            if run_async:
+                inference_uuid = submit_inference(
+                    user_uuid=user_id,
+                    model_registry_uuid=model_registry_uuid,
+                    model_endpoint=model.model_endpoint,
+                    body=body,
+                    payload_hash=payload_hash,
+                    cacheable=cacheable,
+                )
+                return {
+                    "message": "Inference job queued",
+                    "body": {
+                        "uuid": inference_uuid,
+                        "status": inference_status.PENDING,
+                    },
+                }, 202
 
-            json_string = json.dumps(json_data)
-
-            header = get_header(payload=json_string, endpoint=model_endpoint)
-
-            response = sm.invoke_endpoint(
-                endpoint=inference_endpoint, payload=json_string, header=header
-            )
+            try:
+                status_code, inference_result = run_uploaded_inference(
+                    model_registry_uuid=model_registry_uuid,
+                    model_endpoint=model.model_endpoint,
+                    body=body,
+                    payload_hash=payload_hash,
+                    cacheable=cacheable,
+                )
+            except payload_formats.InvalidPayload as e:
+                # only parsed on the batching and local paths
+                return str(e), 400
 
             if user_id is None:
                 raise Exception("User does not exist")
 
-            inference_status = "pending"
-
-            if response.status_code == 200:
-                inference_status = "completed"
-
+            # the result is returned to the caller, only queued inferences keep theirs
             inference_uuid = InferenceModel.save_inference_to_db(
                 user_uuid=user_id,
                 model_registry_uuid=model_registry_uuid,
-                inference_status=inference_status,
+                inference_status=(
+                    inference_status.COMPLETED
+                    if status_code == 200
+                    else inference_status.FAILED
+                ),
             )
 
+            if response_format != payload_formats.JSON and status_code == 200:
+                encoded = payload_formats.encode_result(inference_result, response_format)
+                # results without array outputs are still returned as JSON
+                if encoded is not None:
+                    return Response(
+                        encoded,
+                        mimetype=payload_formats.CONTENT_TYPES[response_format],
+                        headers={"X-Inference-UUID": inference_uuid},
+                    )
+
             response_data = {
                 "message": "Inference job posted successfully",
                 "body": {
                     "uuid": inference_uuid,
-                    "status": response.status_code,
-                    "inference_result": json.loads(response.text),
+                    "status": status_code,
+                    "inference_result": inference_result,
                 },
             }
             return response_data, 200
         else:
-            return "No JSON data provided", 400
+            return "No JSON, NPY or msgpack data provided", 400
 
     @ns.expect(delete_parser)
     @ns.response(200, "Success")
@@ -148,3 +217,104 @@ class Inference(Resource):
             return "Inference job stopped successfully", 200
         else:
             return "Inference job not found", 400
+
+
+batch_upload_parser = ns.parser()
+batch_upload_parser.add_argument(
+    "batch_data",
+    location="files",
+    type="file",
+    required=True,
+    help="A .jsonl file with one input row per line, or a .npy array",
+)
+batch_upload_parser.add_argument(
+    "uuid",
+    type=str,
+    required=True,
+    help="The model registry UUID",
+)
+
+batch_get_parser = ns.parser()
+batch_get_parser.add_argument("uuid", type=str, required=True, help="The job UUID")
+
+batch_job_model = ns.model(
+    "BatchInferenceJob",
+    {
+        "message": fields.String(description="Response message"),
+        "uuid": fields.String(description="Job UUID"),
+    },
+)
+
+
+@ns.route("/batch")
+class BatchInference(Resource):
+    @ns.expect(batch_get_parser)
+    @ns.response(302, "Redirect to the JSONL file with one result per input row")
+    @ns.response(409, "Job is not finished or its results expired")
+    @ns.doc(security="Bearer")
+    @token_required
+    def get(user_id, self):
+        """Download the results of a finished batch inference job"""
+        job_uuid = request.args.get("uuid")
+        job, output_url = get_batch_inference_output(user_id, job_uuid)
+
+        if job is None:
+            return {"message": "Job not found"}, 404
+
+        if output_url is None:
+            return {
+                "message": "Job results are not available",
+                "body": {"uuid": job_uuid, "status": job.job_status},
+            }, 409
+
+        # the results are served by S3 through a short-lived presigned link
+        return redirect(output_url)
+
+    @ns.expect(batch_upload_parser)
+    @ns.response(202, "Batch job queued", batch_job_model)
+    @ns.doc(security="Bearer")
+    @token_required
+    def post(user_id, self):
+        """
+        Score a JSONL or NPY dataset with a registered model.
+        Progress is reported by /api/model_registry/status.
+        """
+        dataset = request.files.get("batch_data")
+        model_registry_uuid = request.args.get("uuid")
+
+        data_format = (
+            payload_formats.detect_batch_format(dataset.filename) if dataset else None
+        )
+        if not data_format or not model_registry_uuid:
+            return "No JSONL or NPY dataset provided", 400
+
+        model = ModelRegistryModel.resolve_endpoint(model_registry_uuid)
+        if model is None:
+            return "Model not found", 400
+
+        job_uuid = submit_batch_inference(
+            user_uuid=user_id,
+            model_registry_uuid=model_registry_uuid,
+            model_endpoint=model.model_endpoint,
+            dataset=dataset,
+            data_format=data_format,
+            cacheable=model.cache_enabled,
+        )
+
+        return {
+            "message": "Batch inference job queued",
+            "body": {"uuid": job_uuid},
+        }, 202
+
+
+@ns.route("/cache")
+class InferenceCacheStats(Resource):
+    @ns.response(200, "Success")
+    @ns.doc(security="Bearer")
+    @token_required
+    def get(user_id, self):
+        """Get inference result cache hit and miss rates"""
+        return {
+            "message": "Inference cache stats retrieved successfully",
+            "body": inference_cache.stats(),
+        }, 200
@@ -0,0 +1,125 @@
+import contextlib, os, uuid
+from datetime import datetime, timedelta
+
+from celery import states
+from werkzeug.datastructures import FileStorage
+
+from app.constants import AppConstants as app_constants
+from app.constants import BatchInferenceConstants as batch_constants
+from app.constants import InferenceStatus as inference_status
+from app.core.inference import get_sagemaker_manager
+from app.jobs.inference_worker import inference_worker, batch_inference_worker
+from app.models.models import InferenceModel, JobsModel
+
+
+def submit_inference(
+    user_uuid, model_registry_uuid, model_endpoint, body, payload_hash, cacheable=True
+):
+    """Records a pending inference and hands the upstream call to the worker"""
+    inference_uuid = InferenceModel.save_inference_to_db(
+        user_uuid=user_uuid,
+        model_registry_uuid=model_registry_uuid,
+        inference_status=inference_status.PENDING,
+        # the worker updates this record, it has to exist before the task runs
+        buffered=False,
+    )
+    inference_worker.apply_async(
+        args=[
+            inference_uuid,
+            model_registry_uuid,
+            model_endpoint,
+            body.decode("utf-8"),
+            payload_hash,
+            cacheable,
+        ]
+    )
+    return inference_uuid
+
+
+def get_inference_result(user_uuid, inference_uuid):
+    record = InferenceModel.get_record_by_uuid(inference_uuid)
+    if record is None or record.user_uuid != user_uuid:
+        return None
+
+    return {
+        "inference_uuid": record.inference_uuid,
+        "status": record.inference_status,
+        "inference": record.inference_result,
+    }
+
+
+def batch_key_prefix(job_uuid) -> str:
+    return f"{batch_constants.S3_PREFIX}/{job_uuid}"
+
+
+def submit_batch_inference(
+    user_uuid,
+    model_registry_uuid,
+    model_endpoint,
+    dataset: FileStorage,
+    data_format,
+    cacheable=True,
+):
+    """Uploads the dataset to S3 and starts a batch inference job on it"""
+    job_uuid = str(uuid.uuid4())
+
+    input_dir = os.path.abspath(app_constants.BATCH_TEMP_DIR)
+    os.makedirs(input_dir, exist_ok=True)
+    input_path = os.path.join(
+        input_dir, job_uuid + os.path.splitext(dataset.filename)[1].lower()
+    )
+    dataset.save(input_path)
+    try:
+        input_url = get_sagemaker_manager().upload_batch_file(
+            input_path, batch_key_prefix(job_uuid)
+        )
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(input_path)
+
+    JobsModel.save_job_to_db(
+        job_uuid=job_uuid,
+        user_uuid=user_uuid,
+        job_type=batch_constants.JOB_TYPE,
+        job_status=states.PENDING,
+        reference_uuid=model_registry_uuid,
+    )
+
+    batch_inference_worker.apply_async(
+        args=[
+            user_uuid,
+            model_registry_uuid,
+            model_endpoint,
+            input_url,
+            data_format,
+            batch_key_prefix(job_uuid),
+            cacheable,
+        ],
+        task_id=job_uuid,
+    )
+    return job_uuid
+
+
+def get_batch_inference_output(user_uuid, job_uuid):
+    """
+    Returns the batch job record and a download link of its finished results,
+    None once they are past their retention period
+    """
+    job = JobsModel.get_record_by_uuid(job_uuid)
+    if (
+        job is None
+        or job.user_uuid != user_uuid
+        or job.job_type != batch_constants.JOB_TYPE
+    ):
+        return None, None
+
+    if job.job_status != states.SUCCESS or not job.output_url:
+        return job, None
+    expires_at = job.job_datetime + timedelta(
+        seconds=batch_constants.OUTPUT_RETENTION_SECONDS
+    )
+    if expires_at < datetime.now():
+        return job, None
+    return job, get_sagemaker_manager().batch_file_url(
+        job.output_url, f"{job_uuid}.jsonl", batch_constants.DOWNLOAD_URL_SECONDS
+    )
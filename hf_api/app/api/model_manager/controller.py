@@ -8,6 +8,11 @@ from app.api.model_manager.handler import (
     search_models,
 )
 from app.core.auth_utils import token_required
+from app.core.pagination import (
+    InvalidCursor,
+    add_pagination_arguments,
+    page_size_or_default,
+)
 
 ns = Namespace("Model Manager", description="Model management operations")
 
@@ -174,6 +179,7 @@ get_model_parser.add_argument(
 get_model_parser.add_argument(
     "user_uuid", type=str, required=False, help="Get all models by user UUID"
 )
+add_pagination_arguments(get_model_parser)
 
 
 @ns.expect(get_model_parser)
@@ -183,14 +189,27 @@ class ModelManagerInfo(Resource):
     def get(self):
         top_n = request.args.get("top_n")
         user_id = request.args.get("user_uuid")
-        resp = get_all_models(user_id, top_n)
-        return {"message": "Model retrieved successfully", "body": resp}, 200
+        try:
+            resp, next_cursor = get_all_models(
+                user_id,
+                top_n,
+                page_size_or_default(request.args.get("page_size")),
+                request.args.get("cursor"),
+            )
+        except InvalidCursor as e:
+            return {"message": str(e)}, 400
+        return {
+            "message": "Model retrieved successfully",
+            "body": resp,
+            "next_cursor": next_cursor,
+        }, 200
 
 
 search_parser = ns.parser()
 search_parser.add_argument(
     "q", type=str, required=True, help="The search query for model"
 )
+add_pagination_arguments(search_parser)
 
 
 @ns.expect(search_parser)
@@ -200,5 +219,16 @@ class ModelManagerSearch(Resource):
     @ns.response(200, "Success", get_model_fields)
     def get(self):
         q = request.args.get("q")
-        resp = search_models(q)
-        return {"message": "Model retrieved successfully", "body": resp}, 200
+        try:
+            resp, next_cursor = search_models(
+                q,
+                page_size_or_default(request.args.get("page_size")),
+                request.args.get("cursor"),
+            )
+        except InvalidCursor as e:
+            return {"message": str(e)}, 400
+        return {
+            "message": "Model retrieved successfully",
+            "body": resp,
+            "next_cursor": next_cursor,
+        }, 200
@@ -4,6 +4,7 @@ from werkzeug.datastructures import FileStorage
 from app.core.SagemakerManager import SagemakerManager
 from app.constants import SageMakerConstants as sm_constants
 from app.constants import AppConstants as app_constants
+from app.core.pagination import InvalidCursor
 from app.models.models import (
     MLModel,
     InferenceModel,
@@ -12,33 +13,44 @@ from app.models.models import (
     search_for_models,
 )
 
-def search_models(query: str) -> dict:
+def search_models(query: str, page_size: int, cursor: str = None) -> tuple:
+    """Returns one page of matching models and the cursor of the next page"""
     try:
-        models = search_for_models(query)
-        print(models)
+        models, next_cursor = search_for_models(query, page_size, cursor)
+    except InvalidCursor:
+        raise
     except Exception as e:
         raise Exception(f"Failed to search for the model: {e}")
 
-    return models
+    return models, next_cursor
 
-def get_all_models(user_uuid: str = None, top_n: int = None) -> dict:
+
+def get_all_models(
+    user_uuid: str = None, top_n: int = None, page_size: int = None, cursor: str = None
+) -> tuple:
     """
-    If user_uuid is provided, return all models associated with the user.
-    If user_uuid is not provided, return all models.
+    If user_uuid is provided, return the models associated with the user.
+    If top_n is provided, return the top n models by run count.
+    Otherwise return the models by run count.
+    Returns one page of models and the cursor of the next page, None for top_n.
     """
+    next_cursor = None
     try:
         if user_uuid:
-            models = MLModel.get_all_models_by_user_uuid(user_uuid)
-            models = [model.to_dict() for model in models]
+            models, next_cursor = MLModel.get_all_models_by_user_uuid(
+                user_uuid, page_size, cursor
+            )
         elif top_n:
             models = get_model_run_counts_with_details_filter(top_n)
         else:
-            models = get_model_run_counts_with_details()
+            models, next_cursor = get_model_run_counts_with_details(page_size, cursor)
 
+    except InvalidCursor:
+        raise
     except Exception as e:
         raise Exception(f"Failed to fetch all models: {e}")
 
-    return models
+    return models, next_cursor
 
 
 def download_from_s3(model_uuid: str) -> dict:
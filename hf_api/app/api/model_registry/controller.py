@@ -2,12 +2,25 @@ from flask import request
 from flask_restx import Namespace, Resource, fields
 
 from app.models.models import (
+    MLModel,
     ModelRegistryModel,
     JobsModel,
+    catalog,
+    endpoint_cache,
     get_registered_model_by_user_uuid,
 )
-from app.api.model_registry.handler import clean_up_model_resources, register_model
+from app.api.model_registry.handler import (
+    clean_up_model_resources,
+    register_model,
+    set_cache_enabled,
+)
+from app.constants import InstanceType as instance_type
 from app.core.auth_utils import token_required
+from app.core.pagination import (
+    InvalidCursor,
+    add_pagination_arguments,
+    page_size_or_default,
+)
 
 ns = Namespace("Model Registry", description="Model registry operations")
 
@@ -36,6 +49,14 @@ get_fields = ns.model(
 
 post_parser = ns.parser()
 post_parser.add_argument("uuid", type=str, required=True, help="The model UUID")
+post_parser.add_argument(
+    "backend",
+    type=str,
+    required=False,
+    default="sagemaker",
+    choices=["sagemaker", "local"],
+    help="Serve the model on a SageMaker endpoint or in-process",
+)
 
 post_fields = ns.model(
     "Model",
@@ -54,6 +75,15 @@ post_fields = ns.model(
 )
 
 
+put_parser = ns.parser()
+put_parser.add_argument("uuid", type=str, required=True, help="The model registry UUID")
+put_parser.add_argument(
+    "cache_enabled",
+    type=bool,
+    required=True,
+    help="Whether inference results of this model may be cached",
+)
+
 delete_parser = ns.parser()
 delete_parser.add_argument(
     "uuid", type=str, required=True, help="The model registry UUID"
@@ -83,11 +113,39 @@ class ModelRegistry(Resource):
                 "model_version": record.model_version,
                 "endpoint_name": record.model_endpoint,
                 "status": record.model_status,
+                "cache_enabled": record.cache_enabled,
+                "instance_type": record.instance_type,
             },
         }
 
         return resp, 200
 
+    @ns.expect(put_parser)
+    @ns.response(200, "Success")
+    @ns.doc(security="Bearer")
+    @token_required
+    def put(user_id, self):
+        """
+        Update the inference settings of a registered model
+        """
+        model_registry_uuid = request.args.get("uuid")
+        cache_enabled = request.args.get("cache_enabled") == "true"
+
+        record = ModelRegistryModel.get_record_by_uuid(model_registry_uuid)
+        if not record:
+            return {"message": "Model not found"}, 404
+
+        model = MLModel.get_record_by_uuid(record.model_uuid)
+        if not model or model.user_uuid != user_id:
+            return {"message": "Only the model owner can update the model"}, 403
+
+        set_cache_enabled(model_registry_uuid, cache_enabled)
+
+        return {
+            "message": "Model updated successfully",
+            "body": {"uuid": model_registry_uuid, "cache_enabled": cache_enabled},
+        }, 200
+
     @ns.expect(post_parser)
     @ns.response(200, "Success", post_fields)
     @ns.doc(security="Bearer")
@@ -98,8 +156,13 @@ class ModelRegistry(Resource):
         """
 
         model_uuid = request.args.get("uuid")
+        backend = request.args.get("backend", "sagemaker")
 
-        task_id = register_model(user_id, model_uuid)
+        task_id = register_model(
+            user_id,
+            model_uuid,
+            instance_type.LOCAL if backend == "local" else instance_type.CPU,
+        )
 
         resp = {
             "message": "Model endpoint creation started",
@@ -132,8 +195,12 @@ class ModelRegistry(Resource):
             return "Model UUID is missing", 400
 
 
+get_all_parser = add_pagination_arguments(ns.parser())
+
+
 @ns.route("/all")
 class ModelRegistryAll(Resource):
+    @ns.expect(get_all_parser)
     @ns.response(200, "Success", get_fields)
     @ns.doc(security="Bearer")
     @token_required
@@ -141,7 +208,14 @@ class ModelRegistryAll(Resource):
         """
         Get all Model Registry Infomation
         """
-        records = get_registered_model_by_user_uuid(user_id)
+        try:
+            records, next_cursor = get_registered_model_by_user_uuid(
+                user_id,
+                page_size_or_default(request.args.get("page_size")),
+                request.args.get("cursor"),
+            )
+        except InvalidCursor as e:
+            return {"message": str(e)}, 400
 
         if not records:
             return {"message": "Model not found"}, 404
@@ -160,6 +234,7 @@ class ModelRegistryAll(Resource):
                 }
                 for record in records
             ],
+            "next_cursor": next_cursor,
         }
 
         return resp, 200
@@ -203,9 +278,34 @@ class ModelRegistryStatus(Resource):
         if not record:
             return {"message": "Job not found"}, 404
 
+        body = {"uuid": job_uuid, "status": record.job_status}
+
+        # batch inference jobs also report their progress
+        for progress_field in ("rows_total", "rows_done", "rows_failed", "rows_per_second"):
+            if getattr(record, progress_field) is not None:
+                body[progress_field] = getattr(record, progress_field)
+
         resp = {
             "message": "Job status retrieved successfully",
-            "body": {"uuid": job_uuid, "status": record.job_status},
+            "body": body,
         }
 
         return resp, 200
+
+
+@ns.route("/cache")
+class ModelRegistryCacheStats(Resource):
+    @ns.response(200, "Success")
+    @ns.doc(security="Bearer")
+    @token_required
+    def get(user_id, self):
+        """
+        Get hit, miss and staleness metrics of the endpoint resolution, served by
+        the model catalog unless MODEL_CATALOG=false
+        """
+        return {
+            "message": "Endpoint cache stats retrieved successfully",
+            "body": (
+                catalog.stats() if catalog.enabled else endpoint_cache.stats()
+            ),
+        }, 200
@@ -1,17 +1,39 @@
 import boto3
 from app.constants import SageMakerConstants as sm_constants
+from app.constants import InstanceType as instance_type
+from app.constants import LocalBackendConstants as local_constants
+from app.core.local_model_pool import local_model_pool
 from app.jobs.model_registry_worker import register_model_worker
+from app.core.inference_cache import inference_cache
 from app.models.models import ModelRegistryModel, InferenceModel
 
 
-def register_model(user_uuid, model_uuid):
-    result = register_model_worker.apply_async(args=[user_uuid, model_uuid])
+def register_model(user_uuid, model_uuid, model_instance_type=instance_type.CPU):
+    result = register_model_worker.apply_async(
+        args=[user_uuid, model_uuid, model_instance_type]
+    )
     return result.task_id
 
 
 def clean_up_model_resources(model_uuid, endpoint_name):
     """This function deletes the endpoint, endpoint configuration, and model resources from SageMaker."""
 
+    if endpoint_name.startswith(local_constants.ENDPOINT_PREFIX):
+        # local models have no SageMaker resources, only unload them
+        local_model_pool.evict(endpoint_name)
+    else:
+        _delete_sagemaker_endpoint(endpoint_name)
+
+    # delete from inference table due to foreign key constraint
+    InferenceModel.delete_records_by_model_registry_uuid(model_uuid)
+
+    ModelRegistryModel.delete_record_by_uuid(model_uuid)
+
+    # cached results of the removed endpoint must never be served again
+    inference_cache.invalidate_model(model_uuid)
+
+
+def _delete_sagemaker_endpoint(endpoint_name):
     # Create a low-level SageMaker service client.
     sagemaker_client = boto3.client("sagemaker", region_name=sm_constants.REGION)
 
@@ -29,9 +51,10 @@ def clean_up_model_resources(model_uuid, endpoint_name):
 
     sagemaker_client.delete_endpoint(EndpointName=endpoint_name)
 
-    # delete from inference table due to foreign key constraint
-    inference_uuid = InferenceModel.get_record_by_model_registry_uuid(model_uuid)
-    if inference_uuid:
-        InferenceModel.delete_record_by_uuid(inference_uuid)
 
-    ModelRegistryModel.delete_record_by_uuid(model_uuid)
\ No newline at end of file
+def set_cache_enabled(model_registry_uuid, cache_enabled: bool):
+    ModelRegistryModel.update_record_by_uuid(
+        model_registry_uuid, cache_enabled=cache_enabled
+    )
+    if not cache_enabled:
+        inference_cache.invalidate_model(model_registry_uuid)
\ No newline at end of file
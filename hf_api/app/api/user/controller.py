@@ -5,9 +5,16 @@ from app.models.models import UserModel
 from app.core.auth_utils import (
     set_password,
     check_password,
+    rehash_password_if_needed,
     generate_token,
     token_required,
 )
+from app.core.pagination import (
+    InvalidCursor,
+    add_pagination_arguments,
+    page_size_or_default,
+)
+from app.core.password_hasher import PasswordHasherBusy
 import logging
 
 ns = Namespace("User", description="User Authentication Endpoints")
@@ -37,6 +44,7 @@ class UserSignup(Resource):
     @ns.response(
         400, "Email already registered"
     )  # New response code for email conflict
+    @ns.response(429, "Too many signups in progress")
     def post(self):
         """Sign up a new user"""
         try:
@@ -51,6 +59,8 @@ class UserSignup(Resource):
             # Create a new user
             user_uuid = UserModel.create_user(username, email, hashed_password)
 
+        except PasswordHasherBusy as e:
+            return {"message": f"Failed to create user: {e}"}, 429, {"Retry-After": "1"}
         except Exception as e:
             return {"message": f"Failed to create user: {e}"}, 500
 
@@ -63,6 +73,7 @@ class UserSignup(Resource):
 class UserLogin(Resource):
     @ns.expect(user_login_parser)
     @ns.response(200, "Success", response_model)
+    @ns.response(429, "Too many logins in progress")
     def post(self):
         """Login a user"""
         try:
@@ -80,6 +91,10 @@ class UserLogin(Resource):
             if not check_password(password, user.password):
                 return {"message": "Incorrect password"}, 401
 
+            rehash_password_if_needed(user.user_uuid, password, user.password)
+
+        except PasswordHasherBusy as e:
+            return {"message": f"Failed to log in: {e}"}, 429, {"Retry-After": "1"}
         except Exception as e:
             return {"message": f"Failed to log in: {e}"}, 500
 
@@ -127,6 +142,7 @@ get_contributors_parser = ns.parser()
 get_contributors_parser.add_argument(
     "top_n", type=int, required=False, help="Get top n contributors"
 )
+add_pagination_arguments(get_contributors_parser)
 
 
 @ns.expect(get_contributors_parser)
@@ -139,7 +155,11 @@ class UserContributors(Resource):
             top_n = request.args.get("top_n")
 
             # Query the database to get contributors' data
-            contributors = UserModel.get_contributors_with_contributions(top_n)
+            contributors, next_cursor = UserModel.get_contributors_with_contributions(
+                top_n,
+                page_size_or_default(request.args.get("page_size")),
+                request.args.get("cursor"),
+            )
 
             # Formatting the response data
             contributor_list = []
@@ -160,7 +180,10 @@ class UserContributors(Resource):
             return {
                 "message": "Contributor list retrieved successfully",
                 "contributors": contributor_list,
+                "next_cursor": next_cursor,
             }, 200
 
+        except InvalidCursor as e:
+            return {"message": str(e)}, 400
         except Exception as e:
             return {"message": f"Failed to fetch contributors: {str(e)}"}, 500
@@ -1,4 +1,4 @@
-import json, os, secrets
+import json, os
 
 from flask import Flask, Blueprint, render_template
 from flask_cors import CORS
@@ -12,6 +12,14 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 from app.constants import AppConstants as app_constants
 from app.constants import SageMakerConstants as sm_constants
 from app.core.SagemakerManager import SagemakerManager
+from app.commands import register_commands
+from app.core.jwt_keys import get_key_ring
+from app.core.metrics import (
+    authorize_scrape,
+    init_metrics,
+    render_metrics,
+    stats_collector,
+)
 
 import logging
 
@@ -28,9 +36,15 @@ def init_app():
 
     app.config["DATABASE_URI"] = os.getenv("DATABASE_URI")
 
-    os.environ["SECRET_KEY"] = secrets.token_urlsafe(16)
+    # Shared by every worker and replica, fails fast when no key is configured
+    app.config["SECRET_KEY"] = get_key_ring().signing_key()[1]
 
-    app.config["SECRET_KEY"] = os.getenv("SECRET_KEY")
+    # Time every request, exposed in Prometheus format on /metrics
+    init_metrics(app)
+    register_stats_sources()
+
+    # Maintenance commands, e.g. `flask --app server rebuild-run-counts`
+    register_commands(app)
 
     # Set up logging
     logging.basicConfig(
@@ -121,6 +135,11 @@ def init_app():
     def health():
         return {"status": "healthy"}, 200
 
+    @app.route("/metrics")
+    def metrics():
+        authorize_scrape()
+        return render_metrics()
+
     @app.route("/profile")
     def profile():
         return render_template("profile.html")
@@ -129,6 +148,26 @@ def init_app():
     return app
 
 
+def register_stats_sources():
+    """Adds the in-process cache and pool counters to /metrics"""
+    from app.core.auth_utils import token_cache
+    from app.core.http_pool import get_pool_stats
+    from app.core.inference_cache import inference_cache
+    from app.core.local_model_pool import local_model_pool
+    from app.core.password_hasher import password_hasher
+    from app.models.models import catalog, endpoint_cache, inference_writer, user_cache
+
+    stats_collector.add("http_pool", get_pool_stats)
+    stats_collector.add("inference_cache", inference_cache.local.stats)
+    stats_collector.add("endpoint_cache", endpoint_cache.stats)
+    stats_collector.add("model_catalog", catalog.stats)
+    stats_collector.add("local_model_pool", local_model_pool.stats)
+    stats_collector.add("inference_writer", inference_writer.stats)
+    stats_collector.add("token_cache", token_cache.stats)
+    stats_collector.add("user_cache", user_cache.stats)
+    stats_collector.add("password_hasher", password_hasher.stats)
+
+
 def register_namespaces(app_api):
     """Adds the namespaces to the application"""
     from app.api.model_manager.controller import ns as model_manager_namespace
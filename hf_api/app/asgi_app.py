@@ -0,0 +1,279 @@
+import contextlib
+import logging
+
+import httpx
+import jwt
+from a2wsgi import WSGIMiddleware
+from flask_restx import inputs
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+
+from app.app import init_app
+from app.api.inference.handler import submit_inference
+from app.constants import AppConstants as app_constants
+from app.constants import BatchingConstants as batching_constants
+from app.constants import HttpPoolConstants as pool_constants
+from app.constants import InferenceCacheConstants as cache_constants
+from app.constants import InferenceStatus as inference_status
+from app.core import payload as payload_formats
+from app.core.auth_utils import decode_token, get_header
+from app.core.inference import (
+    decode_response,
+    get_inference_endpoint,
+    is_local_endpoint,
+    run_uploaded_inference,
+)
+from app.core.inference_cache import VERSION_NAME, inference_cache
+from app.core.metrics import UPSTREAM_IN_FLIGHT, UPSTREAM_LATENCY
+from app.models import async_models
+from app.models.models import catalog
+
+# Async serving path for the network-bound inference routes.
+# Everything else is served by the regular Flask app mounted underneath,
+# so `init_app` routes behave exactly as under the WSGI server.
+
+INFERENCE_PATH = f"/{app_constants.API_VERSION}/api/inference/"
+
+_http_client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    return _http_client
+
+
+def unauthorized(message, status_code=401, error="Unauthorized"):
+    return JSONResponse(
+        {"message": message, "data": None, "error": error}, status_code=status_code
+    )
+
+
+async def authenticate(request):
+    """Async token_required, returns (user_id, error response)"""
+    authorization = request.headers.get("Authorization", "")
+    token = authorization.split(" ")[1] if " " in authorization else None
+    if not token:
+        return None, unauthorized("Authentication Token is missing!")
+
+    try:
+        user_id = decode_token(token)
+        if not await async_models.user_exists(user_id):
+            return None, unauthorized("Invalid Authentication token!")
+    except jwt.ExpiredSignatureError:
+        return None, unauthorized("Token has expired!")
+    except jwt.InvalidTokenError:
+        return None, unauthorized("Invalid token!")
+    except Exception as e:
+        return None, unauthorized("Something went wrong", 500, str(e))
+
+    return user_id, None
+
+
+async def invoke_endpoint(model_endpoint, body, payload_hash) -> tuple:
+    header = get_header(payload=body, endpoint=model_endpoint, payload_hash=payload_hash)
+
+    with UPSTREAM_IN_FLIGHT.track_inprogress(), UPSTREAM_LATENCY.labels(
+        model_endpoint
+    ).time():
+        response = await get_http_client().post(
+            get_inference_endpoint(model_endpoint), content=body, headers=header
+        )
+    return response.status_code, decode_response(response)
+
+
+async def run_inference(model, model_registry_uuid, body, payload_hash) -> tuple:
+    cacheable = model.cache_enabled
+
+    if batching_constants.ENABLED or is_local_endpoint(model.model_endpoint):
+        # batching and the local backend are thread based, keep them off the loop
+        return await run_in_threadpool(
+            run_uploaded_inference,
+            model_registry_uuid,
+            model.model_endpoint,
+            body,
+            payload_hash,
+            cacheable,
+        )
+
+    use_cache = cacheable and cache_constants.ENABLED
+    # only the optional Redis tier of the cache does blocking I/O
+    cache_call = run_in_threadpool if inference_cache.shared is not None else _call
+
+    if use_cache:
+        await async_models.refresh_version(inference_cache, VERSION_NAME)
+        cached = await cache_call(
+            inference_cache.get, model_registry_uuid, payload_hash, check_version=False
+        )
+        if cached is not None:
+            return 200, cached
+
+    status_code, result = await invoke_endpoint(model.model_endpoint, body, payload_hash)
+
+    if use_cache and status_code == 200:
+        await cache_call(inference_cache.set, model_registry_uuid, payload_hash, result)
+
+    return status_code, result
+
+
+async def _call(fn, *args, **kwargs):
+    return fn(*args, **kwargs)
+
+
+async def get_inference(request):
+    user_id, error = await authenticate(request)
+    if error is not None:
+        return error
+
+    record = await async_models.get_inference_by_uuid(request.query_params.get("uuid"))
+    if record is None or record.user_uuid != user_id:
+        return JSONResponse({"message": "Inference not found"}, status_code=404)
+
+    return JSONResponse(
+        {
+            "message": "Inference Results retrieved successfully",
+            "inference_result": {
+                "inference_uuid": record.inference_uuid,
+                "status": record.inference_status,
+                "inference": record.inference_result,
+            },
+        }
+    )
+
+
+async def post_inference(request):
+    user_id, error = await authenticate(request)
+    if error is not None:
+        return error
+
+    model_registry_uuid = request.query_params.get("uuid")
+    try:
+        run_async = inputs.boolean(request.query_params.get("async", False))
+    except ValueError:
+        return JSONResponse(
+            "Invalid async flag, expected true or false", status_code=400
+        )
+    response_format = request.query_params.get("response_format", payload_formats.JSON)
+
+    form = await request.form()
+    upload = form.get("inference_data")
+    data_format = (
+        payload_formats.detect_format(upload.filename, upload.content_type)
+        if upload is not None and hasattr(upload, "filename")
+        else None
+    )
+    if not data_format or not model_registry_uuid:
+        return JSONResponse("No JSON, NPY or msgpack data provided", status_code=400)
+
+    model = await async_models.resolve_endpoint(model_registry_uuid)
+    if model is None:
+        return JSONResponse("Model not found", status_code=400)
+
+    if data_format == payload_formats.JSON:
+        # read and hash the spooled upload in one pass, off the event loop
+        body, payload_hash = await run_in_threadpool(
+            payload_formats.read_payload, upload.file
+        )
+        if not payload_formats.has_top_level_key(body, "inputs"):
+            return JSONResponse("Invalid JSON data provided", status_code=400)
+    else:
+        raw = await upload.read()
+        try:
+            body = await run_in_threadpool(payload_formats.tensor_to_json, raw, data_format)
+        except ValueError as e:
+            return JSONResponse(f"Invalid {data_format} data provided: {e}", status_code=400)
+        payload_hash = payload_formats.hash_body(body)
+
+    if run_async:
+        inference_uuid = await run_in_threadpool(
+            submit_inference,
+            user_id,
+            model_registry_uuid,
+            model.model_endpoint,
+            body,
+            payload_hash,
+            model.cache_enabled,
+        )
+        return JSONResponse(
+            {
+                "message": "Inference job queued",
+                "body": {"uuid": inference_uuid, "status": inference_status.PENDING},
+            },
+            status_code=202,
+        )
+
+    try:
+        status_code, inference_result = await run_inference(
+            model, model_registry_uuid, body, payload_hash
+        )
+    except payload_formats.InvalidPayload as e:
+        # only parsed on the batching and local paths
+        return JSONResponse(str(e), status_code=400)
+
+    # the result is returned to the caller, only queued inferences keep theirs
+    inference_uuid = await async_models.save_inference_to_db(
+        user_uuid=user_id,
+        model_registry_uuid=model_registry_uuid,
+        inference_status=(
+            inference_status.COMPLETED if status_code == 200 else inference_status.FAILED
+        ),
+    )
+
+    if response_format != payload_formats.JSON and status_code == 200:
+        encoded = payload_formats.encode_result(inference_result, response_format)
+        if encoded is not None:
+            return Response(
+                encoded,
+                media_type=payload_formats.CONTENT_TYPES[response_format],
+                headers={"X-Inference-UUID": inference_uuid},
+            )
+
+    return JSONResponse(
+        {
+            "message": "Inference job posted successfully",
+            "body": {
+                "uuid": inference_uuid,
+                "status": status_code,
+                "inference_result": inference_result,
+            },
+        }
+    )
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    global _http_client
+    _http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=pool_constants.POOL_MAXSIZE,
+            max_keepalive_connections=(
+                pool_constants.POOL_MAXSIZE if pool_constants.KEEP_ALIVE else 0
+            ),
+        ),
+        timeout=httpx.Timeout(
+            pool_constants.READ_TIMEOUT, connect=pool_constants.CONNECT_TIMEOUT
+        ),
+    )
+    if catalog.enabled:
+        # load the model catalog off the event loop, the async routes need it loaded
+        try:
+            await run_in_threadpool(catalog.start)
+        except Exception:
+            logging.exception("Model catalog not loaded, reading endpoints from Mongo")
+    try:
+        yield
+    finally:
+        await _http_client.aclose()
+        async_models.close_async_db()
+
+
+def init_asgi_app():
+    """Spawns the ASGI application, async inference routes in front of the Flask app"""
+    flask_app = init_app()
+
+    routes = [
+        Route(INFERENCE_PATH, get_inference, methods=["GET"]),
+        Route(INFERENCE_PATH, post_inference, methods=["POST"]),
+        Mount("/", app=WSGIMiddleware(flask_app)),
+    ]
+    return Starlette(routes=routes, lifespan=lifespan)
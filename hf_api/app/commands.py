@@ -0,0 +1,53 @@
+import click
+
+
+def register_commands(app):
+    """Adds the maintenance commands to `flask --app server <command>`"""
+
+    @app.cli.command("create-indexes")
+    @click.option(
+        "--drop-undeclared",
+        is_flag=True,
+        help="Also drop the indexes that are not declared in INDEXES",
+    )
+    def create_indexes_command(drop_undeclared):
+        """Creates the MongoDB indexes, run once per deployment"""
+        from app.models.models import create_indexes
+
+        created, dropped, undeclared = create_indexes(drop_undeclared)
+        for index in dropped:
+            click.echo(f"Dropped index {index}")
+        for index in undeclared:
+            click.echo(f"Kept undeclared index {index}, see --drop-undeclared")
+        click.echo(f"Indexes created, {len(created)} declared")
+
+    @app.cli.command("rebuild-run-counts")
+    def rebuild_run_counts_command():
+        """Rebuilds the model and registry run counters from the inference history"""
+        from app.models.models import rebuild_run_counts
+
+        registries, models = rebuild_run_counts()
+        click.echo(f"Rebuilt run counts of {registries} registry records and {models} models")
+
+    @app.cli.command("reconcile-leaderboard")
+    def reconcile_leaderboard_command():
+        """Rebuilds the model leaderboard from the model, registry and inference records"""
+        from app.models.models import LeaderboardModel
+
+        written, removed = LeaderboardModel.reconcile()
+        click.echo(f"Reconciled {written} leaderboard entries, removed {removed}")
+
+    @app.cli.command("reconcile-contributors")
+    def reconcile_contributors_command():
+        """Rebuilds the contribution counters of every user from the job records"""
+        from app.models.models import UserModel
+
+        updated = UserModel.reconcile_contributions()
+        click.echo(f"Reconciled the contribution counters of {updated} users")
+
+    @app.cli.command("rebuild-search-index")
+    def rebuild_search_index_command():
+        """Recomputes the search terms of every model"""
+        from app.models.models import rebuild_search_index
+
+        click.echo(f"Rebuilt the search terms of {rebuild_search_index()} models")
@@ -10,12 +10,21 @@ class AppConstants:
     API_VERSION = "v1"
     MODEL_UPLOAD_TEMP_DIR = "temp/models/upload/"
     MODEL_DOWNLOAD_TEMP_DIR = "temp/models/download/"
+    MODEL_LOCAL_TEMP_DIR = "temp/models/local/"
+    BATCH_TEMP_DIR = "temp/inference/batch/"
 
 
 class SageMakerConstants:
     BUCKET_NAME = os.environ.get("BUCKET_NAME", "s3://sagemaker")
     ROLE = os.environ.get("IAM_ROLE", "arn:aws:iam::123456789")
     REGION = os.environ.get("AWS_DEFAULT_REGION", "ap-southeast-1")
+    RUNTIME_HOST = os.environ.get(
+        "SAGEMAKER_RUNTIME_HOST", f"runtime.sagemaker.{REGION}.amazonaws.com"
+    )
+
+    @staticmethod
+    def runtime_host(region):
+        return f"runtime.sagemaker.{region}.amazonaws.com"
 
 
 class InstanceType:
@@ -23,3 +32,191 @@ class InstanceType:
     GPU = "ml.p2.xlarge"
     INFERENCE = "ml.t2.medium"
     LOCAL = "local"
+
+
+class LocalBackendConstants:
+    # models registered with InstanceType.LOCAL run in-process instead of on SageMaker
+    ENDPOINT_PREFIX = "local-"
+    MAX_MEMORY_BYTES = int(
+        os.environ.get("LOCAL_MODEL_POOL_MAX_BYTES", 2 * 1024 * 1024 * 1024)
+    )
+    BATCHING = os.environ.get("LOCAL_MODEL_BATCHING", "true").lower() == "true"
+
+
+class HttpPoolConstants:
+    # Shared keep-alive pool used for SageMaker runtime invocations
+    POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", 10))
+    POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 20))
+    POOL_BLOCK = os.environ.get("HTTP_POOL_BLOCK", "false").lower() == "true"
+    MAX_PER_ENDPOINT = int(os.environ.get("HTTP_MAX_CONNECTIONS_PER_ENDPOINT", 0))
+    MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 0))
+    KEEP_ALIVE = os.environ.get("HTTP_KEEP_ALIVE", "true").lower() == "true"
+    CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 3.05))
+    READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 60))
+
+
+class BatchingConstants:
+    # Coalesce concurrent inferences for the same registered model
+    ENABLED = os.environ.get("INFERENCE_BATCHING", "false").lower() == "true"
+    MAX_BATCH_SIZE = int(os.environ.get("INFERENCE_BATCH_MAX_SIZE", 32))
+    MAX_WAIT_MS = float(os.environ.get("INFERENCE_BATCH_MAX_WAIT_MS", 5))
+
+
+class InferenceStatus:
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class InferenceCacheConstants:
+    # Result cache keyed by model registry UUID and payload hash
+    ENABLED = os.environ.get("INFERENCE_CACHE", "true").lower() == "true"
+    MAX_ENTRIES = int(os.environ.get("INFERENCE_CACHE_MAX_ENTRIES", 10000))
+    MAX_BYTES = int(os.environ.get("INFERENCE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    TTL_SECONDS = int(os.environ.get("INFERENCE_CACHE_TTL_SECONDS", 300))
+    # optional shared tier, e.g. redis://redis:6379/0
+    REDIS_URI = os.environ.get("INFERENCE_CACHE_REDIS_URI")
+    # other processes drop their local tier within this after a model changes
+    VERSION_CHECK_SECONDS = float(
+        os.environ.get("INFERENCE_CACHE_VERSION_CHECK_SECONDS", 1)
+    )
+
+
+class BatchInferenceConstants:
+    # Rows sent to the endpoint per call and calls in flight per batch job
+    CHUNK_SIZE = int(os.environ.get("BATCH_INFERENCE_CHUNK_SIZE", 64))
+    MAX_PARALLEL = int(os.environ.get("BATCH_INFERENCE_MAX_PARALLEL", 4))
+    PROGRESS_INTERVAL_SECONDS = float(
+        os.environ.get("BATCH_INFERENCE_PROGRESS_INTERVAL_SECONDS", 2)
+    )
+    JOB_TYPE = "batch_inference"
+    # datasets and results are kept in the model bucket under this prefix
+    S3_PREFIX = os.environ.get("BATCH_INFERENCE_S3_PREFIX", "batch-inference")
+    # lifetime of the presigned result download links
+    DOWNLOAD_URL_SECONDS = int(
+        os.environ.get("BATCH_INFERENCE_DOWNLOAD_URL_SECONDS", 300)
+    )
+    # datasets and results older than this are deleted by Celery beat
+    OUTPUT_RETENTION_SECONDS = float(
+        os.environ.get("BATCH_INFERENCE_OUTPUT_RETENTION_SECONDS", 7 * 24 * 3600)
+    )
+    CLEANUP_INTERVAL_SECONDS = float(
+        os.environ.get("BATCH_INFERENCE_CLEANUP_SECONDS", 3600)
+    )
+
+
+class MetricsConstants:
+    # bearer token of /metrics scrapes, without it only loopback clients are served
+    SCRAPE_TOKEN = os.environ.get("METRICS_SCRAPE_TOKEN")
+
+
+class EndpointCacheConstants:
+    # Registry UUID -> endpoint resolution cache used on the inference path
+    MAX_ENTRIES = int(os.environ.get("ENDPOINT_CACHE_MAX_ENTRIES", 10000))
+    TTL_SECONDS = float(os.environ.get("ENDPOINT_CACHE_TTL_SECONDS", 60))
+    VERSION_CHECK_SECONDS = float(
+        os.environ.get("ENDPOINT_CACHE_VERSION_CHECK_SECONDS", 1)
+    )
+
+
+class CatalogConstants:
+    # In-memory snapshot of ml_model and model_registry_model, see app/core/catalog.py
+    ENABLED = os.environ.get("MODEL_CATALOG", "true").lower() == "true"
+    # follow a change stream, polls the version stamps where it is unavailable
+    CHANGE_STREAMS = (
+        os.environ.get("MODEL_CATALOG_CHANGE_STREAMS", "true").lower() == "true"
+    )
+    POLL_SECONDS = float(os.environ.get("MODEL_CATALOG_POLL_SECONDS", 1))
+    # polling re-reads the changed documents, a larger backlog reloads everything
+    MAX_POLLED_CHANGES = int(os.environ.get("MODEL_CATALOG_MAX_POLLED_CHANGES", 1000))
+    # how long the changed keys are kept for pollers that fell behind
+    CHANGE_LOG_TTL_SECONDS = int(
+        os.environ.get("MODEL_CATALOG_CHANGE_LOG_TTL_SECONDS", 3600)
+    )
+    # how long a uuid found missing is answered without reading MongoDB
+    MISSING_TTL_SECONDS = float(os.environ.get("MODEL_CATALOG_MISSING_TTL_SECONDS", 5))
+    MAX_MISSING = int(os.environ.get("MODEL_CATALOG_MAX_MISSING", 10000))
+
+
+class WriteBufferConstants:
+    # Write-behind buffer for inference records, see app/core/write_buffer.py
+    ENABLED = os.environ.get("INFERENCE_WRITE_BUFFER", "true").lower() == "true"
+    MAX_QUEUE = int(os.environ.get("INFERENCE_WRITE_BUFFER_MAX_QUEUE", 10000))
+    BATCH_SIZE = int(os.environ.get("INFERENCE_WRITE_BUFFER_BATCH_SIZE", 500))
+    FLUSH_INTERVAL_SECONDS = float(
+        os.environ.get("INFERENCE_WRITE_BUFFER_FLUSH_SECONDS", 0.2)
+    )
+    # "majority" or the number of acknowledging members, journaled if JOURNAL
+    WRITE_CONCERN = os.environ.get("INFERENCE_WRITE_CONCERN", "1")
+    JOURNAL = os.environ.get("INFERENCE_WRITE_JOURNAL", "false").lower() == "true"
+
+
+class AuthCacheConstants:
+    # Verified tokens and user existence checked by token_required
+    MAX_ENTRIES = int(os.environ.get("AUTH_CACHE_MAX_ENTRIES", 10000))
+    TTL_SECONDS = float(os.environ.get("AUTH_CACHE_TTL_SECONDS", 60))
+    VERSION_CHECK_SECONDS = float(
+        os.environ.get("AUTH_CACHE_VERSION_CHECK_SECONDS", 1)
+    )
+
+
+class PasswordHashingConstants:
+    # bcrypt work factor, stored hashes with another cost are rehashed on login
+    ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+    MAX_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+    # hashes running or queued before signup/login answer 429
+    MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", 32))
+
+
+class JWTConstants:
+    # Signing keys of the API tokens, shared by every worker and replica.
+    # JWT_KEYS="kid1:secret1,kid2:secret2" or a JWT_KEY_FILE with
+    # {"active": "kid2", "keys": {"kid1": "secret1", "kid2": "secret2"}},
+    # a plain SECRET_KEY is used as the single key "default".
+    KEYS = os.environ.get("JWT_KEYS")
+    KEY_FILE = os.environ.get("JWT_KEY_FILE")
+    ACTIVE_KID = os.environ.get("JWT_ACTIVE_KID")
+    SECRET_KEY = os.environ.get("SECRET_KEY")
+    DEFAULT_KID = "default"
+    ALGORITHM = "HS256"
+
+
+class MongoConstants:
+    # Connection pool of the per-process MongoClient, see app/models/models.py
+    MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", 100))
+    MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", 0))
+    MAX_IDLE_TIME_MS = int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", 300000))
+    CONNECT_TIMEOUT_MS = int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", 5000))
+    SERVER_SELECTION_TIMEOUT_MS = int(
+        os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)
+    )
+    WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", 10000))
+
+
+class LeaderboardConstants:
+    # Periodic rebuild of the model_leaderboard collection by Celery beat
+    RECONCILE_INTERVAL_SECONDS = float(
+        os.environ.get("LEADERBOARD_RECONCILE_SECONDS", 3600)
+    )
+
+
+class ContributorConstants:
+    # Periodic rebuild of the user contribution counters by Celery beat
+    RECONCILE_INTERVAL_SECONDS = float(
+        os.environ.get("CONTRIBUTORS_RECONCILE_SECONDS", 3600)
+    )
+
+
+class PaginationConstants:
+    DEFAULT_PAGE_SIZE = int(os.environ.get("DEFAULT_PAGE_SIZE", 50))
+    MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", 200))
+
+
+class SearchConstants:
+    # n-gram model search, see app/core/search.py
+    MAX_PREFIX_LENGTH = int(os.environ.get("SEARCH_MAX_PREFIX_LENGTH", 15))
+    # share of the trigrams of a query word a typo match must contain
+    MIN_TRIGRAM_OVERLAP = float(os.environ.get("SEARCH_MIN_TRIGRAM_OVERLAP", 0.4))
+    # models read per query gram, bounds the cost of common words
+    CANDIDATES_PER_GRAM = int(os.environ.get("SEARCH_CANDIDATES_PER_GRAM", 500))
@@ -1,9 +1,12 @@
+import os, shutil
 from sagemaker.utils import name_from_base
 from sagemaker.local import LocalSession
+from sagemaker.s3 import S3Downloader, parse_s3_url
 from sagemaker.tensorflow import TensorFlowModel
 from sagemaker.model import FrameworkModel
 from app.constants import AppConstants as app_constants
-import requests
+from app.core.http_pool import http_pool
+from app.core.local_model_pool import local_model_pool, LocalModel
 
 
 class SagemakerManager:
@@ -34,6 +37,46 @@ class SagemakerManager:
         print("S3 path for input model: {}".format(input_model_path))
         return input_model_path
 
+    def upload_batch_file(self, path, key_prefix) -> str:
+        """Uploads a batch inference dataset or result, returns its s3 URI"""
+        return self.local_session.upload_data(
+            path=path, bucket=self.bucket_name, key_prefix=key_prefix
+        )
+
+    def download_batch_file(self, s3_path, directory) -> str:
+        S3Downloader.download(s3_path, directory, sagemaker_session=self.local_session)
+        return os.path.join(directory, os.path.basename(s3_path))
+
+    def batch_file_url(self, s3_path, download_name, expires_in) -> str:
+        """Presigned GET URL of a batch inference result"""
+        bucket, key = parse_s3_url(s3_path)
+        return self.local_session.boto_session.client("s3").generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": bucket,
+                "Key": key,
+                "ResponseContentDisposition": f'attachment; filename="{download_name}"',
+            },
+            ExpiresIn=int(expires_in),
+        )
+
+    def delete_batch_files(self, key_prefix, modified_before) -> int:
+        """Deletes the objects under `key_prefix` last modified before the given time"""
+        s3 = self.local_session.boto_session.client("s3")
+        removed = 0
+        for page in s3.get_paginator("list_objects_v2").paginate(
+            Bucket=self.bucket_name, Prefix=key_prefix
+        ):
+            expired = [
+                {"Key": item["Key"]}
+                for item in page.get("Contents", [])
+                if item["LastModified"] < modified_before
+            ]
+            if expired:
+                s3.delete_objects(Bucket=self.bucket_name, Delete={"Objects": expired})
+                removed += len(expired)
+        return removed
+
     def create_model(self, model_path, model_type):
         if model_type == "tensorflow":
             model = TensorFlowModel(
@@ -55,9 +98,31 @@ class SagemakerManager:
         )
         return predictor
 
-    def invoke_endpoint(self, endpoint, payload, header):
-        response = requests.post(endpoint, data=payload, headers=header)
+    def invoke_endpoint(self, endpoint, payload, header, timeout=None):
+        # reuse the process-wide keep-alive pool instead of a new TLS handshake per call
+        response = http_pool.post(endpoint, data=payload, headers=header, timeout=timeout)
         return response
 
     def predict(self, predictor, data):
         return predictor.predict(data)
+
+    def fetch_model_artifact(self, model_path, directory) -> str:
+        # s3 artifacts are downloaded, local paths (offline runs and tests) are copied
+        destination = os.path.join(directory, os.path.basename(model_path))
+        if model_path.startswith("s3://"):
+            S3Downloader.download(
+                model_path, directory, sagemaker_session=self.local_session
+            )
+        else:
+            shutil.copy(model_path, destination)
+        return destination
+
+    def load_local_model(self, model_key, model_path_loader) -> LocalModel:
+        """
+        Warm in-process model for the local backend (InstanceType.LOCAL),
+        `model_path_loader()` is only called when the model is not loaded yet
+        """
+        return local_model_pool.get(
+            model_key,
+            lambda directory: self.fetch_model_artifact(model_path_loader(), directory),
+        )
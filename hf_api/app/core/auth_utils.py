@@ -1,47 +1,87 @@
 from datetime import datetime, timezone, timedelta
-import requests
-import hashlib
-import hmac
-import json
-import os
-import bcrypt
+import time
 from functools import wraps
 from flask import session, jsonify, request, current_app, abort
 import jwt
 
 from app.models.models import UserModel
+from app.constants import AuthCacheConstants as auth_cache_constants
+from app.constants import JWTConstants as jwt_constants
+from app.core.cache import LRUCache
+from app.core.jwt_keys import get_key_ring
+from app.core.password_hasher import password_hasher
+from app.core.sigv4 import get_signature_key, get_signer
+from app.core.metrics import JWT_DECODE_LATENCY, SIGV4_LATENCY
+
+# signature -> (signed header and claims, user UUID) of verified tokens,
+# an entry never outlives the expiry of its token
+token_cache = LRUCache(
+    max_entries=auth_cache_constants.MAX_ENTRIES, ttl=auth_cache_constants.TTL_SECONDS
+)
 
 
 def set_password(raw_password):
-    # Hash the password and convert it to a string for storage
-    hashed_password = bcrypt.hashpw(raw_password.encode("utf-8"), bcrypt.gensalt())
-    return hashed_password.decode("utf-8")  # Store as a string in the database
+    # Hash the password on the bcrypt pool, raises PasswordHasherBusy when saturated
+    return password_hasher.hash(raw_password)  # Store as a string in the database
 
 
 def check_password(raw_password, hashed_password):
-    # Retrieve hashed password as a string, so we need to convert it to bytes
+    # Retrieve hashed password as a string, verified on the bcrypt pool
     if hashed_password:
-        # Convert the stored hashed password back to bytes
-        return bcrypt.checkpw(
-            raw_password.encode("utf-8"), hashed_password.encode("utf-8")
-        )
+        return password_hasher.verify(raw_password, hashed_password)
 
     return False
 
 
+def rehash_password_if_needed(user_uuid, raw_password, hashed_password):
+    """Upgrades the stored hash in the background once BCRYPT_ROUNDS changed"""
+    if password_hasher.needs_rehash(hashed_password):
+        password_hasher.hash_in_background(
+            raw_password,
+            lambda rehashed: UserModel.rehash_password(
+                user_uuid, hashed_password, rehashed
+            ),
+        )
+
+
 def generate_token(uuid):
+    kid, secret = get_key_ring().signing_key()
     token = jwt.encode(
         {
             "user_id": uuid,
             "exp": datetime.now(timezone.utc) + timedelta(days=1),
         },
-        os.environ.get("SECRET_KEY"),
-        algorithm="HS256",
+        secret,
+        algorithm=jwt_constants.ALGORITHM,
+        headers={"kid": kid},
     )
 
     return token
 
 
+def decode_token(token):
+    """Verifies the token and returns the UUID of the user it was issued to"""
+    signing_input, _, signature = token.rpartition(".")
+    cached = token_cache.get(signature)
+    if cached is not None and cached[0] == signing_input:
+        return cached[1]
+
+    with JWT_DECODE_LATENCY.time():
+        kid = jwt.get_unverified_header(token).get("kid")
+        secret = get_key_ring().verification_key(kid)
+        if secret is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key {kid}")
+        data = jwt.decode(token, secret, algorithms=[jwt_constants.ALGORITHM])
+    user_id = data.get("user_id", None)
+
+    ttl = auth_cache_constants.TTL_SECONDS
+    if "exp" in data:
+        ttl = min(ttl, data["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(signature, (signing_input, user_id), ttl=ttl)
+    return user_id
+
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -57,11 +97,9 @@ def token_required(f):
             }, 401
 
         try:
-            data = jwt.decode(token, os.environ.get("SECRET_KEY"), algorithms=["HS256"])
-            user_id = data.get("user_id", None)
-            current_user = UserModel.get_user_record_by_uuid(user_id)
+            user_id = decode_token(token)
 
-            if current_user is None:
+            if not UserModel.user_exists(user_id):
                 return {
                     "message": "Invalid Authentication token!",
                     "data": None,
@@ -94,100 +132,15 @@ def token_required(f):
     return decorated
 
 
-def get_signature_key(key, date_stamp, region_name, service_name):
-    k_date = hmac.new(
-        ("AWS4" + key).encode("utf-8"), date_stamp.encode("utf-8"), hashlib.sha256
-    ).digest()
-    k_region = hmac.new(k_date, region_name.encode("utf-8"), hashlib.sha256).digest()
-    k_service = hmac.new(
-        k_region, service_name.encode("utf-8"), hashlib.sha256
-    ).digest()
-    k_signing = hmac.new(
-        k_service, "aws4_request".encode("utf-8"), hashlib.sha256
-    ).digest()
-    return k_signing
-
-
-def get_header(payload: dict, endpoint: str) -> dict:
-    access_key = os.environ.get("AWS_ACCESS_KEY_ID")
-    secret_key = os.environ.get("AWS_SECRET_ACCESS_KEY")
-    method = "POST"
-    service = "sagemaker"
-    head = "https://"
-    host = "runtime.sagemaker.ap-southeast-1.amazonaws.com"
-    region = "ap-southeast-1"
-    content_type = "application/json"
-    canonical_uri = f"/endpoints/{endpoint}/invocations"
-
-    amz_date = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-
-    date_stamp = datetime.utcnow().strftime("%Y%m%d")
-
-    payload_hash = hashlib.sha256(payload.encode("utf-8")).hexdigest()
-
-    canonical_headers = (
-        "host:"
-        + host
-        + "\n"
-        + "x-amz-content-sha256:"
-        + payload_hash
-        + "\n"
-        + "x-amz-date:"
-        + amz_date
-        + "\n"
-    )
-    signed_headers = "host;x-amz-content-sha256;x-amz-date"
-
-    canonical_request = (
-        method
-        + "\n"
-        + canonical_uri
-        + "\n"
-        + "\n"
-        + canonical_headers
-        + "\n"
-        + signed_headers
-        + "\n"
-        + payload_hash
-    )
-
-    algorithm = "AWS4-HMAC-SHA256"
-    credential_scope = date_stamp + "/" + region + "/" + service + "/" + "aws4_request"
-    string_to_sign = (
-        algorithm
-        + "\n"
-        + amz_date
-        + "\n"
-        + credential_scope
-        + "\n"
-        + hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
-    )
-
-    signing_key = get_signature_key(secret_key, date_stamp, region, service)
-
-    signature = hmac.new(
-        signing_key, (string_to_sign).encode("utf-8"), hashlib.sha256
-    ).hexdigest()
-
-    authorization_header = (
-        algorithm
-        + " "
-        + "Credential="
-        + access_key
-        + "/"
-        + credential_scope
-        + ", "
-        + "SignedHeaders="
-        + signed_headers
-        + ", "
-        + "Signature="
-        + signature
-    )
-
-    headers = {
-        "X-Amz-Content-Sha256": payload_hash,
-        "X-Amz-Date": amz_date,
-        "Authorization": authorization_header,
-        "Content-Type": content_type,
-    }
-    return headers
+def get_header(
+    payload, endpoint: str, region=None, host=None, payload_hash=None
+) -> dict:
+    """SigV4 headers for a SageMaker runtime invocation of `endpoint`"""
+    with SIGV4_LATENCY.time():
+        return get_signer().sign(
+            endpoint=endpoint,
+            payload=payload,
+            payload_hash=payload_hash,
+            region=region,
+            host=host,
+        )
@@ -0,0 +1,115 @@
+import threading
+
+# keys TensorFlow Serving uses for the per-row results of a request
+OUTPUT_KEYS = ("outputs", "predictions")
+
+
+def get_row_outputs(body, total):
+    """Returns (output_key, outputs) if the body holds one output per input row"""
+    if not isinstance(body, dict):
+        return None
+    for output_key in OUTPUT_KEYS:
+        outputs = body.get(output_key)
+        if isinstance(outputs, list) and len(outputs) == total:
+            return output_key, outputs
+    return None
+
+
+class _Batch:
+    def __init__(self, target):
+        self.target = target
+        self.inputs = []
+        self.size = 0
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent requests for the same key into one upstream call.
+
+    The first caller of a window becomes the leader: it waits until the batch is
+    full or `max_wait_ms` elapsed, sends all rows as one `inputs` array and splits
+    the per-row outputs back to every caller. An error response or exception of
+    the batched call is returned to, or raised in, every caller. `invoke_fn(target, inputs)` must
+    return `(status_code, body)` where body is the decoded JSON response.
+    """
+
+    def __init__(self, invoke_fn, max_batch_size=32, max_wait_ms=5):
+        self.invoke_fn = invoke_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._lock = threading.Lock()
+        self._open = {}
+
+    def submit(self, key, target, inputs: list):
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None or batch.size + len(inputs) > self.max_batch_size
+            if leader:
+                if batch is not None:
+                    # no room left, dispatch the current window right away
+                    batch.full.set()
+                batch = _Batch(target)
+                self._open[key] = batch
+
+            index = len(batch.inputs)
+            batch.inputs.append(inputs)
+            batch.size += len(inputs)
+
+            if batch.size >= self.max_batch_size:
+                del self._open[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.max_wait)
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+            self._dispatch(batch)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        if batch.results is None:
+            # the batched call could not be split, fall back to a single call
+            return self.invoke_fn(target, inputs)
+        return batch.results[index]
+
+    def _dispatch(self, batch):
+        try:
+            if len(batch.inputs) == 1:
+                batch.results = [self.invoke_fn(batch.target, batch.inputs[0])]
+                return
+
+            merged = [row for inputs in batch.inputs for row in inputs]
+            status_code, body = self.invoke_fn(batch.target, merged)
+            if status_code == 200:
+                batch.results = self._split(body, batch.inputs, status_code)
+            else:
+                # the endpoint rejected the batch, every caller gets its error
+                # instead of retrying one by one against a failing endpoint
+                batch.results = [(status_code, body)] * len(batch.inputs)
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+
+    @staticmethod
+    def _split(body, inputs, status_code):
+        row_outputs = get_row_outputs(body, sum(len(rows) for rows in inputs))
+        if row_outputs is None:
+            return None
+        output_key, outputs = row_outputs
+
+        results = []
+        offset = 0
+        for rows in inputs:
+            results.append(
+                (status_code, {output_key: outputs[offset : offset + len(rows)]})
+            )
+            offset += len(rows)
+        return results
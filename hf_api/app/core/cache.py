@@ -0,0 +1,216 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache bounded by entry count and/or total size,
+    with an optional time-to-live per entry.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key, size)
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size=0, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+
+        if self.max_bytes is not None and size > self.max_bytes:
+            # never let one entry flush the whole cache
+            self.delete(key)
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._remove(key, entry[1])
+
+    def delete_where(self, predicate) -> int:
+        """Removes every entry whose key matches the predicate"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key, self._entries[key][1])
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key, size):
+        del self._entries[key]
+        self._bytes -= size
+
+    def _evict(self):
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class VersionStamp:
+    """
+    Version stamp of data shared between processes, loaded at most every
+    `check_interval` seconds. `check` loads it and returns True when it changed
+    since the last load; async callers load it themselves while `due` and pass it
+    to `update`, so the blocking `loader` never runs on an event loop.
+    """
+
+    def __init__(self, loader=None, check_interval=1.0):
+        self.loader = loader
+        self.check_interval = check_interval
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def due(self) -> bool:
+        return (
+            self.loader is not None
+            and time.monotonic() - self._checked_at >= self.check_interval
+        )
+
+    def check(self) -> bool:
+        if not self.due():
+            return False
+        with self._lock:
+            if not self.due():
+                return False
+            self._checked_at = time.monotonic()
+            try:
+                version = self.loader()
+            except Exception:
+                # keep serving until the next check, entries still expire by TTL
+                return False
+        return self.update(version)
+
+    def update(self, version) -> bool:
+        self._checked_at = time.monotonic()
+        changed = self._version is not None and version != self._version
+        self._version = version
+        return changed
+
+
+class VersionedCache:
+    """
+    TTL and size bounded cache for small, hot database lookups.
+    Local writes invalidate single keys; writes from other processes are picked
+    up through a version stamp polled at most every `version_check_interval`
+    seconds, a changed stamp drops the whole cache.
+    """
+
+    def __init__(
+        self, max_entries, ttl, version_loader=None, version_check_interval=1.0
+    ):
+        self.cache = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.version = VersionStamp(version_loader, version_check_interval)
+        self.invalidations = 0
+        self.version_invalidations = 0
+        self.served_age_total = 0.0
+        self.served_age_max = 0.0
+
+    def _check_version(self):
+        if self.version.check():
+            self._version_changed()
+
+    def update_version(self, version):
+        """Applies a version stamp loaded by the caller, e.g. with an async client"""
+        if self.version.update(version):
+            self._version_changed()
+
+    def _version_changed(self):
+        self.cache.clear()
+        self.version_invalidations += 1
+
+    def get(self, key, check_version=True):
+        if check_version:
+            self._check_version()
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+
+        value, stored_at = entry
+        age = time.monotonic() - stored_at
+        self.served_age_total += age
+        self.served_age_max = max(self.served_age_max, age)
+        return value
+
+    def set(self, key, value):
+        self.cache.set(key, (value, time.monotonic()))
+
+    def invalidate(self, key):
+        self.cache.delete(key)
+        self.invalidations += 1
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        stats.pop("bytes")
+        stats.update(
+            {
+                "invalidations": self.invalidations,
+                "version_invalidations": self.version_invalidations,
+                "served_age_avg_seconds": (
+                    self.served_age_total / self.cache.hits if self.cache.hits else 0.0
+                ),
+                "served_age_max_seconds": self.served_age_max,
+            }
+        )
+        return stats
@@ -0,0 +1,375 @@
+import logging
+import os
+import threading
+import time
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.core.cache import LRUCache
+
+# events that change a collection as a whole, answered by a full reload
+_RELOAD_EVENTS = ("drop", "rename", "dropDatabase", "invalidate")
+_DOCUMENT_EVENTS = ("insert", "update", "replace", "delete")
+
+
+class CatalogSource:
+    """
+    One collection of a catalog: documents keyed by `key_field`, reduced to
+    `fields`. Update events that set any of `ignored_fields` are filtered out of
+    the change stream, for fields the catalog does not serve and that are always
+    written on their own, e.g. counters.
+    `collection` is a callable returning the collection, resolved on every read
+    so the catalog never holds a client across a fork.
+    """
+
+    def __init__(self, collection, key_field, fields, ignored_fields=()):
+        self.collection = collection
+        self.key_field = key_field
+        self.fields = tuple(dict.fromkeys((key_field, *fields)))
+        self.ignored_fields = tuple(ignored_fields)
+        # _id is kept to resolve delete events, which only carry the _id
+        self.projection = {field: 1 for field in self.fields}
+
+    def trim(self, document) -> dict:
+        return {
+            field: document[field]
+            for field in ("_id", *self.fields)
+            if field in document
+        }
+
+
+class Catalog:
+    """
+    Per-process in-memory snapshot of rarely changing collections.
+    The snapshot is loaded on first use and kept current by a change stream on
+    the sources. Where change streams are unavailable (a standalone mongod) the
+    `version_loader` stamps, one per source in order, are polled every
+    `poll_interval` seconds instead, so writers must bump them. When a stamp moved
+    `changes_loader(name, after, upto)` returns the keys written between the two
+    versions and only those documents are read again. It returns None when the
+    change log has a gap, then, or past `max_changes` keys, the snapshot is
+    reloaded as a whole, which briefly holds two copies of it in memory.
+    A key missing from the snapshot is read from the database, which finds
+    documents created by other processes before their change arrives; writers
+    call `refresh` to see their own changes at once. Keys found missing are
+    remembered for `missing_ttl` seconds, up to `max_missing` per source, so
+    lookups of unknown keys do not reach the database each time; storing the
+    document, from a change or a refresh, forgets it.
+    A process that does not want the snapshot calls `disable` before its first
+    read, callers check `enabled` and read the database themselves.
+    """
+
+    def __init__(
+        self,
+        sources,
+        version_loader,
+        poll_interval=1.0,
+        watch=True,
+        changes_loader=None,
+        max_changes=1000,
+        missing_ttl=5.0,
+        max_missing=10000,
+        enabled=True,
+    ):
+        self.sources = sources
+        self.enabled = enabled
+        self.version_loader = version_loader
+        self.changes_loader = changes_loader
+        self.max_changes = max_changes
+        self.poll_interval = poll_interval
+        self.watch = watch
+        self.missing_ttl = missing_ttl
+        self.max_missing = max_missing
+        self._documents = {name: {} for name in sources}
+        self._keys = {name: {} for name in sources}
+        self._missing = self._missing_caches()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._version = None
+        self.mode = None
+        self.hits = 0
+        self.misses = 0
+        self.missing_hits = 0
+        self.loads = 0
+        self.events = 0
+        self.polled_changes = 0
+        self.synced_at = None
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # the sync thread does not survive a fork, the child loads its own snapshot
+        self._documents = {name: {} for name in self.sources}
+        self._keys = {name: {} for name in self.sources}
+        self._missing = self._missing_caches()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def _missing_caches(self) -> dict:
+        return {
+            name: LRUCache(max_entries=self.max_missing, ttl=self.missing_ttl)
+            for name in self.sources
+        }
+
+    @property
+    def started(self) -> bool:
+        return self._pid == os.getpid()
+
+    def start(self):
+        """Loads the snapshot and starts following changes, once per process"""
+        if self.started:
+            return
+        with self._start_lock:
+            if self.started:
+                return
+            stream = self._open_stream()
+            self._load()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, args=(stream,), name="catalog-sync", daemon=True
+            )
+            self._thread.start()
+
+    def close(self):
+        self._stop.set()
+
+    def disable(self):
+        """Stops serving lookups in this process, e.g. in Celery workers"""
+        self.enabled = False
+        self.close()
+
+    def get(self, name, key, load_missing=True):
+        """The document of `key`, None if it does not exist"""
+        self.start()
+        document = self._documents[name].get(key)
+        if document is not None:
+            self.hits += 1
+            return document
+        if self.is_missing(name, key):
+            self.missing_hits += 1
+            return None
+        self.misses += 1
+        return self._fetch(name, key) if load_missing else None
+
+    def is_missing(self, name, key) -> bool:
+        """Whether `key` was recently found not to exist"""
+        return self._missing[name].get(key, False)
+
+    def values(self, name) -> list:
+        self.start()
+        with self._lock:
+            return list(self._documents[name].values())
+
+    def put(self, name, document):
+        """Adds a document read elsewhere, e.g. by the async client"""
+        if self.started and document is not None:
+            self._store(name, document)
+
+    def put_missing(self, name, key):
+        """Remembers a key found not to exist elsewhere, e.g. by the async client"""
+        if self.started:
+            self._missing[name].set(key, True)
+
+    def refresh(self, name, key):
+        """Re-reads one document after a local write, a no-op before the first read"""
+        if self.started:
+            self._fetch(name, key)
+
+    def _fetch_many(self, name, keys):
+        source = self.sources[name]
+        found = set()
+        for document in source.collection().find(
+            {source.key_field: {"$in": list(keys)}}, source.projection
+        ):
+            found.add(self._store(name, document)[source.key_field])
+        with self._lock:
+            for key in set(keys) - found:
+                stored = self._documents[name].pop(key, None)
+                if stored is not None:
+                    self._keys[name].pop(stored.get("_id"), None)
+                self._missing[name].set(key, True)
+
+    def _fetch(self, name, key):
+        source = self.sources[name]
+        document = source.collection().find_one(
+            {source.key_field: key}, source.projection
+        )
+        if document is None:
+            with self._lock:
+                stored = self._documents[name].pop(key, None)
+                if stored is not None:
+                    self._keys[name].pop(stored.get("_id"), None)
+                self._missing[name].set(key, True)
+            return None
+        return self._store(name, document)
+
+    def _store(self, name, document) -> dict:
+        document = self.sources[name].trim(document)
+        key = document.get(self.sources[name].key_field)
+        with self._lock:
+            old_key = self._keys[name].get(document["_id"])
+            if old_key is not None and old_key != key:
+                self._documents[name].pop(old_key, None)
+            self._documents[name][key] = document
+            self._keys[name][document["_id"]] = key
+            self._missing[name].delete(key)
+        return document
+
+    def _discard(self, name, _id):
+        with self._lock:
+            key = self._keys[name].pop(_id, None)
+            if key is not None:
+                self._documents[name].pop(key, None)
+                self._missing[name].set(key, True)
+
+    def _load(self):
+        if not self.watch:
+            # read before the documents, a change in between reloads again
+            self._version = self.version_loader()
+        documents = {name: {} for name in self.sources}
+        keys = {name: {} for name in self.sources}
+        for name, source in self.sources.items():
+            for document in source.collection().find({}, source.projection):
+                key = document.get(source.key_field)
+                documents[name][key] = source.trim(document)
+                keys[name][document["_id"]] = key
+        with self._lock:
+            self._documents, self._keys = documents, keys
+            for missing in self._missing.values():
+                missing.clear()
+        self.loads += 1
+        self.synced_at = time.monotonic()
+
+    def _pipeline(self) -> list:
+        match = {
+            "ns.coll": {"$in": list(self.sources)},
+            "operationType": {"$in": [*_DOCUMENT_EVENTS, *_RELOAD_EVENTS]},
+        }
+        ignored = [
+            {
+                "ns.coll": name,
+                "operationType": "update",
+                f"updateDescription.updatedFields.{field}": {"$exists": True},
+            }
+            for name, source in self.sources.items()
+            for field in source.ignored_fields
+        ]
+        if ignored:
+            match["$nor"] = ignored
+        return [{"$match": match}]
+
+    def _open_stream(self):
+        """A change stream on the sources, None where they are not supported"""
+        if not self.watch:
+            self.mode = "polling"
+            return None
+        database = next(iter(self.sources.values())).collection().database
+        try:
+            stream = database.watch(
+                self._pipeline(),
+                full_document="updateLookup",
+                max_await_time_ms=int(self.poll_interval * 1000),
+            )
+        except OperationFailure as e:
+            logging.info("Change streams unavailable (%s), polling the catalog", e)
+            self.watch = False
+            self.mode = "polling"
+            return None
+        self.mode = "change_stream"
+        return stream
+
+    def _run(self, stream):
+        while not self._stop.is_set():
+            try:
+                if stream is None and self.watch:
+                    # the previous stream ended or failed, reload what it missed
+                    stream = self._open_stream()
+                    self._load()
+                if stream is None:
+                    self._poll()
+                    self._stop.wait(self.poll_interval)
+                else:
+                    self._follow(stream)
+                    stream = None
+            except PyMongoError as e:
+                logging.warning("Catalog sync failed (%s), retrying", e)
+                if stream is not None:
+                    stream.close()
+                stream = None
+                self._stop.wait(self.poll_interval)
+
+    def _follow(self, stream):
+        with stream:
+            while stream.alive and not self._stop.is_set():
+                event = stream.try_next()
+                if event is not None:
+                    self._apply(event)
+                self.synced_at = time.monotonic()
+
+    def _apply(self, event):
+        operation = event["operationType"]
+        self.events += 1
+        if operation in _RELOAD_EVENTS:
+            self._load()
+            return
+        name = event["ns"]["coll"]
+        document = event.get("fullDocument")
+        if operation == "delete" or document is None:
+            self._discard(name, event["documentKey"]["_id"])
+        else:
+            self._store(name, document)
+
+    def _poll(self):
+        version = self.version_loader()
+        if version == self._version:
+            self.synced_at = time.monotonic()
+            return
+
+        changes = self._changes(version)
+        if changes is None:
+            self._load()
+            return
+        for name, keys in changes.items():
+            self._fetch_many(name, keys)
+        self.polled_changes += sum(len(keys) for keys in changes.values())
+        self._version = version
+        self.synced_at = time.monotonic()
+
+    def _changes(self, version):
+        """Keys changed per source since the loaded version, None to reload"""
+        if self.changes_loader is None or self._version is None:
+            return None
+        changes = {}
+        for name, after, upto in zip(self.sources, self._version, version):
+            if after == upto:
+                continue
+            if not 0 < upto - after <= self.max_changes:
+                return None
+            keys = self.changes_loader(name, after, upto)
+            if keys is None:
+                return None
+            changes[name] = keys
+        return changes
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "entries": sum(len(documents) for documents in self._documents.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "missing_hits": self.missing_hits,
+            "missing_entries": sum(len(missing) for missing in self._missing.values()),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "loads": self.loads,
+            "events": self.events,
+            "polled_changes": self.polled_changes,
+            "seconds_since_sync": (
+                time.monotonic() - self.synced_at if self.synced_at else None
+            ),
+        }
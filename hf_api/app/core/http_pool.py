@@ -0,0 +1,139 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.constants import HttpPoolConstants as pool_constants
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that keeps pool-hit and connection-reuse counters"""
+
+    def __init__(self, *args, **kwargs):
+        self._stats_lock = threading.Lock()
+        self._seen_pools = set()
+        self._retired_connections = 0
+        self.requests_sent = 0
+        self.pool_hits = 0
+        self.pool_misses = 0
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        # keep the connection count of pools evicted from the manager
+        self.poolmanager.pools.dispose_func = self._retire_pool
+
+    def _retire_pool(self, pool):
+        with self._stats_lock:
+            self._retired_connections += pool.num_connections
+            self._seen_pools.discard(id(pool))
+        pool.close()
+
+    def get_connection(self, url, proxies=None):
+        pool = super().get_connection(url, proxies)
+        with self._stats_lock:
+            if id(pool) in self._seen_pools:
+                self.pool_hits += 1
+            else:
+                self._seen_pools.add(id(pool))
+                self.pool_misses += 1
+        return pool
+
+    def send(self, request, **kwargs):
+        with self._stats_lock:
+            self.requests_sent += 1
+        return super().send(request, **kwargs)
+
+    def stats(self) -> dict:
+        pools = self.poolmanager.pools
+        with self._stats_lock:
+            live = (pools.get(key) for key in pools.keys())
+            created = self._retired_connections + sum(
+                pool.num_connections for pool in live if pool is not None
+            )
+            return {
+                "requests": self.requests_sent,
+                "pool_hits": self.pool_hits,
+                "pool_misses": self.pool_misses,
+                "connections_created": created,
+                "connections_reused": max(self.requests_sent - created, 0),
+            }
+
+
+class HttpPool:
+    """Process-wide keep-alive session shared by every SagemakerManager"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._session = None
+        self._adapter = None
+        self._endpoint_limits = {}
+
+    def _build(self):
+        adapter = PooledHTTPAdapter(
+            pool_connections=pool_constants.POOL_CONNECTIONS,
+            pool_maxsize=pool_constants.POOL_MAXSIZE,
+            pool_block=pool_constants.POOL_BLOCK,
+            max_retries=pool_constants.MAX_RETRIES,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["Connection"] = (
+            "keep-alive" if pool_constants.KEEP_ALIVE else "close"
+        )
+        return session, adapter
+
+    def session(self) -> requests.Session:
+        # sockets must not be shared with a forked child (gunicorn/celery workers)
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._session, self._adapter = self._build()
+                    self._endpoint_limits = {}
+                    self._pid = os.getpid()
+        return self._session
+
+    def _endpoint_limit(self, endpoint):
+        if pool_constants.MAX_PER_ENDPOINT <= 0:
+            return None
+        limit = self._endpoint_limits.get(endpoint)
+        if limit is None:
+            with self._lock:
+                limit = self._endpoint_limits.setdefault(
+                    endpoint,
+                    threading.BoundedSemaphore(pool_constants.MAX_PER_ENDPOINT),
+                )
+        return limit
+
+    def post(self, endpoint, data=None, headers=None, timeout=None):
+        session = self.session()
+        if timeout is None:
+            timeout = (pool_constants.CONNECT_TIMEOUT, pool_constants.READ_TIMEOUT)
+
+        limit = self._endpoint_limit(endpoint)
+        if limit is None:
+            return session.post(endpoint, data=data, headers=headers, timeout=timeout)
+
+        with limit:
+            return session.post(endpoint, data=data, headers=headers, timeout=timeout)
+
+    def stats(self) -> dict:
+        if self._adapter is None:
+            return {
+                "requests": 0,
+                "pool_hits": 0,
+                "pool_misses": 0,
+                "connections_created": 0,
+                "connections_reused": 0,
+            }
+        return self._adapter.stats()
+
+
+http_pool = HttpPool()
+
+
+def get_pool_stats() -> dict:
+    return http_pool.stats()
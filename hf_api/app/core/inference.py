@@ -0,0 +1,199 @@
+import hashlib
+import json
+
+from app.constants import SageMakerConstants as sm_constants
+from app.constants import BatchingConstants as batching_constants
+from app.constants import InferenceCacheConstants as cache_constants
+from app.constants import LocalBackendConstants as local_constants
+from app.core.SagemakerManager import SagemakerManager
+from app.core.auth_utils import get_header
+from app.core.batcher import MicroBatcher
+from app.core.inference_cache import inference_cache
+from app.core.metrics import UPSTREAM_IN_FLIGHT, UPSTREAM_LATENCY
+from app.core.payload import parse_json
+from app.models.models import MLModel
+
+_sagemaker_manager = None
+
+
+def get_sagemaker_manager() -> SagemakerManager:
+    global _sagemaker_manager
+    if _sagemaker_manager is None:
+        _sagemaker_manager = SagemakerManager(
+            role=sm_constants.ROLE,
+            bucket_name=sm_constants.BUCKET_NAME,
+        )
+    return _sagemaker_manager
+
+
+def get_inference_endpoint(model_endpoint: str) -> str:
+    return f"https://{sm_constants.RUNTIME_HOST}/endpoints/{model_endpoint}/invocations"
+
+
+def decode_response(response):
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
+
+
+def serialize_payload(payload: dict) -> tuple:
+    """Canonical JSON body and its sha256, shared by the cache key and SigV4"""
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return body, hashlib.sha256(body).hexdigest()
+
+
+def invoke_endpoint(model_endpoint: str, body: bytes, payload_hash: str) -> tuple:
+    """Sends the serialized payload to the SageMaker endpoint, returns (status_code, body)"""
+    header = get_header(payload=body, endpoint=model_endpoint, payload_hash=payload_hash)
+
+    with UPSTREAM_IN_FLIGHT.track_inprogress(), UPSTREAM_LATENCY.labels(
+        model_endpoint
+    ).time():
+        response = get_sagemaker_manager().invoke_endpoint(
+            endpoint=get_inference_endpoint(model_endpoint),
+            payload=body,
+            header=header,
+        )
+    return response.status_code, decode_response(response)
+
+
+def invoke_endpoint_batch(model_endpoint: str, inputs: list) -> tuple:
+    return invoke_endpoint(model_endpoint, *serialize_payload({"inputs": inputs}))
+
+
+def is_local_endpoint(model_endpoint: str) -> bool:
+    return model_endpoint.startswith(local_constants.ENDPOINT_PREFIX)
+
+
+def invoke_local(model_endpoint: str, inputs) -> tuple:
+    """Runs the inputs on the in-process model of a local endpoint"""
+    model_uuid = model_endpoint[len(local_constants.ENDPOINT_PREFIX) :]
+
+    def model_path_loader():
+        record = MLModel.get_record_by_uuid(model_uuid)
+        if record is None:
+            raise Exception(f"Model with UUID {model_uuid} not found")
+        return record.s3_url
+
+    model = get_sagemaker_manager().load_local_model(model_endpoint, model_path_loader)
+
+    try:
+        with UPSTREAM_IN_FLIGHT.track_inprogress(), UPSTREAM_LATENCY.labels(
+            model_endpoint
+        ).time():
+            return 200, {"outputs": model.predict(inputs)}
+    except Exception as e:
+        return 400, {"error": str(e)}
+
+
+batcher = MicroBatcher(
+    invoke_fn=invoke_endpoint_batch,
+    max_batch_size=batching_constants.MAX_BATCH_SIZE,
+    max_wait_ms=batching_constants.MAX_WAIT_MS,
+)
+
+local_batcher = MicroBatcher(
+    invoke_fn=invoke_local,
+    max_batch_size=batching_constants.MAX_BATCH_SIZE,
+    max_wait_ms=batching_constants.MAX_WAIT_MS,
+)
+
+
+def run_inference(
+    model_registry_uuid: str,
+    model_endpoint: str,
+    payload: dict,
+    cacheable=True,
+    cache_key=None,
+) -> tuple:
+    """
+    Runs the inference on the registered model.
+    Results of identical payloads are served from the inference cache unless the
+    model opted out, and concurrent requests for the same model are coalesced
+    into one upstream call when batching is enabled.
+    Only plain {"inputs": [...]} payloads are batched.
+    Models registered on the local backend run in the in-process model pool.
+    `cache_key` is the hash of the uploaded body when there is one, so a payload
+    has the same cache key whether it is batched or forwarded as uploaded.
+    """
+    body, payload_hash = serialize_payload(payload)
+
+    def invoke():
+        inputs = payload.get("inputs")
+        batchable = isinstance(inputs, list) and len(payload) == 1
+
+        if is_local_endpoint(model_endpoint):
+            if local_constants.BATCHING and batchable:
+                return local_batcher.submit(
+                    key=model_registry_uuid, target=model_endpoint, inputs=inputs
+                )
+            return invoke_local(model_endpoint, inputs)
+
+        if batching_constants.ENABLED and batchable:
+            return batcher.submit(
+                key=model_registry_uuid, target=model_endpoint, inputs=inputs
+            )
+        return invoke_endpoint(model_endpoint, body, payload_hash)
+
+    return _cached_inference(
+        model_registry_uuid, cache_key or payload_hash, cacheable, invoke
+    )
+
+
+def run_inference_raw(
+    model_registry_uuid: str,
+    model_endpoint: str,
+    body: bytes,
+    payload_hash: str,
+    cacheable=True,
+) -> tuple:
+    """
+    Pass-through variant of run_inference: the uploaded bytes are forwarded
+    unchanged and `payload_hash` (computed once while reading the upload) is
+    reused as both the SigV4 payload hash and the cache key.
+    """
+
+    def invoke():
+        return invoke_endpoint(model_endpoint, body, payload_hash)
+
+    return _cached_inference(model_registry_uuid, payload_hash, cacheable, invoke)
+
+
+def _cached_inference(model_registry_uuid, payload_hash, cacheable, invoke) -> tuple:
+    use_cache = cacheable and cache_constants.ENABLED
+    if use_cache:
+        cached = inference_cache.get(model_registry_uuid, payload_hash)
+        if cached is not None:
+            return 200, cached
+
+    status_code, result = invoke()
+
+    if use_cache and status_code == 200:
+        inference_cache.set(model_registry_uuid, payload_hash, result)
+
+    return status_code, result
+
+
+def run_uploaded_inference(
+    model_registry_uuid: str,
+    model_endpoint: str,
+    body: bytes,
+    payload_hash: str,
+    cacheable=True,
+) -> tuple:
+    """
+    Runs an uploaded JSON payload, it is only parsed when it has to be batched
+    or runs on the local backend
+    """
+    if batching_constants.ENABLED or is_local_endpoint(model_endpoint):
+        return run_inference(
+            model_registry_uuid,
+            model_endpoint,
+            parse_json(body),
+            cacheable,
+            cache_key=payload_hash,
+        )
+    return run_inference_raw(
+        model_registry_uuid, model_endpoint, body, payload_hash, cacheable
+    )
@@ -0,0 +1,139 @@
+import json
+import logging
+
+from app.constants import InferenceCacheConstants as cache_constants
+from app.core.cache import LRUCache, VersionStamp
+from app.models.models import CacheVersionModel
+
+try:
+    import redis
+except ImportError:  # the shared tier is optional
+    redis = None
+
+REDIS_PREFIX = "ezai:inference"
+VERSION_NAME = "inference_cache"
+
+
+class InferenceCache:
+    """
+    Content-addressed cache of inference results.
+    Entries are keyed by (model_registry_uuid, payload hash) and stored as JSON
+    bytes in an in-process LRU tier and, when configured, a shared Redis tier.
+    Invalidating a model bumps a version stamp, the local tier of every other
+    process is dropped when it sees the changed stamp.
+    """
+
+    def __init__(
+        self,
+        max_entries,
+        max_bytes,
+        ttl,
+        redis_uri=None,
+        version_loader=None,
+        version_bump=None,
+        version_check_interval=1.0,
+    ):
+        self.ttl = ttl
+        self.local = LRUCache(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+        self.version = VersionStamp(version_loader, version_check_interval)
+        self.version_bump = version_bump
+        self.version_invalidations = 0
+        self.shared = None
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.shared_errors = 0
+
+        if redis_uri:
+            if redis is None:
+                logging.warning("redis is not installed, shared inference cache disabled")
+            else:
+                self.shared = redis.Redis.from_url(redis_uri)
+
+    @staticmethod
+    def _redis_key(model_registry_uuid, payload_hash):
+        return f"{REDIS_PREFIX}:{model_registry_uuid}:{payload_hash}"
+
+    def update_version(self, version):
+        """Applies a version stamp loaded by the caller, e.g. with an async client"""
+        if self.version.update(version):
+            self._version_changed()
+
+    def _version_changed(self):
+        self.local.clear()
+        self.version_invalidations += 1
+
+    def get(self, model_registry_uuid, payload_hash, check_version=True):
+        if check_version and self.version.check():
+            self._version_changed()
+        key = (model_registry_uuid, payload_hash)
+        data = self.local.get(key)
+
+        if data is None and self.shared is not None:
+            try:
+                data = self.shared.get(self._redis_key(*key))
+            except Exception as e:
+                self.shared_errors += 1
+                logging.warning(f"Shared inference cache unavailable: {e}")
+            if data is None:
+                self.shared_misses += 1
+            else:
+                self.shared_hits += 1
+                self.local.set(key, data, size=len(data))
+
+        if data is None:
+            return None
+        return json.loads(data)
+
+    def set(self, model_registry_uuid, payload_hash, result):
+        key = (model_registry_uuid, payload_hash)
+        data = json.dumps(result, separators=(",", ":")).encode("utf-8")
+        self.local.set(key, data, size=len(data))
+
+        if self.shared is not None:
+            try:
+                self.shared.set(self._redis_key(*key), data, ex=self.ttl)
+            except Exception as e:
+                self.shared_errors += 1
+                logging.warning(f"Shared inference cache unavailable: {e}")
+
+    def invalidate_model(self, model_registry_uuid):
+        self.local.delete_where(lambda key: key[0] == model_registry_uuid)
+        if self.version_bump is not None:
+            self.version_bump()
+
+        if self.shared is not None:
+            try:
+                keys = list(
+                    self.shared.scan_iter(match=f"{REDIS_PREFIX}:{model_registry_uuid}:*")
+                )
+                if keys:
+                    self.shared.delete(*keys)
+            except Exception as e:
+                self.shared_errors += 1
+                logging.warning(f"Failed to invalidate shared inference cache: {e}")
+
+    def stats(self) -> dict:
+        shared_lookups = self.shared_hits + self.shared_misses
+        return {
+            "enabled": cache_constants.ENABLED,
+            "local": self.local.stats(),
+            "version_invalidations": self.version_invalidations,
+            "shared": {
+                "enabled": self.shared is not None,
+                "hits": self.shared_hits,
+                "misses": self.shared_misses,
+                "hit_rate": self.shared_hits / shared_lookups if shared_lookups else 0.0,
+                "errors": self.shared_errors,
+            },
+        }
+
+
+inference_cache = InferenceCache(
+    max_entries=cache_constants.MAX_ENTRIES,
+    max_bytes=cache_constants.MAX_BYTES,
+    ttl=cache_constants.TTL_SECONDS,
+    redis_uri=cache_constants.REDIS_URI,
+    version_loader=lambda: CacheVersionModel.get_version(VERSION_NAME),
+    version_bump=lambda: CacheVersionModel.bump_version(VERSION_NAME),
+    version_check_interval=cache_constants.VERSION_CHECK_SECONDS,
+)
@@ -0,0 +1,78 @@
+import json
+import threading
+
+from app.constants import JWTConstants as jwt_constants
+
+
+class KeyRing:
+    """
+    Signing keys of the API tokens by key id (kid).
+    New tokens are signed with the active key and carry its kid in their header;
+    tokens of any other key of the ring stay valid until they expire, so a key
+    can be rotated by adding the new one, activating it, and dropping the old
+    one a token lifetime later.
+    """
+
+    def __init__(self, keys: dict, active_kid=None):
+        if not keys:
+            raise RuntimeError(
+                "No token signing key configured, set SECRET_KEY, JWT_KEYS or JWT_KEY_FILE"
+            )
+        self.keys = dict(keys)
+        self.active_kid = active_kid or next(iter(self.keys))
+        if self.active_kid not in self.keys:
+            raise RuntimeError(f"Active signing key {self.active_kid} is not configured")
+
+    def signing_key(self) -> tuple:
+        """(kid, secret) to sign new tokens with"""
+        return self.active_kid, self.keys[self.active_kid]
+
+    def verification_key(self, kid=None):
+        """Secret of `kid`, tokens without a kid predate rotation and use the default key"""
+        if kid is None:
+            kid = (
+                jwt_constants.DEFAULT_KID
+                if jwt_constants.DEFAULT_KID in self.keys
+                else self.active_kid
+            )
+        return self.keys.get(kid)
+
+
+def parse_keys(value) -> dict:
+    keys = {}
+    for entry in value.split(","):
+        kid, _, secret = entry.strip().partition(":")
+        if kid and secret:
+            keys[kid] = secret
+    return keys
+
+
+def load_key_ring() -> KeyRing:
+    keys, active_kid = {}, jwt_constants.ACTIVE_KID
+
+    if jwt_constants.KEY_FILE:
+        with open(jwt_constants.KEY_FILE) as key_file:
+            config = json.load(key_file)
+        keys.update(config.get("keys", {}))
+        active_kid = active_kid or config.get("active")
+
+    if jwt_constants.KEYS:
+        keys.update(parse_keys(jwt_constants.KEYS))
+
+    if jwt_constants.SECRET_KEY:
+        keys.setdefault(jwt_constants.DEFAULT_KID, jwt_constants.SECRET_KEY)
+
+    return KeyRing(keys, active_kid)
+
+
+_key_ring = None
+_key_ring_lock = threading.Lock()
+
+
+def get_key_ring() -> KeyRing:
+    global _key_ring
+    if _key_ring is None:
+        with _key_ring_lock:
+            if _key_ring is None:
+                _key_ring = load_key_ring()
+    return _key_ring
@@ -0,0 +1,160 @@
+import os
+import shutil
+import tarfile
+import threading
+from collections import OrderedDict
+
+from app.constants import AppConstants as app_constants
+from app.constants import LocalBackendConstants as local_constants
+
+try:
+    import tensorflow as tf
+except ImportError:  # only needed by models registered on the local backend
+    tf = None
+
+
+def _dir_size(path) -> int:
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            size += os.path.getsize(os.path.join(root, name))
+    return size
+
+
+def _find_saved_model(path) -> str:
+    """Directory of the SavedModel in an extracted artifact, the highest version wins"""
+    candidates = [
+        root for root, _, files in os.walk(path) if "saved_model.pb" in files
+    ]
+    if not candidates:
+        raise ValueError("The model artifact does not contain a SavedModel")
+
+    def version(candidate):
+        name = os.path.basename(candidate)
+        return (1, int(name)) if name.isdigit() else (0, 0)
+
+    return max(candidates, key=version)
+
+
+class LocalModel:
+    def __init__(self, path, size):
+        if tf is None:
+            raise RuntimeError("tensorflow is required for the local backend")
+        self.path = path
+        self.size = size
+        self.module = tf.saved_model.load(path)
+        self.signature = self.module.signatures["serving_default"]
+        self.input_specs = self.signature.structured_input_signature[1]
+
+    def predict(self, inputs):
+        """Runs the serving signature, mirrors TF Serving's columnar "outputs" format"""
+        if isinstance(inputs, dict):
+            feed = {
+                name: tf.constant(inputs[name], dtype=spec.dtype)
+                for name, spec in self.input_specs.items()
+            }
+        else:
+            name, spec = next(iter(self.input_specs.items()))
+            feed = {name: tf.constant(inputs, dtype=spec.dtype)}
+
+        outputs = {
+            name: tensor.numpy().tolist()
+            for name, tensor in self.signature(**feed).items()
+        }
+        if len(outputs) == 1:
+            return next(iter(outputs.values()))
+        return outputs
+
+
+class LocalModelPool:
+    """
+    Warm pool of in-process TensorFlow SavedModels.
+    Models are loaded from their .tar.gz artifact on first use and evicted in
+    LRU order once the size of the loaded models exceeds `max_bytes`.
+    The size of a model is estimated from its extracted SavedModel on disk.
+    """
+
+    def __init__(self, model_dir, max_bytes):
+        self.model_dir = model_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._models = OrderedDict()
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def get(self, key, fetch_artifact) -> LocalModel:
+        """
+        Returns the loaded model for `key`. On a miss `fetch_artifact(directory)`
+        must place the model .tar.gz in `directory` and return its path.
+        """
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return model
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # concurrent requests for a cold model wait for a single load
+        with load_lock:
+            with self._lock:
+                model = self._models.get(key)
+            if model is not None:
+                return model
+
+            model = self._load(key, fetch_artifact)
+
+            with self._lock:
+                self._models[key] = model
+                self.loads += 1
+                self._evict()
+            return model
+
+    def _load(self, key, fetch_artifact) -> LocalModel:
+        model_path = os.path.join(self.model_dir, key)
+        shutil.rmtree(model_path, ignore_errors=True)
+        os.makedirs(model_path)
+
+        archive = fetch_artifact(model_path)
+        with tarfile.open(archive) as artifact:
+            if hasattr(tarfile, "data_filter"):
+                artifact.extractall(model_path, filter="data")
+            else:
+                artifact.extractall(model_path)
+        os.remove(archive)
+
+        saved_model_path = _find_saved_model(model_path)
+        return LocalModel(saved_model_path, _dir_size(saved_model_path))
+
+    def _evict(self):
+        while len(self._models) > 1 and self.memory_bytes() > self.max_bytes:
+            key, _ = self._models.popitem(last=False)
+            self._load_locks.pop(key, None)
+            shutil.rmtree(os.path.join(self.model_dir, key), ignore_errors=True)
+            self.evictions += 1
+
+    def evict(self, key):
+        with self._lock:
+            if self._models.pop(key, None) is not None:
+                self._load_locks.pop(key, None)
+                shutil.rmtree(os.path.join(self.model_dir, key), ignore_errors=True)
+
+    def memory_bytes(self) -> int:
+        return sum(model.size for model in self._models.values())
+
+    def stats(self) -> dict:
+        return {
+            "models": len(self._models),
+            "memory_bytes": self.memory_bytes(),
+            "hits": self.hits,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
+
+
+local_model_pool = LocalModelPool(
+    model_dir=app_constants.MODEL_LOCAL_TEMP_DIR,
+    max_bytes=local_constants.MAX_MEMORY_BYTES,
+)
@@ -0,0 +1,219 @@
+import hmac
+import ipaddress
+import os
+import threading
+import time
+
+from flask import g, request
+from prometheus_client import (
+    CollectorRegistry,
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from pymongo import monitoring
+from werkzeug.exceptions import Forbidden, Unauthorized
+
+from app.constants import MetricsConstants as metrics_constants
+
+# With PROMETHEUS_MULTIPROC_DIR set (see supervisord.conf) every process,
+# including the Celery workers, writes its samples to that directory and
+# /metrics aggregates them. The directory is emptied once at container start
+# (see Dockerfile), files left by an earlier run would be aggregated too.
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+REQUEST_LATENCY = Histogram(
+    "ezai_request_latency_seconds",
+    "Latency of HTTP requests per route",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "ezai_requests_in_flight",
+    "HTTP requests currently being served",
+    ["route"],
+    multiprocess_mode="livesum",
+)
+UPSTREAM_LATENCY = Histogram(
+    "ezai_upstream_latency_seconds",
+    "Latency of model invocations per endpoint",
+    ["endpoint"],
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "ezai_upstream_in_flight",
+    "Model invocations currently waiting on the backend",
+    multiprocess_mode="livesum",
+)
+SIGV4_LATENCY = Histogram(
+    "ezai_sigv4_signing_seconds",
+    "Time spent signing SageMaker runtime requests in get_header",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05),
+)
+JWT_DECODE_LATENCY = Histogram(
+    "ezai_jwt_decode_seconds",
+    "Time spent decoding and verifying JWTs",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05),
+)
+MONGO_LATENCY = Histogram(
+    "ezai_mongo_command_seconds",
+    "Latency of MongoDB commands",
+    ["command", "collection"],
+)
+MONGO_FAILURES = Counter(
+    "ezai_mongo_command_failures_total",
+    "Failed MongoDB commands",
+    ["command", "collection"],
+)
+TASK_DURATION = Histogram(
+    "ezai_celery_task_seconds",
+    "Duration of Celery tasks",
+    ["task", "state"],
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600),
+)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Observes the server-side duration of every command of a MongoClient"""
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self._collections[event.request_id] = (
+            collection if isinstance(collection, str) else ""
+        )
+
+    def _labels(self, event):
+        return event.command_name, self._collections.pop(event.request_id, "")
+
+    def succeeded(self, event):
+        MONGO_LATENCY.labels(*self._labels(event)).observe(
+            event.duration_micros / 1e6
+        )
+
+    def failed(self, event):
+        labels = self._labels(event)
+        MONGO_LATENCY.labels(*labels).observe(event.duration_micros / 1e6)
+        MONGO_FAILURES.labels(*labels).inc()
+
+
+mongo_listener = MongoCommandListener()
+
+
+class StatsCollector:
+    """Exposes the in-process cache and connection pool counters of this process"""
+
+    def __init__(self):
+        self._sources = {}
+
+    def add(self, name, stats_fn):
+        self._sources[name] = stats_fn
+
+    def collect(self):
+        for name, stats_fn in self._sources.items():
+            metric = GaugeMetricFamily(
+                f"ezai_{name}", f"Counters of the {name} of this process", labels=["stat"]
+            )
+            for stat, value in stats_fn().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric.add_metric([stat], value)
+            yield metric
+
+
+stats_collector = StatsCollector()
+
+
+def mark_process_dead(pid):
+    """Drops the live gauges of an exited worker process, see gunicorn.conf.py"""
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
+
+
+def registry():
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        collector_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(collector_registry)
+        collector_registry.register(stats_collector)
+        return collector_registry
+    return REGISTRY
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def is_loopback(addr) -> bool:
+    try:
+        return ipaddress.ip_address(addr or "").is_loopback
+    except ValueError:
+        return False
+
+
+def authorize_scrape():
+    """
+    Rejects /metrics requests that carry neither METRICS_SCRAPE_TOKEN nor, when
+    no token is configured, come from a loopback address. The counters name the
+    endpoints and routes served and the state of every cache.
+    """
+    if metrics_constants.SCRAPE_TOKEN:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(
+            token.encode(), metrics_constants.SCRAPE_TOKEN.encode()
+        ):
+            raise Unauthorized("A valid metrics scrape token is required")
+        return
+    # both the peer and, behind ProxyFix, the forwarded client must be local
+    peer = request.environ.get("werkzeug.proxy_fix.orig", {}).get(
+        "REMOTE_ADDR", request.remote_addr
+    )
+    if not (is_loopback(peer) and is_loopback(request.remote_addr)):
+        raise Forbidden("Metrics are only served to local scrapers")
+
+
+def render_metrics():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = registry()
+                if _registry is REGISTRY:
+                    REGISTRY.register(stats_collector)
+    return generate_latest(_registry), 200, {"Content-Type": CONTENT_TYPE_LATEST}
+
+
+def init_metrics(app):
+    """Times every request and tracks the requests in flight per route"""
+
+    def route():
+        return request.url_rule.rule if request.url_rule else "unmatched"
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_route = route()
+        g.metrics_started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.labels(g.metrics_route).inc()
+
+    @app.after_request
+    def observe_request(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            REQUEST_LATENCY.labels(
+                request.method, g.metrics_route, response.status_code
+            ).observe(time.perf_counter() - started)
+        return response
+
+    @app.teardown_request
+    def finish_request(exc=None):
+        request_route = g.pop("metrics_route", None)
+        if request_route is not None:
+            REQUESTS_IN_FLIGHT.labels(request_route).dec()
@@ -0,0 +1,106 @@
+import base64
+
+from bson import json_util
+from pymongo import ASCENDING
+
+from app.constants import PaginationConstants as pagination_constants
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def page_size_or_default(page_size) -> int:
+    try:
+        page_size = int(page_size)
+    except (TypeError, ValueError):
+        return pagination_constants.DEFAULT_PAGE_SIZE
+    return max(1, min(page_size, pagination_constants.MAX_PAGE_SIZE))
+
+
+def encode_cursor(values: dict) -> str:
+    """Opaque cursor of the sort key values of the last item of a page"""
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode("utf-8")).decode(
+        "ascii"
+    )
+
+
+def decode_cursor(cursor) -> dict:
+    if not cursor:
+        return None
+    try:
+        values = json_util.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if not isinstance(values, dict):
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+def keyset_filter(sort, last: dict) -> dict:
+    """
+    Filter matching the documents after `last` in the order of `sort`, a list of
+    (field, direction) pairs ending in a unique field:
+    (a > x) or (a == x and b > y) or ...
+    """
+    if last is None:
+        return {}
+    if any(field not in last for field, _ in sort):
+        raise InvalidCursor("Cursor does not match the sort order")
+
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {previous: last[previous] for previous, _ in sort[:i]}
+        clause[field] = {"$gt" if direction == ASCENDING else "$lt": last[field]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def collect_page(documents, sort, page_size, serialize=None):
+    """
+    Reads up to page_size + 1 documents from a cursor and returns the page,
+    passed through `serialize` as it streams by, and the cursor of the next
+    page, None on the last page. The sort values of the cursor are read before
+    `serialize`, which may change or drop them; a missing one is stored as None,
+    where MongoDB sorts missing fields, and keyset_filter continues from there.
+    """
+    items, last = [], None
+    for document in documents:
+        if len(items) == page_size:
+            return items, encode_cursor(last)
+        last = {field: document.get(field) for field, _ in sort}
+        items.append(serialize(document) if serialize else document)
+    return items, None
+
+
+def paginate(
+    collection, query, sort, page_size, cursor=None, projection=None, serialize=None
+):
+    """Keyset paginated find, `sort` must be backed by an index to stay flat"""
+    after = keyset_filter(sort, decode_cursor(cursor))
+    if after:
+        query = {"$and": [query, after]} if query else after
+    documents = (
+        collection.find(query, projection)
+        .sort(sort)
+        .limit(page_size + 1)
+        .batch_size(page_size + 1)
+    )
+    return collect_page(documents, sort, page_size, serialize)
+
+
+def add_pagination_arguments(parser):
+    """Adds the page_size and cursor query arguments of a paginated listing"""
+    parser.add_argument(
+        "page_size",
+        type=int,
+        required=False,
+        help=f"Items per page, at most {pagination_constants.MAX_PAGE_SIZE}",
+    )
+    parser.add_argument(
+        "cursor",
+        type=str,
+        required=False,
+        help="The next_cursor of the previous page",
+    )
+    return parser
@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from app.constants import PasswordHashingConstants as hashing_constants
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full, the caller should answer 429"""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded thread pool, bcrypt releases the GIL so the hashes
+    use other cores while request threads only wait on their own result.
+    At most `max_pending` hashes may be running or queued, further calls raise
+    PasswordHasherBusy instead of piling up behind a login burst.
+    """
+
+    def __init__(self, rounds, max_workers, max_pending):
+        self.rounds = rounds
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="bcrypt"
+        )
+        self._slots = threading.BoundedSemaphore(max(max_pending, max_workers))
+        self.rejected = 0
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordHasherBusy("Too many password hashes in progress")
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _hash(self, raw_password):
+        return bcrypt.hashpw(
+            raw_password.encode("utf-8"), bcrypt.gensalt(rounds=self.rounds)
+        ).decode("utf-8")
+
+    def hash(self, raw_password) -> str:
+        return self._submit(self._hash, raw_password).result()
+
+    def hash_in_background(self, raw_password, callback):
+        """Hashes without waiting, `callback(hashed)` runs on the pool. Skipped when busy"""
+        try:
+            future = self._submit(self._hash, raw_password)
+        except PasswordHasherBusy:
+            return False
+        future.add_done_callback(
+            lambda done: callback(done.result()) if done.exception() is None else None
+        )
+        return True
+
+    def verify(self, raw_password, hashed_password) -> bool:
+        return self._submit(
+            bcrypt.checkpw, raw_password.encode("utf-8"), hashed_password.encode("utf-8")
+        ).result()
+
+    def needs_rehash(self, hashed_password) -> bool:
+        # bcrypt hashes look like $2b$<rounds>$<salt and hash>
+        try:
+            return int(hashed_password.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def stats(self) -> dict:
+        return {"rounds": self.rounds, "rejected": self.rejected}
+
+
+password_hasher = PasswordHasher(
+    rounds=hashing_constants.ROUNDS,
+    max_workers=hashing_constants.MAX_WORKERS,
+    max_pending=hashing_constants.MAX_PENDING,
+)
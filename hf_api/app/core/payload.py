@@ -0,0 +1,211 @@
+import hashlib
+import io
+import json
+import os
+import re
+
+from app.core.batcher import OUTPUT_KEYS
+
+try:
+    import numpy as np
+except ImportError:  # only needed for binary tensor payloads
+    np = None
+
+try:
+    import msgpack
+    import msgpack_numpy
+except ImportError:
+    msgpack = None
+    msgpack_numpy = None
+
+CHUNK_SIZE = 1024 * 1024
+
+JSON = "json"
+NPY = "npy"
+MSGPACK = "msgpack"
+
+CONTENT_TYPES = {
+    JSON: "application/json",
+    NPY: "application/x-npy",
+    MSGPACK: "application/x-msgpack",
+}
+EXTENSIONS = {".json": JSON, ".npy": NPY, ".msgpack": MSGPACK}
+
+# batch inference datasets: one input row per line, or the rows of an array
+JSONL = "jsonl"
+BATCH_EXTENSIONS = {".jsonl": JSONL, ".npy": NPY}
+
+# strings (optionally followed by a colon, i.e. object keys) and brackets,
+# everything else (numbers, literals, commas) is skipped by the scanner
+_JSON_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"\s*(:)?|[{}\[\]]')
+_LEADING_WHITESPACE = re.compile(rb"\s*")
+
+
+class InvalidPayload(ValueError):
+    pass
+
+
+def read_payload(stream, chunk_size=CHUNK_SIZE) -> tuple:
+    """
+    Reads an uploaded file once, hashing each chunk as it is read.
+    Returns (body, sha256 hex digest), the body is forwarded as-is.
+    """
+    digest = hashlib.sha256()
+    chunks = []
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), digest.hexdigest()
+
+
+def hash_body(body: bytes, chunk_size=CHUNK_SIZE) -> str:
+    digest = hashlib.sha256()
+    view = memoryview(body)
+    for offset in range(0, len(view), chunk_size):
+        digest.update(view[offset : offset + chunk_size])
+    return digest.hexdigest()
+
+
+def parse_json(body: bytes):
+    """Parses an uploaded JSON body, raises InvalidPayload when it is malformed"""
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        raise InvalidPayload(f"Invalid JSON data provided: {e}") from e
+
+
+def has_top_level_key(body: bytes, key: str) -> bool:
+    """
+    Structural check that `body` is a JSON object with `key` at the top level.
+    Nothing is materialized, and the scan stops as soon as the key is found,
+    which for {"inputs": [...]} payloads is within the first few bytes.
+    """
+    start = _LEADING_WHITESPACE.match(body).end()
+    if body[start : start + 1] != b"{":
+        return False
+
+    wanted = b'"' + key.encode("utf-8") + b'"'
+    depth = 0
+    for token in _JSON_TOKEN.finditer(body, start):
+        char = body[token.start()]
+        if char in b"{[":
+            depth += 1
+        elif char in b"}]":
+            depth -= 1
+            if depth == 0:
+                return False
+        elif depth == 1 and token.group(1) is not None:
+            if body[token.start() : token.start() + len(wanted)] == wanted:
+                return True
+    return False
+
+
+def detect_format(filename, mimetype=None):
+    """Payload format of an upload from its content type or file extension"""
+    for fmt, content_type in CONTENT_TYPES.items():
+        if mimetype == content_type:
+            return fmt
+    return EXTENSIONS.get(os.path.splitext(filename or "")[1].lower())
+
+
+def _require_numpy(fmt):
+    if np is None or (fmt == MSGPACK and msgpack is None):
+        raise ValueError(f"{fmt} payloads are not supported on this server")
+
+
+def tensor_to_json(body: bytes, fmt: str) -> bytes:
+    """
+    Converts an NPY or msgpack-numpy upload into the {"inputs": [...]} JSON body
+    TensorFlow Serving expects, in one vectorized tolist() + dumps step.
+    """
+    _require_numpy(fmt)
+
+    if fmt == NPY:
+        array = np.load(io.BytesIO(body), allow_pickle=False)
+    elif fmt == MSGPACK:
+        data = msgpack.unpackb(body, object_hook=msgpack_numpy.decode, raw=False)
+        if isinstance(data, dict):
+            data = data.get("inputs")
+        if data is None:
+            raise ValueError("msgpack payload has no inputs")
+        array = np.asarray(data)
+    else:
+        raise ValueError(f"Unsupported payload format: {fmt}")
+
+    return json.dumps({"inputs": array.tolist()}).encode("utf-8")
+
+
+def encode_result(result, fmt: str):
+    """
+    Encodes the outputs of an inference result as NPY or msgpack-numpy.
+    Returns None when the result has no array-like outputs or the format is
+    not supported on this server.
+    """
+    if np is None or (fmt == MSGPACK and msgpack is None):
+        return None
+
+    if not isinstance(result, dict):
+        return None
+    for output_key in OUTPUT_KEYS:
+        if output_key in result:
+            break
+    else:
+        return None
+
+    outputs = result[output_key]
+    if fmt == MSGPACK:
+        if isinstance(outputs, dict):
+            outputs = {name: np.asarray(value) for name, value in outputs.items()}
+        else:
+            outputs = np.asarray(outputs)
+        return msgpack.packb({output_key: outputs}, default=msgpack_numpy.encode)
+
+    if fmt == NPY and isinstance(outputs, list):
+        buffer = io.BytesIO()
+        np.save(buffer, np.asarray(outputs), allow_pickle=False)
+        return buffer.getvalue()
+
+    return None
+
+
+def detect_batch_format(filename):
+    return BATCH_EXTENSIONS.get(os.path.splitext(filename or "")[1].lower())
+
+
+def count_rows(path: str, fmt: str) -> int:
+    if fmt == NPY:
+        _require_numpy(fmt)
+        return int(np.load(path, mmap_mode="r", allow_pickle=False).shape[0])
+
+    rows = 0
+    with open(path, "rb") as dataset:
+        for line in dataset:
+            if line.strip():
+                rows += 1
+    return rows
+
+
+def iter_row_chunks(path: str, fmt: str, chunk_size: int):
+    """Streams a JSONL or NPY dataset as lists of at most `chunk_size` input rows"""
+    if fmt == NPY:
+        _require_numpy(fmt)
+        # memory-mapped, only the current chunk is materialized
+        array = np.load(path, mmap_mode="r", allow_pickle=False)
+        for start in range(0, array.shape[0], chunk_size):
+            yield array[start : start + chunk_size].tolist()
+        return
+
+    rows = []
+    with open(path, "rb") as dataset:
+        for line in dataset:
+            if not line.strip():
+                continue
+            rows.append(json.loads(line))
+            if len(rows) == chunk_size:
+                yield rows
+                rows = []
+    if rows:
+        yield rows
@@ -0,0 +1,125 @@
+import math
+import re
+
+from app.constants import SearchConstants as search_constants
+
+# Models carry a `search_grams` array with a multikey index. Every word of the
+# model name, type and owner contributes its prefixes ("p:res", "p:resn", ...)
+# for prefix matching and its trigrams ("t:^re", "t:res", ...) for typo
+# tolerant matching. A query only ever reads the index entries of its own grams.
+
+PREFIX = "p:"
+TRIGRAM = "t:"
+
+
+def tokenize(text) -> list:
+    return re.findall(r"[a-z0-9]+", (text or "").lower())
+
+
+def trigrams(token) -> set:
+    padded = f"^{token}$"
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def index_grams(*texts) -> list:
+    """The search_grams of a model from its searchable fields"""
+    grams = set()
+    for text in texts:
+        for token in tokenize(text):
+            longest = min(len(token), search_constants.MAX_PREFIX_LENGTH)
+            grams.update(PREFIX + token[:length] for length in range(1, longest + 1))
+            grams.update(TRIGRAM + gram for gram in trigrams(token))
+    return sorted(grams)
+
+
+def query_grams(query) -> tuple:
+    """(prefix grams, trigram grams) of a query"""
+    tokens = tokenize(query)
+    prefixes = sorted(
+        {PREFIX + token[: search_constants.MAX_PREFIX_LENGTH] for token in tokens}
+    )
+    typo_grams = sorted(
+        {
+            TRIGRAM + gram
+            for token in tokens
+            if len(token) >= 3
+            for gram in trigrams(token)
+        }
+    )
+    return prefixes, typo_grams
+
+
+def candidates(gram, projection: dict) -> list:
+    """Stages reading at most CANDIDATES_PER_GRAM models holding `gram`"""
+    return [
+        {"$match": {"search_grams": gram}},
+        {"$limit": search_constants.CANDIDATES_PER_GRAM},
+        {"$project": {**projection, "search_grams": 1}},
+    ]
+
+
+def search_pipeline(collection_name, query, projection: dict) -> list:
+    """
+    Aggregation stages scoring the models of `collection_name` matching `query`,
+    highest `score` first. A prefix match of a query word outranks any number of
+    trigram hits; models matching no prefix need MIN_TRIGRAM_OVERLAP of the
+    query trigrams.
+    Each gram of the query contributes at most CANDIDATES_PER_GRAM models, so the
+    cost is bounded by the number of query grams whatever the catalog size. A
+    gram shared by more models, like the prefix of a common word, only ranks an
+    arbitrary subset of them; the rarer grams of a longer query still find
+    their models.
+    Pagination and the result limit are appended by the caller.
+    """
+    prefixes, typo_grams = query_grams(query)
+    if not prefixes:
+        return None
+
+    first, *rest = prefixes + typo_grams
+    # one prefix hit is worth more than every query trigram
+    prefix_weight = len(typo_grams) + 1
+    min_overlap = math.ceil(len(typo_grams) * search_constants.MIN_TRIGRAM_OVERLAP)
+    return [
+        *candidates(first, projection),
+        *(
+            {
+                "$unionWith": {
+                    "coll": collection_name,
+                    "pipeline": candidates(gram, projection),
+                }
+            }
+            for gram in rest
+        ),
+        # a model holding several query grams is read once per gram
+        {"$group": {"_id": "$model_uuid", "model": {"$first": "$$ROOT"}}},
+        {"$replaceRoot": {"newRoot": "$model"}},
+        {
+            "$addFields": {
+                "prefix_hits": {
+                    "$size": {"$setIntersection": ["$search_grams", prefixes]}
+                },
+                "typo_hits": {
+                    "$size": {"$setIntersection": ["$search_grams", typo_grams]}
+                },
+            }
+        },
+        {
+            "$match": {
+                "$or": [
+                    {"prefix_hits": {"$gt": 0}},
+                    {"typo_hits": {"$gte": max(min_overlap, 1)}},
+                ]
+            }
+        },
+        {
+            "$addFields": {
+                "score": {
+                    "$add": [
+                        {"$multiply": ["$prefix_hits", prefix_weight]},
+                        "$typo_hits",
+                    ]
+                }
+            }
+        },
+        {"$project": {**projection, "score": 1}},
+    ]
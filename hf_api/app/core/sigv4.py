@@ -0,0 +1,143 @@
+import hashlib
+import hmac
+import os
+import threading
+from datetime import datetime, timezone
+
+from app.constants import SageMakerConstants as sm_constants
+
+ALGORITHM = "AWS4-HMAC-SHA256"
+SIGNED_HEADERS = "host;x-amz-content-sha256;x-amz-date"
+
+
+def get_signature_key(key, date_stamp, region_name, service_name):
+    k_date = hmac.new(
+        ("AWS4" + key).encode("utf-8"), date_stamp.encode("utf-8"), hashlib.sha256
+    ).digest()
+    k_region = hmac.new(k_date, region_name.encode("utf-8"), hashlib.sha256).digest()
+    k_service = hmac.new(
+        k_region, service_name.encode("utf-8"), hashlib.sha256
+    ).digest()
+    k_signing = hmac.new(
+        k_service, "aws4_request".encode("utf-8"), hashlib.sha256
+    ).digest()
+    return k_signing
+
+
+def hash_payload(payload) -> str:
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class SigV4Signer:
+    """
+    Reusable SigV4 signer for the SageMaker runtime.
+    The derived signing key only depends on (date, region, service), so it is
+    computed once per UTC day instead of four HMACs per request.
+    """
+
+    def __init__(
+        self,
+        access_key=None,
+        secret_key=None,
+        region=None,
+        host=None,
+        service="sagemaker",
+    ):
+        self.access_key = access_key or os.environ.get("AWS_ACCESS_KEY_ID")
+        self.secret_key = secret_key or os.environ.get("AWS_SECRET_ACCESS_KEY")
+        self.region = region or sm_constants.REGION
+        self.host = host or sm_constants.RUNTIME_HOST
+        self.service = service
+        self._lock = threading.Lock()
+        self._signing_keys = {}
+
+    def signing_key(self, date_stamp, region, service) -> bytes:
+        scope = (date_stamp, region, service)
+        key = self._signing_keys.get(scope)
+        if key is None:
+            key = get_signature_key(self.secret_key, date_stamp, region, service)
+            with self._lock:
+                # rotate at UTC midnight: keys of previous days are never used again
+                self._signing_keys = {
+                    cached_scope: cached_key
+                    for cached_scope, cached_key in self._signing_keys.items()
+                    if cached_scope[0] == date_stamp
+                }
+                self._signing_keys[scope] = key
+        return key
+
+    def sign(
+        self,
+        endpoint,
+        payload=None,
+        payload_hash=None,
+        region=None,
+        host=None,
+        content_type="application/json",
+        now=None,
+    ) -> dict:
+        region = region or self.region
+        host = host or (
+            self.host if region == self.region else sm_constants.runtime_host(region)
+        )
+        if payload_hash is None:
+            payload_hash = hash_payload(payload if payload is not None else b"")
+
+        now = now or datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        date_stamp = amz_date[:8]
+
+        canonical_request = "\n".join(
+            (
+                "POST",
+                f"/endpoints/{endpoint}/invocations",
+                "",
+                f"host:{host}",
+                f"x-amz-content-sha256:{payload_hash}",
+                f"x-amz-date:{amz_date}",
+                "",
+                SIGNED_HEADERS,
+                payload_hash,
+            )
+        )
+        credential_scope = f"{date_stamp}/{region}/{self.service}/aws4_request"
+        string_to_sign = "\n".join(
+            (
+                ALGORITHM,
+                amz_date,
+                credential_scope,
+                hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+            )
+        )
+
+        signature = hmac.new(
+            self.signing_key(date_stamp, region, self.service),
+            string_to_sign.encode("utf-8"),
+            hashlib.sha256,
+        ).hexdigest()
+
+        return {
+            "X-Amz-Content-Sha256": payload_hash,
+            "X-Amz-Date": amz_date,
+            "Authorization": (
+                f"{ALGORITHM} Credential={self.access_key}/{credential_scope}, "
+                f"SignedHeaders={SIGNED_HEADERS}, Signature={signature}"
+            ),
+            "Content-Type": content_type,
+        }
+
+
+_default_signer = None
+_default_signer_lock = threading.Lock()
+
+
+def get_signer() -> SigV4Signer:
+    """Process-wide signer, credentials are read from the environment once"""
+    global _default_signer
+    if _default_signer is None:
+        with _default_signer_lock:
+            if _default_signer is None:
+                _default_signer = SigV4Signer()
+    return _default_signer
@@ -0,0 +1,203 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from pymongo import WriteConcern
+from pymongo.errors import BulkWriteError
+
+_STOP = object()
+
+
+def write_concern(w, journal=False) -> WriteConcern:
+    return WriteConcern(w=int(w) if str(w).isdigit() else w, j=journal or None)
+
+
+class BulkWriter:
+    """
+    Write-behind buffer for insert-only documents.
+    Documents are queued and inserted by a background thread with unordered
+    `insert_many` calls, once `batch_size` documents are waiting or
+    `flush_interval` seconds after the first one arrived. When the queue is full
+    the document is inserted synchronously instead, so writes are never dropped.
+    `collection` is a callable returning the target collection, resolved on
+    every write so the writer never holds a client across a fork.
+    Buffered documents can still be read back through `get_pending` until they
+    are flushed, keyed by `key_field`. `on_write(documents)` is called with the
+    documents of every successful write, buffered or not.
+    """
+
+    def __init__(
+        self,
+        collection,
+        key_field,
+        max_queue,
+        batch_size,
+        flush_interval,
+        write_concern=None,
+        on_write=None,
+    ):
+        self._collection = collection
+        self.write_concern = write_concern
+        self.key_field = key_field
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_write = on_write
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.buffered = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.sync_writes = 0
+        self.failed = 0
+        atexit.register(self.close)
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # the parent still owns the documents it queued
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @property
+    def collection(self):
+        collection = self._collection()
+        if self.write_concern is not None:
+            collection = collection.with_options(write_concern=self.write_concern)
+        return collection
+
+    def _ensure_started(self):
+        # the flush thread does not survive a fork, start one per process
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="bulk-writer", daemon=True
+            )
+            self._thread.start()
+
+    def try_submit(self, document) -> bool:
+        """Queues the document, False if the buffer is full"""
+        self._ensure_started()
+        key = document.get(self.key_field)
+        self._pending[key] = document
+        try:
+            self._queue.put_nowait(document)
+        except queue.Full:
+            self._pending.pop(key, None)
+            return False
+        self.buffered += 1
+        return True
+
+    def submit(self, document):
+        if not self.try_submit(document):
+            self.sync_writes += 1
+            self.collection.insert_one(document)
+            self._written([document])
+
+    def get_pending(self, key):
+        """The buffered document for `key`, None once it reached the database"""
+        document = self._pending.get(key)
+        return dict(document) if document is not None else None
+
+    def _run(self):
+        while True:
+            document = self._queue.get()
+            if document is _STOP:
+                return
+
+            batch = [document]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    document = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if document is _STOP:
+                    stop = True
+                    break
+                batch.append(document)
+
+            self._write(batch)
+            if stop:
+                return
+
+    def _written(self, documents):
+        if self.on_write is None or not documents:
+            return
+        try:
+            self.on_write(documents)
+        except Exception as e:
+            logging.error(f"Failed to process {len(documents)} written documents: {e}")
+
+    def _write(self, batch):
+        try:
+            self.collection.insert_many(batch, ordered=False)
+            self.flushed += len(batch)
+            self._written(batch)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            self.flushed += len(batch) - len(errors)
+            self.failed += len(errors)
+            logging.error(f"Failed to write {len(errors)} buffered documents: {errors[:3]}")
+            failed = {error["index"] for error in errors}
+            self._written(
+                [document for i, document in enumerate(batch) if i not in failed]
+            )
+        except Exception as e:
+            self.failed += len(batch)
+            logging.error(f"Failed to write {len(batch)} buffered documents: {e}")
+        finally:
+            self.flushes += 1
+            for document in batch:
+                self._pending.pop(document.get(self.key_field), None)
+
+    def flush(self):
+        """Synchronously writes whatever is still queued"""
+        batch = []
+        while True:
+            try:
+                document = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if document is not _STOP:
+                batch.append(document)
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def close(self, timeout=5.0):
+        """Stops the flush thread after it wrote out the queue"""
+        if self._thread is not None and self._pid == os.getpid():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+                self._thread.join(timeout)
+            except queue.Full:
+                pass
+        self._pid = None
+        self._thread = None
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "buffered": self.buffered,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "sync_writes": self.sync_writes,
+            "failed": self.failed,
+        }
@@ -0,0 +1,190 @@
+import json, os, tempfile, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from celery import states
+
+from app.jobs.model_registry_worker import worker
+from app.models.models import InferenceModel, JobsModel
+from app.constants import AppConstants as app_constants
+from app.constants import InferenceStatus as inference_status
+from app.constants import BatchInferenceConstants as batch_constants
+from app.core.batcher import get_row_outputs
+from app.core.inference import (
+    get_sagemaker_manager,
+    run_inference,
+    run_uploaded_inference,
+)
+from app.core.payload import count_rows, iter_row_chunks
+
+
+@worker.task(bind=True)
+def inference_worker(
+    self,
+    inference_uuid: str,
+    model_registry_uuid: str,
+    model_endpoint: str,
+    body: str,
+    payload_hash: str,
+    cacheable: bool = True,
+) -> str:
+    InferenceModel.update_record_by_uuid(
+        inference_uuid, inference_status=inference_status.RUNNING
+    )
+
+    try:
+        status_code, inference_result = run_uploaded_inference(
+            model_registry_uuid=model_registry_uuid,
+            model_endpoint=model_endpoint,
+            body=body.encode("utf-8"),
+            payload_hash=payload_hash,
+            cacheable=cacheable,
+        )
+    except Exception as e:
+        InferenceModel.update_record_by_uuid(
+            inference_uuid,
+            inference_status=inference_status.FAILED,
+            inference_result=str(e),
+        )
+        raise
+
+    InferenceModel.update_record_by_uuid(
+        inference_uuid,
+        inference_status=(
+            inference_status.COMPLETED
+            if status_code == 200
+            else inference_status.FAILED
+        ),
+        inference_result=inference_result,
+    )
+
+    return inference_uuid
+
+
+def _write_chunk(output, rows, status_code, result) -> int:
+    """Writes one result line per input row, returns the number of failed rows"""
+    row_outputs = get_row_outputs(result, len(rows)) if status_code == 200 else None
+
+    if row_outputs is None:
+        line = json.dumps({"status": status_code, "error": result}) + "\n"
+        output.write(line * len(rows))
+        return len(rows)
+
+    _, outputs = row_outputs
+    output.writelines(json.dumps({"output": row}) + "\n" for row in outputs)
+    return 0
+
+
+@worker.task(bind=True)
+def batch_inference_worker(
+    self,
+    user_uuid: str,
+    model_registry_uuid: str,
+    model_endpoint: str,
+    input_url: str,
+    data_format: str,
+    output_key_prefix: str,
+    cacheable: bool = True,
+) -> str:
+    """
+    Streams the dataset in fixed-size chunks, keeps at most MAX_PARALLEL calls
+    to the endpoint in flight and appends the results to a JSONL artifact in
+    input order. The dataset is read from and the artifact written to S3, only
+    the job's working copies are kept on local disk. Progress is tracked on the
+    JobsModel record of the task, a finished job counts as one run of the model.
+    """
+    job_uuid = self.request.id
+    JobsModel.update_task_status(job_uuid, states.STARTED)
+    sm = get_sagemaker_manager()
+
+    def score(rows):
+        status_code, result = run_inference(
+            model_registry_uuid=model_registry_uuid,
+            model_endpoint=model_endpoint,
+            payload={"inputs": rows},
+            cacheable=cacheable,
+        )
+        return rows, status_code, result
+
+    started = time.monotonic()
+    last_report = started
+    rows_done = 0
+    rows_failed = 0
+
+    work_dir = os.path.abspath(app_constants.BATCH_TEMP_DIR)
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        with tempfile.TemporaryDirectory(dir=work_dir) as directory:
+            input_path = sm.download_batch_file(input_url, directory)
+            output_path = os.path.join(directory, f"{job_uuid}.jsonl")
+            JobsModel.update_task_progress(
+                job_uuid,
+                rows_total=count_rows(input_path, data_format),
+                rows_done=0,
+                rows_failed=0,
+                rows_per_second=0.0,
+            )
+
+            with open(output_path, "w") as output, ThreadPoolExecutor(
+                max_workers=batch_constants.MAX_PARALLEL
+            ) as pool:
+                pending = deque()
+                chunks = iter_row_chunks(
+                    input_path, data_format, batch_constants.CHUNK_SIZE
+                )
+
+                for rows in chunks:
+                    pending.append(pool.submit(score, rows))
+                    # bounded parallelism, and only the in-flight chunks are in memory
+                    while len(pending) >= batch_constants.MAX_PARALLEL or (
+                        pending and pending[0].done()
+                    ):
+                        rows_written = pending.popleft().result()
+                        rows_failed += _write_chunk(output, *rows_written)
+                        rows_done += len(rows_written[0])
+
+                    now = time.monotonic()
+                    if now - last_report >= batch_constants.PROGRESS_INTERVAL_SECONDS:
+                        last_report = now
+                        JobsModel.update_task_progress(
+                            job_uuid,
+                            rows_done=rows_done,
+                            rows_failed=rows_failed,
+                            rows_per_second=rows_done / (now - started),
+                        )
+
+                while pending:
+                    rows_written = pending.popleft().result()
+                    rows_failed += _write_chunk(output, *rows_written)
+                    rows_done += len(rows_written[0])
+
+            output_url = sm.upload_batch_file(output_path, output_key_prefix)
+
+    except Exception:
+        JobsModel.update_task_status(job_uuid, states.FAILURE)
+        raise
+
+    finally:
+        elapsed = time.monotonic() - started
+        JobsModel.update_task_progress(
+            job_uuid,
+            rows_done=rows_done,
+            rows_failed=rows_failed,
+            rows_per_second=rows_done / elapsed if elapsed else 0.0,
+        )
+
+    JobsModel.update_task_progress(job_uuid, output_url=output_url)
+    # one inference record per job, counted like any other run of the model
+    InferenceModel.save_inference_to_db(
+        user_uuid=user_uuid,
+        model_registry_uuid=model_registry_uuid,
+        inference_status=inference_status.COMPLETED,
+        inference_result={
+            "job_uuid": job_uuid,
+            "rows_done": rows_done,
+            "rows_failed": rows_failed,
+        },
+        buffered=False,
+    )
+    JobsModel.update_task_status(job_uuid, states.SUCCESS)
+    return output_url
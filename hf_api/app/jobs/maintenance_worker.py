@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+
+from app.jobs.model_registry_worker import worker
+from app.models.models import LeaderboardModel, UserModel
+from app.core.inference import get_sagemaker_manager
+from app.constants import ContributorConstants as contributor_constants
+from app.constants import LeaderboardConstants as leaderboard_constants
+from app.constants import BatchInferenceConstants as batch_constants
+
+
+@worker.task
+def reconcile_leaderboard_worker() -> dict:
+    """Repairs drift of the incrementally maintained model leaderboard"""
+    written, removed = LeaderboardModel.reconcile()
+    return {"written": written, "removed": removed}
+
+
+@worker.task
+def reconcile_contributors_worker() -> dict:
+    """Repairs drift of the incrementally maintained contribution counters"""
+    return {"updated": UserModel.reconcile_contributions()}
+
+
+@worker.task
+def clean_batch_outputs_worker() -> dict:
+    """Deletes batch inference datasets and results past their retention period"""
+    expires_before = datetime.now(timezone.utc) - timedelta(
+        seconds=batch_constants.OUTPUT_RETENTION_SECONDS
+    )
+    removed = get_sagemaker_manager().delete_batch_files(
+        f"{batch_constants.S3_PREFIX}/", expires_before
+    )
+    return {"removed": removed}
+
+
+worker.conf.beat_schedule = {
+    "reconcile-leaderboard": {
+        "task": reconcile_leaderboard_worker.name,
+        "schedule": leaderboard_constants.RECONCILE_INTERVAL_SECONDS,
+    },
+    "reconcile-contributors": {
+        "task": reconcile_contributors_worker.name,
+        "schedule": contributor_constants.RECONCILE_INTERVAL_SECONDS,
+    },
+    "clean-batch-outputs": {
+        "task": clean_batch_outputs_worker.name,
+        "schedule": batch_constants.CLEANUP_INTERVAL_SECONDS,
+    },
+}
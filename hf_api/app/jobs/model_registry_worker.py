@@ -1,4 +1,4 @@
-import uuid, os
+import uuid, os, time
 from celery import Celery
 from celery import states
 from celery.signals import (
@@ -7,11 +7,21 @@ from celery.signals import (
     task_failure,
     task_prerun,
     task_postrun,
+    worker_init,
+    worker_process_shutdown,
+)
+from app.models.models import (
+    MLModel,
+    ModelRegistryModel,
+    UserModel,
+    JobsModel,
+    catalog,
 )
-from app.models.models import MLModel, ModelRegistryModel, UserModel, JobsModel
 from app.constants import InstanceType as instance_type
+from app.constants import LocalBackendConstants as local_constants
 from app.constants import SageMakerConstants as sm_constants
 from app.core.SagemakerManager import SagemakerManager
+from app.core.metrics import TASK_DURATION, mark_process_dead
 from dotenv import load_dotenv
 import logging
 
@@ -22,31 +32,71 @@ broker_url = os.getenv("RABBITMQ_URI")
 
 worker = Celery("model_registry_worker", broker=broker_url)
 
+# other job modules sharing this Celery app, loaded when the worker starts
+worker.conf.imports = ("app.jobs.inference_worker", "app.jobs.maintenance_worker")
+
 
 @worker.task(bind=True)
-def register_model_worker(self, user_uuid: str, model_uuid: str) -> tuple:
+def register_model_worker(
+    self, user_uuid: str, model_uuid: str, model_instance_type: str = instance_type.CPU
+) -> tuple:
     self.request.kwargs = {"user_uuid": user_uuid}
 
-    sm = SagemakerManager(bucket_name=sm_constants.BUCKET_NAME, role=sm_constants.ROLE)
-
     record = MLModel.get_record_by_uuid(model_uuid)
     if not record:
         raise Exception(f"Model with UUID {model_uuid} not found")
-    
+
+    if model_instance_type == instance_type.LOCAL:
+        # served in-process by the web workers, loaded on first inference
+        endpoint_name = f"{local_constants.ENDPOINT_PREFIX}{model_uuid}"
+        return model_uuid, endpoint_name, model_instance_type
+
+    sm = SagemakerManager(bucket_name=sm_constants.BUCKET_NAME, role=sm_constants.ROLE)
+
     model = sm.create_model(model_path=record.s3_url, model_type=record.model_type)
 
     dummy_uuid_generator = str(uuid.uuid4())
 
     endpoint_name = sm.deploy_model(
         model=model,
-        instance_type=instance_type.CPU,
+        instance_type=model_instance_type,
         endpoint_name=f"dummy-endpoint-{dummy_uuid_generator}",
     ).endpoint_name
 
-    return model_uuid, endpoint_name
+    return model_uuid, endpoint_name, model_instance_type
+
+
+_task_started = {}
 
 
 @task_prerun.connect
+def task_timer_start_handler(task_id, task, *args, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def task_timer_stop_handler(task_id, task, *args, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_DURATION.labels(task.name, state or "UNKNOWN").observe(
+            time.perf_counter() - started
+        )
+
+
+@worker_init.connect
+def worker_init_handler(**kwargs):
+    # tasks read a few records each, a model catalog per pool process would load
+    # and follow every model for them; disabled before the pool forks
+    catalog.disable()
+
+
+@worker_process_shutdown.connect
+def worker_process_shutdown_handler(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
+
+
+# the handlers below only track model registry jobs, not the other tasks of the app
+@task_prerun.connect(sender=register_model_worker)
 def task_prerun_handler(task_id, task, *args, **kwargs):
     user_uuid = kwargs["args"][0]
     if user_uuid:
@@ -61,9 +111,9 @@ def task_prerun_handler(task_id, task, *args, **kwargs):
         logging.error("User UUID is missing")
 
 
-@task_success.connect
+@task_success.connect(sender=register_model_worker)
 def task_success_handler(sender=None, result=None, *args, **kwargs):
-    model_uuid, model_endpoint = result
+    model_uuid, model_endpoint, model_instance_type = result
     task_id = sender.request.id
 
     model_registry_uuid = ModelRegistryModel.register_model(
@@ -71,12 +121,13 @@ def task_success_handler(sender=None, result=None, *args, **kwargs):
         model_version="1.0",
         model_status=states.SUCCESS,
         model_endpoint=model_endpoint,
+        instance_type=model_instance_type,
     )
 
     JobsModel.update_task_status(task_id, states.SUCCESS)
     JobsModel.update_task_reference(task_id, model_registry_uuid)
 
 
-@task_failure.connect
+@task_failure.connect(sender=register_model_worker)
 def task_failure_handler(task_id, *args, **kwargs):
     JobsModel.update_task_status(task_id, states.FAILURE)
@@ -0,0 +1,133 @@
+import os
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.constants import WriteBufferConstants as write_buffer_constants
+from app.models.models import (
+    InferenceModel,
+    catalog,
+    endpoint_cache,
+    inference_writer,
+    user_cache,
+)
+from app.models.records import InferenceRecord, RegistryEndpoint
+
+# Async counterparts of the DAO calls on the inference path, used by the ASGI app.
+# The client is created lazily so it binds to the running event loop.
+_client = None
+
+
+def get_async_db():
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(os.getenv("DATABASE_URI"))
+    return _client.get_database()
+
+
+def close_async_db():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+async def refresh_version(cache, name):
+    """
+    Loads the version stamp of a VersionedCache with the async client when it is
+    due, its own loader would block the event loop
+    """
+    if cache.version.due():
+        record = await get_async_db()["cache_version"].find_one({"_id": name})
+        cache.update_version(record["version"] if record else 0)
+
+
+async def user_exists(user_uuid) -> bool:
+    """Async UserModel.user_exists, shares its in-process cache"""
+    await refresh_version(user_cache, "user_model")
+    if user_cache.get(user_uuid, check_version=False):
+        return True
+    record = await get_async_db()["user_model"].find_one(
+        {"user_uuid": user_uuid}, {"_id": 0, "user_uuid": 1}
+    )
+    if record is not None:
+        user_cache.set(user_uuid, True)
+    return record is not None
+
+
+async def resolve_endpoint(model_registry_uuid):
+    """Async ModelRegistryModel.resolve_endpoint, shares its in-process cache"""
+    if catalog.enabled and catalog.started:
+        # a miss is read with the async client, never blocking the event loop
+        document = catalog.get(
+            "model_registry_model", model_registry_uuid, load_missing=False
+        )
+        if document is None and not catalog.is_missing(
+            "model_registry_model", model_registry_uuid
+        ):
+            document = await get_async_db()["model_registry_model"].find_one(
+                {"model_registry_uuid": model_registry_uuid},
+                catalog.sources["model_registry_model"].projection,
+            )
+            if document is None:
+                catalog.put_missing("model_registry_model", model_registry_uuid)
+            else:
+                catalog.put("model_registry_model", document)
+        return RegistryEndpoint.from_document(document)
+
+    await refresh_version(endpoint_cache, "model_registry_model")
+    record = endpoint_cache.get(model_registry_uuid, check_version=False)
+    if record is None:
+        record = RegistryEndpoint.from_document(
+            await get_async_db()["model_registry_model"].find_one(
+                {"model_registry_uuid": model_registry_uuid},
+                RegistryEndpoint.PROJECTION,
+            )
+        )
+        if record is not None:
+            endpoint_cache.set(model_registry_uuid, record)
+    return record
+
+
+async def save_inference_to_db(
+    user_uuid, model_registry_uuid, inference_status, inference_result=None
+):
+    inference = InferenceModel(
+        user_uuid=user_uuid,
+        model_registry_uuid=model_registry_uuid,
+        inference_status=inference_status,
+        inference_result=inference_result,
+    )
+    # shares the write-behind buffer, only a full buffer awaits the insert
+    if not (
+        write_buffer_constants.ENABLED and inference_writer.try_submit(inference.__dict__)
+    ):
+        await get_async_db()["inference_model"].insert_one(inference.__dict__)
+        await record_run(model_registry_uuid)
+    return inference.inference_uuid
+
+
+async def record_run(model_registry_uuid):
+    """Async InferenceModel.record_runs for a single inference"""
+    db = get_async_db()
+    await db["model_registry_model"].update_one(
+        {"model_registry_uuid": model_registry_uuid}, {"$inc": {"run_count": 1}}
+    )
+    await db["model_leaderboard"].update_one(
+        {"model_registry_uuid": model_registry_uuid}, {"$inc": {"run_count": 1}}
+    )
+    registry = await resolve_endpoint(model_registry_uuid)
+    if registry is not None:
+        await db["ml_model"].update_one(
+            {"model_uuid": registry.model_uuid}, {"$inc": {"run_count": 1}}
+        )
+
+
+async def get_inference_by_uuid(inference_uuid):
+    pending = inference_writer.get_pending(inference_uuid)
+    if pending is not None:
+        return InferenceRecord.from_document(pending)
+    return InferenceRecord.from_document(
+        await get_async_db()["inference_model"].find_one(
+            {"inference_uuid": inference_uuid}, InferenceRecord.PROJECTION
+        )
+    )
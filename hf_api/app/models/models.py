@@ -1,45 +1,188 @@
-import uuid, os, bcrypt
+import uuid, os, bcrypt, threading
+from collections import Counter
 from datetime import datetime
-from pymongo import MongoClient, DESCENDING
-from types import SimpleNamespace
+from pymongo import (
+    MongoClient,
+    ASCENDING,
+    DESCENDING,
+    IndexModel,
+    ReturnDocument,
+    UpdateOne,
+)
+
+from app.constants import AuthCacheConstants as auth_cache_constants
+from app.constants import CatalogConstants as catalog_constants
+from app.constants import EndpointCacheConstants as endpoint_cache_constants
+from app.constants import MongoConstants as mongo_constants
+from app.constants import WriteBufferConstants as write_buffer_constants
+from app.core.cache import VersionedCache
+from app.core.catalog import Catalog, CatalogSource
+from app.core.metrics import mongo_listener
+from app.core.pagination import collect_page, decode_cursor, keyset_filter, paginate
+from app.core.search import index_grams, search_pipeline
+from app.core.write_buffer import BulkWriter, write_concern
+from app.models.records import (
+    Contributor,
+    InferenceRecord,
+    JobRecord,
+    ModelRecord,
+    RegistryEndpoint,
+    RegistryRecord,
+    UserCredentials,
+    UserInfo,
+    leaderboard_document_to_dict,
+    model_document_to_dict,
+    search_document_to_dict,
+)
+
+
+# Every index the DAO queries rely on, by collection. create_indexes() makes the
+# database match this set, benchmarks/check_query_plans.py checks the queries
+# still use it. Declare the index of a new access pattern here.
+INDEXES = {
+    "user_model": [
+        IndexModel([("email", DESCENDING)], unique=True),
+        IndexModel([("username", DESCENDING)], unique=True),
+        IndexModel([("user_uuid", ASCENDING)], unique=True),
+        # contributor listing, UserModel.CONTRIBUTOR_SORT
+        IndexModel([("contribution_count", DESCENDING), ("user_uuid", ASCENDING)]),
+    ],
+    "ml_model": [
+        IndexModel([("model_name", DESCENDING)], unique=True),
+        IndexModel([("model_uuid", ASCENDING)], unique=True),
+        IndexModel([("user_uuid", ASCENDING), ("model_uuid", ASCENDING)]),
+        IndexModel([("search_grams", ASCENDING)]),
+    ],
+    "model_registry_model": [
+        IndexModel([("model_uuid", DESCENDING)], unique=True),
+        IndexModel([("model_registry_uuid", ASCENDING)], unique=True),
+    ],
+    "inference_model": [
+        IndexModel([("inference_uuid", ASCENDING)], unique=True),
+        # many inferences per model, used by the run counters and clean up
+        IndexModel([("model_registry_uuid", ASCENDING)]),
+    ],
+    "jobs_model": [
+        IndexModel([("job_uuid", DESCENDING)], unique=True),
+        IndexModel([("user_uuid", ASCENDING)]),
+    ],
+    "model_leaderboard": [
+        IndexModel([("model_uuid", DESCENDING)], unique=True),
+        IndexModel([("model_registry_uuid", DESCENDING)]),
+        IndexModel([("run_count", DESCENDING), ("model_uuid", ASCENDING)]),
+    ],
+    "cache_version_change": [
+        # CacheVersionModel.get_changes
+        IndexModel([("name", ASCENDING), ("version", ASCENDING)], unique=True),
+        IndexModel(
+            [("changed_at", ASCENDING)],
+            expireAfterSeconds=catalog_constants.CHANGE_LOG_TTL_SECONDS,
+        ),
+    ],
+}
+
+# Indexes earlier versions created that conflict with INDEXES, always dropped.
+# The unique model_registry_uuid index allowed a single inference per model.
+LEGACY_INDEXES = {
+    "inference_model": ["model_registry_uuid_-1"],
+}
+
+
+def create_indexes(drop_undeclared=False):
+    """
+    Creates the indexes of INDEXES, run once per deployment (migrate_db.sh).
+    Declared indexes that exist with other options are dropped and recreated, so
+    are LEGACY_INDEXES. Other indexes that are not declared are only dropped with
+    `drop_undeclared`, e.g. one an operator added by hand. Returns the names of
+    the created, dropped and kept undeclared indexes.
+    """
+    db = get_db()
+    created, dropped, undeclared = [], [], []
+    for name, indexes in INDEXES.items():
+        collection = db[name]
+        declared = {
+            index.document["name"]: bool(index.document.get("unique"))
+            for index in indexes
+        }
+        legacy = LEGACY_INDEXES.get(name, ())
+        for index_name, info in collection.index_information().items():
+            if index_name == "_id_":
+                continue
+            if index_name in legacy:
+                collection.drop_index(index_name)
+                dropped.append(f"{name}.{index_name}")
+            elif index_name not in declared and not drop_undeclared:
+                undeclared.append(f"{name}.{index_name}")
+            elif declared.get(index_name) != bool(info.get("unique")):
+                collection.drop_index(index_name)
+                dropped.append(f"{name}.{index_name}")
+        created += [f"{name}.{index}" for index in collection.create_indexes(indexes)]
+    return created, dropped, undeclared
+
+
+# One client per process, created on first use. pymongo clients are not fork
+# safe, so a child process (Celery prefork, gunicorn) never reuses its parent's.
+_client = None
+_client_pid = None
+
+
+_client_lock = threading.Lock()
+
+
+def get_client() -> MongoClient:
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            return _client
+        _client = MongoClient(
+            os.getenv("DATABASE_URI"),
+            event_listeners=[mongo_listener],
+            maxPoolSize=mongo_constants.MAX_POOL_SIZE,
+            minPoolSize=mongo_constants.MIN_POOL_SIZE,
+            maxIdleTimeMS=mongo_constants.MAX_IDLE_TIME_MS,
+            connectTimeoutMS=mongo_constants.CONNECT_TIMEOUT_MS,
+            serverSelectionTimeoutMS=mongo_constants.SERVER_SELECTION_TIMEOUT_MS,
+            waitQueueTimeoutMS=mongo_constants.WAIT_QUEUE_TIMEOUT_MS,
+        )
+        _client_pid = os.getpid()
+        return _client
 
 
-def to_namespace(data):
-    if data:
-        return SimpleNamespace(**data)
-    return None
+def get_db():
+    return get_client().get_database()
 
 
-def add_indexing():
-    # UserModel Indexing
-    db["user_model"].create_index([("email", DESCENDING)], unique=True)
-    db["user_model"].create_index([("username", DESCENDING)], unique=True)
+def _reset_client():
+    global _client, _client_pid
+    _client, _client_pid = None, None
 
-    # MLModel Indexing
-    db["ml_model"].create_index([("model_name", DESCENDING)], unique=True)
-    db["model_registry_model"].create_index([("model_uuid", DESCENDING)], unique=True)
 
-    # InferenceModel Indexing
-    db["inference_model"].create_index(
-        [("model_registry_uuid", DESCENDING)], unique=True
-    )
-    db["jobs_model"].create_index([("job_uuid", DESCENDING)], unique=True)
+os.register_at_fork(after_in_child=_reset_client)
+
 
+class LazyCollection:
+    """Class attribute resolving to the collection on the client of the current process"""
 
-client = MongoClient(os.getenv("DATABASE_URI"))
-db = client.get_database()
+    def __init__(self, name):
+        self.name = name
 
-add_indexing()
+    def __get__(self, instance, owner):
+        return get_db()[self.name]
 
 
 class UserModel:
-    collection = db["user_model"]
+    collection = LazyCollection("user_model")
 
     def __init__(self, username, email, password, user_uuid=None):
         self.user_uuid = str(uuid.uuid4()) if not user_uuid else user_uuid
         self.username = username
         self.email = email
         self.password = password
+        # maintained by record_contribution, rebuilt by reconcile_contributions
+        self.contribution_count = 0
+        self.last_contribution_date = None
 
     def to_dict(self):
         return {
@@ -61,8 +204,9 @@ class UserModel:
 
     @staticmethod
     def create_user(username, email, password):
-        if UserModel.get_user_by_email(email) or UserModel.get_user_by_username(
-            username
+        if UserModel.collection.find_one(
+            {"$or": [{"email": email}, {"username": username}]},
+            {"_id": 0, "user_uuid": 1},
         ):
             raise Exception("User already exists")
         new_user = UserModel(username=username, email=email, password=password)
@@ -71,48 +215,179 @@ class UserModel:
 
     @staticmethod
     def get_user_by_email(email):
-        return UserModel.from_dict(UserModel.collection.find_one({"email": email}))
+        """The credentials of a login, the only read of the password hash"""
+        return UserCredentials.from_document(
+            UserModel.collection.find_one({"email": email}, UserCredentials.PROJECTION)
+        )
 
     @staticmethod
     def get_user_by_username(username):
-        return UserModel.from_dict(
-            UserModel.collection.find_one({"username": username})
+        return UserInfo.from_document(
+            UserModel.collection.find_one({"username": username}, UserInfo.PROJECTION)
         )
 
     @staticmethod
     def get_user_record_by_uuid(user_uuid):
-        return UserModel.from_dict(
-            UserModel.collection.find_one({"user_uuid": user_uuid})
+        return UserInfo.from_document(
+            UserModel.collection.find_one({"user_uuid": user_uuid}, UserInfo.PROJECTION)
         )
 
     @staticmethod
-    def get_contributors_with_contributions(top_n=None):
-        pipeline = [
-            {
-                "$lookup": {
-                    "from": "jobs_model",
-                    "localField": "user_uuid",
-                    "foreignField": "user_uuid",
-                    "as": "jobs",
-                }
-            },
+    def user_exists(user_uuid):
+        """Cached existence check of the auth path, only existing users are cached"""
+        if user_cache.get(user_uuid):
+            return True
+        exists = (
+            UserModel.collection.find_one(
+                {"user_uuid": user_uuid}, {"_id": 0, "user_uuid": 1}
+            )
+            is not None
+        )
+        if exists:
+            user_cache.set(user_uuid, True)
+        return exists
+
+    @staticmethod
+    def _invalidate(user_uuid):
+        user_cache.invalidate(user_uuid)
+        # tell the other processes their cached users are stale
+        CacheVersionModel.bump_version(UserModel.collection.name)
+
+    @staticmethod
+    def update_user(user_uuid, **kwargs):
+        UserModel.collection.update_one({"user_uuid": user_uuid}, {"$set": kwargs})
+        UserModel._invalidate(user_uuid)
+        return user_uuid
+
+    @staticmethod
+    def rehash_password(user_uuid, old_hash, new_hash):
+        """
+        Replaces a stored hash with a rehash of the same password. The cached user
+        lookups do not change, so unlike update_user this bumps no cache version;
+        a password changed in the meantime is kept.
+        """
+        UserModel.collection.update_one(
+            {"user_uuid": user_uuid, "password": old_hash},
+            {"$set": {"password": new_hash}},
+        )
+
+    @staticmethod
+    def delete_user(user_uuid):
+        UserModel.collection.delete_one({"user_uuid": user_uuid})
+        UserModel._invalidate(user_uuid)
+        return user_uuid
+
+    # Cursors of this order hold the contribution count of the last user, which
+    # keeps changing: a user whose count moves across the cursor between two page
+    # requests is skipped or listed twice. Pages are a snapshot per request only.
+    CONTRIBUTOR_SORT = [("contribution_count", DESCENDING), ("user_uuid", ASCENDING)]
+
+    @staticmethod
+    def record_contribution(user_uuid, contribution_date):
+        """Counts a new job of the user, called for every job saved"""
+        UserModel.collection.update_one(
+            {"user_uuid": user_uuid},
             {
-                "$project": {
-                    "username": 1,
-                    "contribution_count": {"$size": "$jobs"},
-                    "last_contribution_date": {"$max": "$jobs.job_datetime"},
-                }
+                "$inc": {"contribution_count": 1},
+                "$max": {"last_contribution_date": contribution_date},
             },
-            {"$sort": {"contribution_count": -1}},
-        ]
+        )
+
+    @staticmethod
+    def get_contributors_with_contributions(top_n=None, page_size=None, cursor=None):
+        """
+        Contributors by contribution count, either the `top_n` or one keyset page of
+        `page_size`. Returns the contributors and the cursor of the next page.
+        """
         if top_n:
-            pipeline.append({"$limit": int(top_n)})
-        count = list(UserModel.collection.aggregate(pipeline))
-        return [to_namespace(user) for user in count]
+            contributors = (
+                UserModel.collection.find({}, Contributor.PROJECTION)
+                .sort(UserModel.CONTRIBUTOR_SORT)
+                .limit(int(top_n))
+            )
+            return [Contributor.from_document(user) for user in contributors], None
+
+        return paginate(
+            UserModel.collection,
+            {},
+            UserModel.CONTRIBUTOR_SORT,
+            page_size,
+            cursor,
+            Contributor.PROJECTION,
+            Contributor.from_document,
+        )
+
+    @staticmethod
+    def reconcile_contributions():
+        """
+        Rebuilds the contribution counters of every user from jobs_model.
+        The counters are read before the jobs are counted and only replaced if
+        they still hold the value read, a user whose counter moved in between
+        keeps it until the next run instead of losing the new contributions.
+        Returns the number of users updated.
+        """
+        counters = {
+            user["user_uuid"]: (
+                user.get("contribution_count"),
+                user.get("last_contribution_date"),
+            )
+            for user in UserModel.collection.find(
+                {},
+                {
+                    "_id": 0,
+                    "user_uuid": 1,
+                    "contribution_count": 1,
+                    "last_contribution_date": 1,
+                },
+            )
+        }
+        contributions = {
+            record["_id"]: record
+            for record in JobsModel.collection.aggregate(
+                [
+                    {
+                        "$group": {
+                            "_id": "$user_uuid",
+                            "contribution_count": {"$sum": 1},
+                            "last_contribution_date": {"$max": "$job_datetime"},
+                        }
+                    }
+                ]
+            )
+        }
+
+        updated, batch = 0, []
+        for user_uuid, (count, last_date) in counters.items():
+            record = contributions.get(user_uuid, {})
+            rebuilt = (
+                record.get("contribution_count", 0),
+                record.get("last_contribution_date"),
+            )
+            if (count, last_date) == rebuilt:
+                continue
+            batch.append(
+                UpdateOne(
+                    # a missing counter matches None as well
+                    {"user_uuid": user_uuid, "contribution_count": count},
+                    {
+                        "$set": {
+                            "contribution_count": rebuilt[0],
+                            "last_contribution_date": rebuilt[1],
+                        }
+                    },
+                )
+            )
+            if len(batch) == 1000:
+                result = UserModel.collection.bulk_write(batch, ordered=False)
+                updated, batch = updated + result.modified_count, []
+        if batch:
+            result = UserModel.collection.bulk_write(batch, ordered=False)
+            updated += result.modified_count
+        return updated
 
 
 class MLModel:
-    collection = db["ml_model"]
+    collection = LazyCollection("ml_model")
 
     def __init__(self, user_uuid, model_name, model_type, s3_url):
         self.model_uuid = str(uuid.uuid4())
@@ -121,6 +396,9 @@ class MLModel:
         self.model_name = model_name
         self.model_type = model_type
         self.s3_url = s3_url
+        # maintained by InferenceModel.record_runs, rebuilt by rebuild_run_counts
+        self.run_count = 0
+        self.search_grams = []
 
     def to_dict(self):
         return {
@@ -140,20 +418,62 @@ class MLModel:
             model_type=model_type,
             s3_url=s3_url,
         )
+        owner = UserModel.get_user_record_by_uuid(user_uuid)
+        model.search_grams = MLModel.compute_search_grams(
+            model.__dict__, owner.username if owner else None
+        )
         MLModel.collection.insert_one(model.__dict__)
+        MLModel._invalidate(model.model_uuid)
+        LeaderboardModel.add_model(model.__dict__)
         return model.model_uuid
 
+    @staticmethod
+    def _invalidate(model_uuid):
+        catalog.refresh(MLModel.collection.name, model_uuid)
+        # tell the processes polling the catalog version to re-read the model
+        CacheVersionModel.record_change(MLModel.collection.name, model_uuid)
+
+    @staticmethod
+    def compute_search_grams(model: dict, owner_name=None) -> list:
+        """Index terms of the searchable fields, see app/core/search.py"""
+        return index_grams(model.get("model_name"), model.get("model_type"), owner_name)
+
     @staticmethod
     def get_record_by_uuid(model_uuid):
-        return to_namespace(MLModel.collection.find_one({"model_uuid": model_uuid}))
+        if catalog.enabled:
+            return ModelRecord.from_document(
+                catalog.get(MLModel.collection.name, model_uuid)
+            )
+        return ModelRecord.from_document(
+            MLModel.collection.find_one(
+                {"model_uuid": model_uuid}, ModelRecord.PROJECTION
+            )
+        )
 
     @staticmethod
-    def get_all_models_by_user_uuid(user_uuid):
-        return list(to_namespace(MLModel.collection.find({"user_uuid": user_uuid})))
+    def get_all_models_by_user_uuid(user_uuid, page_size, cursor=None):
+        """One page of the models of a user as dicts and the cursor of the next page"""
+        return paginate(
+            MLModel.collection,
+            {"user_uuid": user_uuid},
+            [("model_uuid", ASCENDING)],
+            page_size,
+            cursor,
+            ModelRecord.PROJECTION,
+            model_document_to_dict,
+        )
 
     @staticmethod
     def get_all_models():
-        return list(to_namespace(MLModel.collection.find()))
+        if catalog.enabled:
+            return [
+                ModelRecord.from_document(model)
+                for model in catalog.values(MLModel.collection.name)
+            ]
+        return [
+            ModelRecord.from_document(model)
+            for model in MLModel.collection.find({}, ModelRecord.PROJECTION)
+        ]
 
     # allow user to update model type
     @staticmethod
@@ -164,6 +484,9 @@ class MLModel:
         )
         if result.matched_count == 0:
             raise Exception("Version mismatch or model not found. Retry the update.")
+        MLModel._invalidate(model_uuid)
+        LeaderboardModel.update_model(model_uuid, model_type=new_model_type)
+        rebuild_search_index(model_uuid)
 
         # Fetch and return the updated model
         updated_model = MLModel.collection.find_one({"model_uuid": model_uuid})
@@ -171,7 +494,7 @@ class MLModel:
 
 
 class ModelRegistryModel:
-    collection = db["model_registry_model"]
+    collection = LazyCollection("model_registry_model")
 
     def __init__(
         self,
@@ -180,6 +503,9 @@ class ModelRegistryModel:
         model_status,
         model_endpoint,
         model_registry_uuid=None,
+        cache_enabled=True,
+        instance_type=None,
+        run_count=0,
     ):
         self.model_registry_uuid = (
             str(uuid.uuid4()) if not model_registry_uuid else model_registry_uuid
@@ -188,6 +514,10 @@ class ModelRegistryModel:
         self.model_version = model_version
         self.model_status = model_status
         self.model_endpoint = model_endpoint
+        # non-deterministic models opt out of the inference result cache
+        self.cache_enabled = cache_enabled
+        self.instance_type = instance_type
+        self.run_count = run_count
 
     @classmethod
     def from_dict(cls, data):
@@ -198,33 +528,78 @@ class ModelRegistryModel:
                 model_version=data.get("model_version"),
                 model_status=data.get("model_status"),
                 model_endpoint=data.get("model_endpoint"),
+                cache_enabled=data.get("cache_enabled", True),
+                instance_type=data.get("instance_type"),
+                run_count=data.get("run_count", 0),
             )
         return None
 
     @staticmethod
-    def register_model(model_uuid, model_version, model_status, model_endpoint):
+    def register_model(
+        model_uuid, model_version, model_status, model_endpoint, instance_type=None
+    ):
         model = ModelRegistryModel(
             model_uuid=model_uuid,
             model_version=model_version,
             model_status=model_status,
             model_endpoint=model_endpoint,
+            instance_type=instance_type,
         )
         ModelRegistryModel.collection.insert_one(model.__dict__)
+        LeaderboardModel.set_registry(
+            model_uuid, model.model_registry_uuid, model.model_version
+        )
         return model.model_registry_uuid
 
     @staticmethod
     def get_record_by_uuid(model_registry_uuid):
-        return to_namespace(
+        if catalog.enabled:
+            return RegistryRecord.from_document(
+                catalog.get(ModelRegistryModel.collection.name, model_registry_uuid)
+            )
+        return RegistryRecord.from_document(
             ModelRegistryModel.collection.find_one(
-                {"model_registry_uuid": model_registry_uuid}
+                {"model_registry_uuid": model_registry_uuid}, RegistryRecord.PROJECTION
             )
         )
 
+    @staticmethod
+    def resolve_endpoint(model_registry_uuid):
+        """
+        Cached lookup of the fields the inference path needs,
+        avoids a Mongo round trip per inference
+        """
+        if catalog.enabled:
+            return RegistryEndpoint.from_document(
+                catalog.get(ModelRegistryModel.collection.name, model_registry_uuid)
+            )
+        record = endpoint_cache.get(model_registry_uuid)
+        if record is None:
+            record = RegistryEndpoint.from_document(
+                ModelRegistryModel.collection.find_one(
+                    {"model_registry_uuid": model_registry_uuid},
+                    RegistryEndpoint.PROJECTION,
+                )
+            )
+            if record is not None:
+                endpoint_cache.set(model_registry_uuid, record)
+        return record
+
+    @staticmethod
+    def _invalidate(model_registry_uuid):
+        endpoint_cache.invalidate(model_registry_uuid)
+        catalog.refresh(ModelRegistryModel.collection.name, model_registry_uuid)
+        # tell the other processes their cached registry records are stale
+        CacheVersionModel.record_change(
+            ModelRegistryModel.collection.name, model_registry_uuid
+        )
+
     @staticmethod
     def update_record_by_uuid(model_registry_uuid, **kwargs):
         ModelRegistryModel.collection.update_one(
             {"model_registry_uuid": model_registry_uuid}, {"$set": kwargs}
         )
+        ModelRegistryModel._invalidate(model_registry_uuid)
         return model_registry_uuid
 
     @staticmethod
@@ -232,11 +607,13 @@ class ModelRegistryModel:
         ModelRegistryModel.collection.delete_one(
             {"model_registry_uuid": model_registry_uuid}
         )
+        ModelRegistryModel._invalidate(model_registry_uuid)
+        LeaderboardModel.clear_registry(model_registry_uuid)
         return model_registry_uuid
 
 
 class InferenceModel:
-    collection = db["inference_model"]
+    collection = LazyCollection("inference_model")
 
     def __init__(
         self,
@@ -245,6 +622,7 @@ class InferenceModel:
         inference_status,
         inference_uuid=None,
         inference_datetime=None,
+        inference_result=None,
     ):
         self.inference_uuid = (
             str(uuid.uuid4()) if not inference_uuid else inference_uuid
@@ -255,6 +633,7 @@ class InferenceModel:
             datetime.now() if not inference_datetime else inference_datetime
         )
         self.inference_status = inference_status
+        self.inference_result = inference_result
 
     @classmethod
     def from_dict(cls, data):
@@ -265,30 +644,92 @@ class InferenceModel:
                 model_registry_uuid=data.get("model_registry_uuid"),
                 inference_datetime=data.get("inference_datetime"),
                 inference_status=data.get("inference_status"),
+                inference_result=data.get("inference_result"),
             )
         return None
 
     @staticmethod
-    def save_inference_to_db(user_uuid, model_registry_uuid, inference_status):
+    def save_inference_to_db(
+        user_uuid,
+        model_registry_uuid,
+        inference_status,
+        inference_result=None,
+        buffered=True,
+    ):
+        """
+        Records an inference. Buffered records are written behind by
+        `inference_writer`; records that are updated later must not be buffered.
+        """
         inference = InferenceModel(
             user_uuid=user_uuid,
             model_registry_uuid=model_registry_uuid,
             inference_status=inference_status,
+            inference_result=inference_result,
         )
-        InferenceModel.collection.insert_one(inference.__dict__)
+        if buffered and write_buffer_constants.ENABLED:
+            inference_writer.submit(inference.__dict__)
+        else:
+            InferenceModel.collection.insert_one(inference.__dict__)
+            InferenceModel.record_runs([inference.__dict__])
         return inference.inference_uuid
 
+    @staticmethod
+    def record_runs(inferences):
+        """Increments the run counters of the models and registry records"""
+        registry_runs = Counter(
+            inference["model_registry_uuid"] for inference in inferences
+        )
+        if not registry_runs:
+            return
+        model_runs = Counter()
+        for model_registry_uuid, runs in registry_runs.items():
+            registry = ModelRegistryModel.resolve_endpoint(model_registry_uuid)
+            if registry is not None:
+                model_runs[registry.model_uuid] += runs
+
+        ModelRegistryModel.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"model_registry_uuid": model_registry_uuid},
+                    {"$inc": {"run_count": runs}},
+                )
+                for model_registry_uuid, runs in registry_runs.items()
+            ],
+            ordered=False,
+        )
+        if model_runs:
+            MLModel.collection.bulk_write(
+                [
+                    UpdateOne({"model_uuid": model_uuid}, {"$inc": {"run_count": runs}})
+                    for model_uuid, runs in model_runs.items()
+                ],
+                ordered=False,
+            )
+        LeaderboardModel.record_runs(registry_runs)
+
+    @staticmethod
+    def update_record_by_uuid(inference_uuid, **kwargs):
+        InferenceModel.collection.update_one(
+            {"inference_uuid": inference_uuid}, {"$set": kwargs}
+        )
+        return inference_uuid
+
     @staticmethod
     def get_record_by_uuid(inference_uuid):
-        return to_namespace(
-            InferenceModel.collection.find_one({"inference_uuid": inference_uuid})
+        pending = inference_writer.get_pending(inference_uuid)
+        if pending is not None:
+            return InferenceRecord.from_document(pending)
+        return InferenceRecord.from_document(
+            InferenceModel.collection.find_one(
+                {"inference_uuid": inference_uuid}, InferenceRecord.PROJECTION
+            )
         )
 
     @staticmethod
     def get_record_by_model_registry_uuid(model_registry_uuid):
-        return to_namespace(
+        return InferenceRecord.from_document(
             InferenceModel.collection.find_one(
-                {"model_registry_uuid": model_registry_uuid}
+                {"model_registry_uuid": model_registry_uuid}, InferenceRecord.PROJECTION
             )
         )
 
@@ -297,17 +738,28 @@ class InferenceModel:
         InferenceModel.collection.delete_one({"inference_uuid": inference_uuid})
         return inference_uuid
 
+    @staticmethod
+    def delete_records_by_model_registry_uuid(model_registry_uuid):
+        return InferenceModel.collection.delete_many(
+            {"model_registry_uuid": model_registry_uuid}
+        ).deleted_count
+
     @staticmethod
     def count_model_runs():
-        pipeline = [
-            {"$group": {"_id": "$model_registry_uuid", "run_count": {"$sum": 1}}},
-            {"$project": {"model_registry_uuid": "$_id", "run_count": 1}},
+        records = ModelRegistryModel.collection.find(
+            {}, {"_id": 0, "model_registry_uuid": 1, "run_count": 1}
+        )
+        return [
+            {
+                "model_registry_uuid": record["model_registry_uuid"],
+                "run_count": record.get("run_count", 0),
+            }
+            for record in records
         ]
-        return list(to_namespace(InferenceModel.collection.aggregate(pipeline)))
 
 
 class JobsModel:
-    collection = db["jobs_model"]
+    collection = LazyCollection("jobs_model")
 
     def __init__(
         self,
@@ -348,11 +800,14 @@ class JobsModel:
             reference_uuid=reference_uuid,
         )
         JobsModel.collection.insert_one(job.__dict__)
+        UserModel.record_contribution(user_uuid, job.job_datetime)
         return job.job_uuid
 
     @staticmethod
     def get_record_by_uuid(job_uuid):
-        return to_namespace(JobsModel.collection.find_one({"job_uuid": job_uuid}))
+        return JobRecord.from_document(
+            JobsModel.collection.find_one({"job_uuid": job_uuid}, JobRecord.PROJECTION)
+        )
 
     @staticmethod
     def update_task_status(job_uuid, job_status):
@@ -368,183 +823,492 @@ class JobsModel:
         )
         return job_uuid
 
+    @staticmethod
+    def update_task_progress(job_uuid, **progress):
+        JobsModel.collection.update_one({"job_uuid": job_uuid}, {"$set": progress})
+        return job_uuid
 
-def get_model_run_counts_with_details():
-    try:
-        pipeline = [
-            {
-                "$lookup": {
-                    "from": "ModelRegistryModel",
-                    "localField": "model_uuid",
-                    "foreignField": "model_uuid",
-                    "as": "registry_details",
-                }
-            },
-            {
-                "$lookup": {
-                    "from": "InferenceModel",
-                    "localField": "registry_details.model_registry_uuid",
-                    "foreignField": "model_registry_uuid",
-                    "as": "inference_details",
-                }
-            },
-            {
-                "$unwind": {
-                    "path": "$registry_details",
-                    "preserveNullAndEmptyArrays": True,
-                }
-            },
-            {
-                "$group": {
-                    "_id": {
-                        "model_uuid": "$model_uuid",
-                        "model_registry_uuid": "$registry_details.model_registry_uuid",
-                        "model_version": "$registry_details.model_version",
-                        "model_name": "$model_name",
-                        "model_type": "$model_type",
-                        "upload_datetime": "$upload_datetime",
-                    },
-                    "run_count": {
-                        "$sum": {
-                            "$cond": {
-                                "if": {"$ne": ["$inference_details", []]},
-                                "then": 1,
-                                "else": 0,
-                            }
-                        }
-                    },
-                    "registered": {
-                        "$max": {
-                            "$cond": {
-                                "if": {"$ne": ["$registry_details", None]},
-                                "then": 1,
-                                "else": 0,
-                            }
-                        }
-                    },
-                }
-            },
-        ]
 
-        model_run_counts = list(MLModel.collection.aggregate(pipeline))
-    except Exception as e:
-        raise Exception(f"Failed to fetch all models: {e}")
+class LeaderboardModel:
+    """
+    One document per model with its registry details and run count, kept up to
+    date by the model, registry and inference writes so listings are a sorted
+    read of an index. reconcile() rebuilds it from the source collections.
+    """
+
+    collection = LazyCollection("model_leaderboard")
 
-    resp = []
-    for model in model_run_counts:
-        details = model["_id"]
-        model_dict = {
-            "model_registry_uuid": details.get("model_registry_uuid"),
-            "model_version": details.get("model_version"),
-            "run_count": model["run_count"] if model["registered"] else 0,
-            "model_name": details["model_name"],
-            "model_type": details["model_type"],
-            "upload_datetime": (
-                details["upload_datetime"].isoformat()
-                if details["upload_datetime"]
-                else None
+    PROJECTION = {
+        "_id": 0,
+        "model_uuid": 1,
+        "model_registry_uuid": 1,
+        "model_version": 1,
+        "model_name": 1,
+        "model_type": 1,
+        "upload_datetime": 1,
+        "registered": 1,
+        "run_count": 1,
+    }
+
+    @staticmethod
+    def _entry(model, registry=None, run_count=0):
+        return {
+            "model_uuid": model["model_uuid"],
+            "model_name": model.get("model_name"),
+            "model_type": model.get("model_type"),
+            "upload_datetime": model.get("upload_datetime"),
+            "model_registry_uuid": (
+                registry["model_registry_uuid"] if registry else None
             ),
-            "registered": bool(model["registered"]),
+            "model_version": registry.get("model_version") if registry else None,
+            "registered": registry is not None,
+            "run_count": run_count if registry else 0,
         }
-        resp.append(model_dict)
 
-    return resp
+    @staticmethod
+    def add_model(model):
+        LeaderboardModel.collection.replace_one(
+            {"model_uuid": model["model_uuid"]},
+            LeaderboardModel._entry(model),
+            upsert=True,
+        )
 
+    @staticmethod
+    def update_model(model_uuid, **kwargs):
+        LeaderboardModel.collection.update_one(
+            {"model_uuid": model_uuid}, {"$set": kwargs}
+        )
 
-def get_model_run_counts_with_details_filter(top_n):
-    top_n = int(top_n)
-    try:
-        pipeline = [
+    @staticmethod
+    def set_registry(model_uuid, model_registry_uuid, model_version):
+        LeaderboardModel.collection.update_one(
+            {"model_uuid": model_uuid},
             {
-                "$lookup": {
-                    "from": "ModelRegistryModel",
-                    "localField": "model_uuid",
-                    "foreignField": "model_uuid",
-                    "as": "registry_details",
+                "$set": {
+                    "model_registry_uuid": model_registry_uuid,
+                    "model_version": model_version,
+                    "registered": True,
+                    "run_count": 0,
                 }
             },
+        )
+
+    @staticmethod
+    def clear_registry(model_registry_uuid):
+        LeaderboardModel.collection.update_one(
+            {"model_registry_uuid": model_registry_uuid},
             {
-                "$lookup": {
-                    "from": "InferenceModel",
-                    "localField": "registry_details.model_registry_uuid",
-                    "foreignField": "model_registry_uuid",
-                    "as": "inference_details",
+                "$set": {
+                    "model_registry_uuid": None,
+                    "model_version": None,
+                    "registered": False,
+                    "run_count": 0,
                 }
             },
+        )
+
+    @staticmethod
+    def record_runs(registry_runs):
+        """Adds the runs of a {model_registry_uuid: runs} mapping"""
+        if not registry_runs:
+            return
+        LeaderboardModel.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"model_registry_uuid": model_registry_uuid},
+                    {"$inc": {"run_count": runs}},
+                )
+                for model_registry_uuid, runs in registry_runs.items()
+            ],
+            ordered=False,
+        )
+
+    # Cursors of this order hold the run count of the last model, which keeps
+    # changing: a model whose count moves across the cursor between two page
+    # requests is skipped or listed twice. Pages are a snapshot per request only.
+    SORT = [("run_count", DESCENDING), ("model_uuid", ASCENDING)]
+
+    @staticmethod
+    def get_leaderboard(top_n=None):
+        cursor = LeaderboardModel.collection.find(
+            {}, LeaderboardModel.PROJECTION
+        ).sort(LeaderboardModel.SORT)
+        if top_n:
+            cursor = cursor.limit(int(top_n)).batch_size(int(top_n))
+        return [leaderboard_document_to_dict(entry) for entry in cursor]
+
+    @staticmethod
+    def get_leaderboard_page(page_size, cursor=None):
+        return paginate(
+            LeaderboardModel.collection,
+            {},
+            LeaderboardModel.SORT,
+            page_size,
+            cursor,
+            LeaderboardModel.PROJECTION,
+            leaderboard_document_to_dict,
+        )
+
+    @staticmethod
+    def reconcile():
+        """
+        Rebuilds every entry from ml_model and model_registry_model and drops
+        entries of deleted models.
+        The details are `$set` on every entry, the run count is taken from the
+        registry counters and only replaced if the entry still holds the count
+        read before, like UserModel.reconcile_contributions, so runs recorded
+        meanwhile are not lost.
+        Returns the number of entries written and removed.
+        """
+        # read before the registry counters: a run recorded between the two reads
+        # moves the entry count, which fails the compare below
+        entry_runs = {
+            entry["model_uuid"]: entry.get("run_count")
+            for entry in LeaderboardModel.collection.find(
+                {}, {"_id": 0, "model_uuid": 1, "run_count": 1}
+            )
+        }
+        registries = {
+            registry["model_uuid"]: registry
+            for registry in ModelRegistryModel.collection.find(
+                {},
+                {
+                    "_id": 0,
+                    "model_uuid": 1,
+                    "model_registry_uuid": 1,
+                    "model_version": 1,
+                    "run_count": 1,
+                },
+            )
+        }
+
+        reconciled_at = datetime.now()
+        written, batch = 0, []
+        for model in MLModel.collection.find(
+            {},
             {
-                "$unwind": {
-                    "path": "$registry_details",
-                    "preserveNullAndEmptyArrays": True,
-                }
+                "_id": 0,
+                "model_uuid": 1,
+                "model_name": 1,
+                "model_type": 1,
+                "upload_datetime": 1,
             },
+        ):
+            registry = registries.get(model["model_uuid"])
+            entry = LeaderboardModel._entry(
+                model, registry, registry.get("run_count", 0) if registry else 0
+            )
+            run_count = entry.pop("run_count")
+            entry["reconciled_at"] = reconciled_at
+            batch.append(
+                UpdateOne(
+                    {"model_uuid": model["model_uuid"]},
+                    {"$set": entry, "$setOnInsert": {"run_count": run_count}},
+                    upsert=True,
+                )
+            )
+            if model["model_uuid"] in entry_runs and (
+                entry_runs[model["model_uuid"]] != run_count
+            ):
+                batch.append(
+                    UpdateOne(
+                        {
+                            "model_uuid": model["model_uuid"],
+                            "run_count": entry_runs[model["model_uuid"]],
+                        },
+                        {"$set": {"run_count": run_count}},
+                    )
+                )
+            written += 1
+            if len(batch) >= 1000:
+                LeaderboardModel.collection.bulk_write(batch)
+                batch = []
+        if batch:
+            LeaderboardModel.collection.bulk_write(batch)
+
+        # entries written since the rebuild started are kept as well
+        removed = LeaderboardModel.collection.delete_many(
             {
-                "$group": {
-                    "_id": {
-                        "model_uuid": "$model_uuid",
-                        "model_registry_uuid": "$registry_details.model_registry_uuid",
-                        "model_version": "$registry_details.model_version",
-                        "model_name": "$model_name",
-                        "model_type": "$model_type",
-                        "upload_datetime": "$upload_datetime",
-                    },
-                    "run_count": {
-                        "$sum": {
-                            "$cond": {
-                                "if": {"$ne": ["$inference_details", []]},
-                                "then": 1,
-                                "else": 0,
-                            }
-                        }
-                    },
-                    "registered": {
-                        "$max": {
-                            "$cond": {
-                                "if": {"$ne": ["$registry_details", None]},
-                                "then": 1,
-                                "else": 0,
-                            }
-                        }
-                    },
-                }
-            },
-            {"$sort": {"run_count": DESCENDING}},
-            {"$limit": top_n},
-        ]
+                "reconciled_at": {"$ne": reconciled_at},
+                "$or": [
+                    {"upload_datetime": {"$lt": reconciled_at}},
+                    {"upload_datetime": None},
+                ],
+            }
+        ).deleted_count
+        return written, removed
+
+
+class CacheVersionModel:
+    """Per-collection version stamps used to invalidate in-process caches"""
 
-        model_run_counts = list(MLModel.collection.aggregate(pipeline))
+    collection = LazyCollection("cache_version")
+    # the key written at each version, read by the catalog in polling mode
+    changes = LazyCollection("cache_version_change")
+
+    @staticmethod
+    def bump_version(name):
+        CacheVersionModel.collection.update_one(
+            {"_id": name}, {"$inc": {"version": 1}}, upsert=True
+        )
+
+    @staticmethod
+    def record_change(name, key):
+        """Bumps the version of `name` and logs `key` as changed at the new version"""
+        version = CacheVersionModel.collection.find_one_and_update(
+            {"_id": name},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )["version"]
+        CacheVersionModel.changes.insert_one(
+            {"name": name, "version": version, "key": key, "changed_at": datetime.now()}
+        )
+
+    @staticmethod
+    def get_changes(name, after, upto):
+        """
+        The keys changed in versions (after, upto] of `name`, None when some were
+        not logged (expired, or bumped without a key)
+        """
+        changes = list(
+            CacheVersionModel.changes.find(
+                {"name": name, "version": {"$gt": after, "$lte": upto}},
+                {"_id": 0, "key": 1},
+            )
+        )
+        if len(changes) != upto - after:
+            return None
+        return {change["key"] for change in changes}
+
+    @staticmethod
+    def get_version(name):
+        record = CacheVersionModel.collection.find_one({"_id": name})
+        return record["version"] if record else 0
+
+    @staticmethod
+    def get_versions(names) -> tuple:
+        """The version stamps of `names` in one read"""
+        versions = {
+            record["_id"]: record["version"]
+            for record in CacheVersionModel.collection.find({"_id": {"$in": names}})
+        }
+        return tuple(versions.get(name, 0) for name in names)
+
+
+endpoint_cache = VersionedCache(
+    max_entries=endpoint_cache_constants.MAX_ENTRIES,
+    ttl=endpoint_cache_constants.TTL_SECONDS,
+    version_loader=lambda: CacheVersionModel.get_version("model_registry_model"),
+    version_check_interval=endpoint_cache_constants.VERSION_CHECK_SECONDS,
+)
+
+# ml_model and model_registry_model by uuid in memory, see app/core/catalog.py.
+# Model and registry lookups read it instead of MongoDB unless MODEL_CATALOG=false.
+catalog = Catalog(
+    sources={
+        "ml_model": CatalogSource(
+            collection=lambda: MLModel.collection,
+            key_field="model_uuid",
+            fields=ModelRecord.__slots__,
+            ignored_fields=("run_count", "search_grams"),
+        ),
+        "model_registry_model": CatalogSource(
+            collection=lambda: ModelRegistryModel.collection,
+            key_field="model_registry_uuid",
+            fields=RegistryRecord.__slots__,
+            ignored_fields=("run_count",),
+        ),
+    },
+    version_loader=lambda: CacheVersionModel.get_versions(
+        ["ml_model", "model_registry_model"]
+    ),
+    poll_interval=catalog_constants.POLL_SECONDS,
+    watch=catalog_constants.CHANGE_STREAMS,
+    changes_loader=CacheVersionModel.get_changes,
+    max_changes=catalog_constants.MAX_POLLED_CHANGES,
+    missing_ttl=catalog_constants.MISSING_TTL_SECONDS,
+    max_missing=catalog_constants.MAX_MISSING,
+    enabled=catalog_constants.ENABLED,
+)
+
+user_cache = VersionedCache(
+    max_entries=auth_cache_constants.MAX_ENTRIES,
+    ttl=auth_cache_constants.TTL_SECONDS,
+    version_loader=lambda: CacheVersionModel.get_version("user_model"),
+    version_check_interval=auth_cache_constants.VERSION_CHECK_SECONDS,
+)
+
+inference_writer = BulkWriter(
+    collection=lambda: InferenceModel.collection,
+    key_field="inference_uuid",
+    max_queue=write_buffer_constants.MAX_QUEUE,
+    batch_size=write_buffer_constants.BATCH_SIZE,
+    flush_interval=write_buffer_constants.FLUSH_INTERVAL_SECONDS,
+    write_concern=write_concern(
+        write_buffer_constants.WRITE_CONCERN, write_buffer_constants.JOURNAL
+    ),
+    on_write=InferenceModel.record_runs,
+)
+
+
+def get_model_run_counts_with_details(page_size, cursor=None):
+    """One page of the leaderboard, returns the models and the next cursor"""
+    return LeaderboardModel.get_leaderboard_page(page_size, cursor)
+
+
+def get_model_run_counts_with_details_filter(top_n):
+    top_n = int(top_n)
+    try:
+        return LeaderboardModel.get_leaderboard(top_n)
     except Exception as e:
         raise Exception(f"Failed to fetch all models: {e}")
 
-    resp = []
-    for model in model_run_counts:
-        details = model["_id"]
-        model_dict = {
-            "model_registry_uuid": details.get("model_registry_uuid"),
-            "model_version": details.get("model_version"),
-            "run_count": model["run_count"] if model["registered"] else 0,
-            "model_name": details["model_name"],
-            "model_type": details["model_type"],
-            "upload_datetime": (
-                details["upload_datetime"].isoformat()
-                if details["upload_datetime"]
-                else None
-            ),
-            "registered": bool(model["registered"]),
-        }
-        resp.append(model_dict)
 
-    return resp
+def rebuild_run_counts():
+    """
+    Recomputes the run counters from the inference history.
+    The counters are read before the inferences are counted and only replaced if
+    they still hold the value read, like UserModel.reconcile_contributions.
+    Returns the number of registry records and models that were updated.
+    """
+    registries = list(
+        ModelRegistryModel.collection.find(
+            {}, {"_id": 0, "model_registry_uuid": 1, "model_uuid": 1, "run_count": 1}
+        )
+    )
+    models = list(
+        MLModel.collection.find({}, {"_id": 0, "model_uuid": 1, "run_count": 1})
+    )
+    registry_runs = {
+        record["_id"]: record["run_count"]
+        for record in InferenceModel.collection.aggregate(
+            [{"$group": {"_id": "$model_registry_uuid", "run_count": {"$sum": 1}}}]
+        )
+    }
+
+    registry_updates = []
+    model_runs = Counter()
+    for registry in registries:
+        runs = registry_runs.get(registry["model_registry_uuid"], 0)
+        model_runs[registry["model_uuid"]] += runs
+        if registry.get("run_count") != runs:
+            registry_updates.append(
+                UpdateOne(
+                    {
+                        "model_registry_uuid": registry["model_registry_uuid"],
+                        "run_count": registry.get("run_count"),
+                    },
+                    {"$set": {"run_count": runs}},
+                )
+            )
 
+    model_updates = [
+        UpdateOne(
+            {"model_uuid": model["model_uuid"], "run_count": model.get("run_count")},
+            {"$set": {"run_count": model_runs[model["model_uuid"]]}},
+        )
+        for model in models
+        if model.get("run_count") != model_runs[model["model_uuid"]]
+    ]
 
-def search_for_models(search_term):
-    search_regex = {"$regex": search_term, "$options": "i"}
-    models = to_namespace(MLModel.collection.find({"model_name": search_regex}))
-    return [model for model in models]
+    registries_updated = models_updated = 0
+    if registry_updates:
+        registries_updated = ModelRegistryModel.collection.bulk_write(
+            registry_updates, ordered=False
+        ).modified_count
+    if model_updates:
+        models_updated = MLModel.collection.bulk_write(
+            model_updates, ordered=False
+        ).modified_count
+    return registries_updated, models_updated
 
 
-def get_registered_model_by_user_uuid(user_uuid):
+SEARCH_SORT = [("score", DESCENDING), ("model_uuid", ASCENDING)]
+
+
+def search_for_models(search_term, page_size, cursor=None):
+    """
+    Ranked prefix and typo tolerant search over model name, type and owner.
+    Returns one page of models, best match first, and the cursor of the next page.
+    """
+    pipeline = search_pipeline(
+        MLModel.collection.name, search_term, ModelRecord.PROJECTION
+    )
+    if pipeline is None:
+        return [], None
+
+    after = keyset_filter(SEARCH_SORT, decode_cursor(cursor))
+    if after:
+        pipeline.append({"$match": after})
+    pipeline += [{"$sort": dict(SEARCH_SORT)}, {"$limit": page_size + 1}]
+
+    return collect_page(
+        MLModel.collection.aggregate(pipeline, batchSize=page_size + 1),
+        SEARCH_SORT,
+        page_size,
+        search_document_to_dict,
+    )
+
+
+def rebuild_search_index(model_uuid=None):
+    """
+    Recomputes the search_grams of one or every model, e.g. after changing the
+    gram settings or for models uploaded before search_grams existed.
+    Returns the number of models updated.
+    """
+    query = {"model_uuid": model_uuid} if model_uuid else {}
+    models = list(
+        MLModel.collection.find(
+            query,
+            {
+                "_id": 0,
+                "model_uuid": 1,
+                "model_name": 1,
+                "model_type": 1,
+                "user_uuid": 1,
+            },
+        )
+    )
+    owners = {
+        user["user_uuid"]: user.get("username")
+        for user in UserModel.collection.find(
+            {"user_uuid": {"$in": list({model.get("user_uuid") for model in models})}},
+            {"_id": 0, "user_uuid": 1, "username": 1},
+        )
+    }
+
+    updated = 0
+    for start in range(0, len(models), 1000):
+        batch = [
+            UpdateOne(
+                {"model_uuid": model["model_uuid"]},
+                {
+                    "$set": {
+                        "search_grams": MLModel.compute_search_grams(
+                            model, owners.get(model.get("user_uuid"))
+                        )
+                    }
+                },
+            )
+            for model in models[start : start + 1000]
+        ]
+        MLModel.collection.bulk_write(batch, ordered=False)
+        updated += len(batch)
+    return updated
+
+
+def get_registered_model_by_user_uuid(user_uuid, page_size, cursor=None):
+    """One page of the registered models of a user and the cursor of the next page"""
+    sort = [("model_uuid", ASCENDING)]
+    match = {"user_uuid": user_uuid}
+    after = keyset_filter(sort, decode_cursor(cursor))
+    if after:
+        match = {"$and": [match, after]}
+
     pipeline = [
-        {"$match": {"user_uuid": user_uuid}},
+        {"$match": match},
+        {"$sort": dict(sort)},
         {
             "$lookup": {
                 "from": "model_registry_model",
@@ -554,8 +1318,10 @@ def get_registered_model_by_user_uuid(user_uuid):
             }
         },
         {"$unwind": "$registry"},
+        {"$limit": page_size + 1},
         {
             "$project": {
+                "_id": 0,
                 "model_registry_uuid": "$registry.model_registry_uuid",
                 "model_uuid": "$model_uuid",
                 "model_name": 1,
@@ -566,21 +1332,8 @@ def get_registered_model_by_user_uuid(user_uuid):
             }
         },
     ]
-    records = list(MLModel.collection.aggregate(pipeline))
-
-    resp = []
-
-    for record in records:
-        resp.append(
-            {
-                "model_uuid": record["model_uuid"],
-                "model_version": record["model_version"],
-                "model_registry_uuid": record["model_registry_uuid"],
-                "model_name": record["model_name"],
-                "model_type": record["model_type"],
-                "model_endpoint": record["model_endpoint"],
-                "model_status": record["model_status"],
-            }
-        )
-
-    return resp
+    return collect_page(
+        MLModel.collection.aggregate(pipeline, batchSize=page_size + 1),
+        sort,
+        page_size,
+    )
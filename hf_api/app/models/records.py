@@ -0,0 +1,254 @@
+class Record:
+    """
+    Read-only view of a MongoDB document for one access pattern.
+    Subclasses list the fields they need in __slots__ and assign them in
+    __init__, whose defaults apply to fields missing from a document; PROJECTION
+    fetches only those fields, without _id.
+    """
+
+    __slots__ = ()
+    PROJECTION = {"_id": 0}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.PROJECTION = {"_id": 0, **{field: 1 for field in cls.__slots__}}
+
+    @classmethod
+    def from_document(cls, document):
+        if not document:
+            return None
+        return cls(
+            **{field: document[field] for field in cls.__slots__ if field in document}
+        )
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        fields = ", ".join(
+            f"{field}={getattr(self, field)!r}" for field in self.__slots__
+        )
+        return f"{type(self).__name__}({fields})"
+
+
+class UserInfo(Record):
+    """Public profile of a user, never carries the password hash"""
+
+    __slots__ = ("user_uuid", "username", "email")
+
+    def __init__(self, user_uuid=None, username=None, email=None):
+        self.user_uuid = user_uuid
+        self.username = username
+        self.email = email
+
+
+class UserCredentials(Record):
+    """What a login needs to verify the password"""
+
+    __slots__ = ("user_uuid", "password")
+
+    def __init__(self, user_uuid=None, password=None):
+        self.user_uuid = user_uuid
+        self.password = password
+
+
+class Contributor(Record):
+    __slots__ = (
+        "user_uuid",
+        "username",
+        "contribution_count",
+        "last_contribution_date",
+    )
+
+    def __init__(
+        self,
+        user_uuid=None,
+        username=None,
+        contribution_count=0,
+        last_contribution_date=None,
+    ):
+        self.user_uuid = user_uuid
+        self.username = username
+        self.contribution_count = contribution_count
+        self.last_contribution_date = last_contribution_date
+
+
+class ModelRecord(Record):
+    __slots__ = (
+        "model_uuid",
+        "user_uuid",
+        "upload_datetime",
+        "model_name",
+        "model_type",
+        "s3_url",
+    )
+
+    def __init__(
+        self,
+        model_uuid=None,
+        user_uuid=None,
+        upload_datetime=None,
+        model_name=None,
+        model_type=None,
+        s3_url=None,
+    ):
+        self.model_uuid = model_uuid
+        self.user_uuid = user_uuid
+        self.upload_datetime = upload_datetime
+        self.model_name = model_name
+        self.model_type = model_type
+        self.s3_url = s3_url
+
+    def to_dict(self) -> dict:
+        data = super().to_dict()
+        if self.upload_datetime:
+            data["upload_datetime"] = self.upload_datetime.isoformat()
+        return data
+
+
+class RegistryRecord(Record):
+    __slots__ = (
+        "model_registry_uuid",
+        "model_uuid",
+        "model_version",
+        "model_status",
+        "model_endpoint",
+        "cache_enabled",
+        "instance_type",
+    )
+
+    def __init__(
+        self,
+        model_registry_uuid=None,
+        model_uuid=None,
+        model_version=None,
+        model_status=None,
+        model_endpoint=None,
+        cache_enabled=True,
+        instance_type=None,
+    ):
+        self.model_registry_uuid = model_registry_uuid
+        self.model_uuid = model_uuid
+        self.model_version = model_version
+        self.model_status = model_status
+        self.model_endpoint = model_endpoint
+        self.cache_enabled = cache_enabled
+        self.instance_type = instance_type
+
+
+class RegistryEndpoint(Record):
+    """The registry fields the inference path resolves, cached per process"""
+
+    __slots__ = (
+        "model_registry_uuid",
+        "model_uuid",
+        "model_endpoint",
+        "model_status",
+        "cache_enabled",
+    )
+
+    def __init__(
+        self,
+        model_registry_uuid=None,
+        model_uuid=None,
+        model_endpoint=None,
+        model_status=None,
+        cache_enabled=True,
+    ):
+        self.model_registry_uuid = model_registry_uuid
+        self.model_uuid = model_uuid
+        self.model_endpoint = model_endpoint
+        self.model_status = model_status
+        self.cache_enabled = cache_enabled
+
+
+class InferenceRecord(Record):
+    __slots__ = (
+        "inference_uuid",
+        "user_uuid",
+        "model_registry_uuid",
+        "inference_datetime",
+        "inference_status",
+        "inference_result",
+    )
+
+    def __init__(
+        self,
+        inference_uuid=None,
+        user_uuid=None,
+        model_registry_uuid=None,
+        inference_datetime=None,
+        inference_status=None,
+        inference_result=None,
+    ):
+        self.inference_uuid = inference_uuid
+        self.user_uuid = user_uuid
+        self.model_registry_uuid = model_registry_uuid
+        self.inference_datetime = inference_datetime
+        self.inference_status = inference_status
+        self.inference_result = inference_result
+
+
+class JobRecord(Record):
+    __slots__ = (
+        "job_uuid",
+        "user_uuid",
+        "job_type",
+        "job_datetime",
+        "job_status",
+        "reference_uuid",
+        # batch inference jobs only
+        "output_url",
+        "rows_total",
+        "rows_done",
+        "rows_failed",
+        "rows_per_second",
+    )
+
+    def __init__(
+        self,
+        job_uuid=None,
+        user_uuid=None,
+        job_type=None,
+        job_datetime=None,
+        job_status=None,
+        reference_uuid=None,
+        output_url=None,
+        rows_total=None,
+        rows_done=None,
+        rows_failed=None,
+        rows_per_second=None,
+    ):
+        self.job_uuid = job_uuid
+        self.user_uuid = user_uuid
+        self.job_type = job_type
+        self.job_datetime = job_datetime
+        self.job_status = job_status
+        self.reference_uuid = reference_uuid
+        self.output_url = output_url
+        self.rows_total = rows_total
+        self.rows_done = rows_done
+        self.rows_failed = rows_failed
+        self.rows_per_second = rows_per_second
+
+
+# Listing serializers. They turn a projected document into its response dict
+# in place, as the cursor streams by, instead of building a record and a dict.
+
+
+def model_document_to_dict(document) -> dict:
+    if document.get("upload_datetime"):
+        document["upload_datetime"] = document["upload_datetime"].isoformat()
+    return document
+
+
+def search_document_to_dict(document) -> dict:
+    # the ranking score is only needed for the cursor
+    document.pop("score", None)
+    return model_document_to_dict(document)
+
+
+def leaderboard_document_to_dict(document) -> dict:
+    document.setdefault("run_count", 0)
+    document["registered"] = bool(document.get("registered"))
+    return model_document_to_dict(document)
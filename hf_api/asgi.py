@@ -0,0 +1,10 @@
+from dotenv import load_dotenv
+from app.asgi_app import init_asgi_app
+
+load_dotenv()
+app = init_asgi_app()
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=5000)
@@ -0,0 +1,148 @@
+"""
+Model search latency against catalog size, regex scan vs the search_grams index.
+
+    DATABASE_URI=mongodb://localhost:27017/ezai_bench python -m benchmarks.bench_search \
+        [--sizes 10000 100000 300000] [--repeat 20]
+
+Seeds synthetic models into the `bench_ml_model` collection of the configured
+database (dropped first and at the end), then times the previous
+case-insensitive $regex query and the ranked n-gram search for a few queries,
+including prefixes and typos. It also reports the documents examined per query
+from explain() of the whole search pipeline, including the candidates read by
+each gram. The regex cost grows with the catalog; the n-gram search reads at
+most SEARCH_CANDIDATES_PER_GRAM models per query gram.
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import time
+import uuid
+
+from pymongo import ASCENDING, MongoClient
+
+from app.core.search import index_grams, search_pipeline
+
+COLLECTION = "bench_ml_model"
+WORDS = [
+    "resnet", "bert", "vision", "transformer", "classifier", "detector", "yolo",
+    "sentiment", "segmentation", "mobilenet", "efficientnet", "whisper", "speech",
+    "forecast", "tabular", "gpt", "llama", "diffusion", "unet", "embedding",
+]
+TYPES = ["tensorflow", "pytorch"]
+QUERIES = ["resnet", "res", "sentimnt", "vision transformer", "zzzz"]
+PROJECTION = {"_id": 0, "model_uuid": 1, "model_name": 1, "model_type": 1}
+
+
+def random_model(i):
+    name = "-".join(random.sample(WORDS, 2)) + f"-{i}"
+    model_type = random.choice(TYPES)
+    owner = "".join(random.choices(string.ascii_lowercase, k=8))
+    return {
+        "model_uuid": str(uuid.uuid4()),
+        "model_name": name,
+        "model_type": model_type,
+        "search_grams": index_grams(name, model_type, owner),
+    }
+
+
+def seed(collection, total):
+    have = collection.estimated_document_count()
+    batch = []
+    for i in range(have, total):
+        batch.append(random_model(i))
+        if len(batch) == 5000:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def regex_search(collection, query, limit):
+    regex = {"$regex": query, "$options": "i"}
+    return list(collection.find({"model_name": regex}, PROJECTION).limit(limit))
+
+
+def gram_search(collection, query, limit):
+    return list(collection.aggregate(gram_pipeline(query, limit)))
+
+
+def gram_pipeline(query, limit):
+    pipeline = search_pipeline(COLLECTION, query, PROJECTION) or []
+    return pipeline + [{"$sort": {"score": -1, "model_uuid": 1}}, {"$limit": limit}]
+
+
+def walk(node):
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from walk(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from walk(value)
+
+
+def docs_examined(db, command):
+    """Documents examined by every stage of the plan, $unionWith pipelines included"""
+    plan = db.command("explain", command, verbosity="executionStats")
+    return sum(node.get("totalDocsExamined", 0) for node in walk(plan))
+
+
+def timed(fn, repeat) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    db = MongoClient(os.getenv("DATABASE_URI")).get_database()
+    db.drop_collection(COLLECTION)
+    collection = db[COLLECTION]
+    collection.create_index([("search_grams", ASCENDING)])
+
+    try:
+        print(f"{'models':>8} {'query':<20}{'regex ms':>10}{'grams ms':>10}"
+              f"{'regex docs':>12}{'grams docs':>12}")
+        for size in sorted(args.sizes):
+            seed(collection, size)
+            for query in QUERIES:
+                regex_ms = timed(
+                    lambda: regex_search(collection, query, args.limit), args.repeat
+                )
+                gram_ms = timed(
+                    lambda: gram_search(collection, query, args.limit), args.repeat
+                )
+                regex_docs = docs_examined(
+                    db,
+                    {
+                        "find": COLLECTION,
+                        "filter": {"model_name": {"$regex": query, "$options": "i"}},
+                        "limit": args.limit,
+                    },
+                )
+                gram_docs = docs_examined(
+                    db,
+                    {
+                        "aggregate": COLLECTION,
+                        "pipeline": gram_pipeline(query, args.limit),
+                        "cursor": {},
+                    },
+                )
+                print(f"{size:>8} {query:<20}{regex_ms:>10.2f}{gram_ms:>10.2f}"
+                      f"{regex_docs:>12}{gram_docs:>12}")
+    finally:
+        db.drop_collection(COLLECTION)
+
+
+if __name__ == "__main__":
+    main()
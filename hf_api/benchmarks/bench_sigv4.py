@@ -0,0 +1,100 @@
+"""
+Signatures per second of the SageMaker runtime SigV4 signer.
+
+    python -m benchmarks.bench_sigv4 [--seconds 2] [--payload-kb 64]
+
+"before" re-derives the signing key and rebuilds the canonical request on every
+call (the previous get_header), "after" uses the cached SigV4Signer.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import time
+from datetime import datetime, timezone
+
+from app.core.sigv4 import SigV4Signer, get_signature_key, hash_payload
+
+ACCESS_KEY = "AKIDEXAMPLE"
+SECRET_KEY = "wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY"
+REGION = "ap-southeast-1"
+HOST = f"runtime.sagemaker.{REGION}.amazonaws.com"
+ENDPOINT = "bench-endpoint"
+
+
+def legacy_header(payload: str, endpoint: str, now=None) -> dict:
+    now = now or datetime.now(timezone.utc)
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    date_stamp = now.strftime("%Y%m%d")
+    payload_hash = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    canonical_headers = (
+        "host:" + HOST + "\n"
+        + "x-amz-content-sha256:" + payload_hash + "\n"
+        + "x-amz-date:" + amz_date + "\n"
+    )
+    signed_headers = "host;x-amz-content-sha256;x-amz-date"
+    canonical_request = (
+        "POST" + "\n" + f"/endpoints/{endpoint}/invocations" + "\n" + "\n"
+        + canonical_headers + "\n" + signed_headers + "\n" + payload_hash
+    )
+    credential_scope = date_stamp + "/" + REGION + "/sagemaker/aws4_request"
+    string_to_sign = (
+        "AWS4-HMAC-SHA256" + "\n" + amz_date + "\n" + credential_scope + "\n"
+        + hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+    )
+    signing_key = get_signature_key(SECRET_KEY, date_stamp, REGION, "sagemaker")
+    signature = hmac.new(
+        signing_key, string_to_sign.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+    return {
+        "X-Amz-Content-Sha256": payload_hash,
+        "X-Amz-Date": amz_date,
+        "Authorization": "AWS4-HMAC-SHA256 Credential=" + ACCESS_KEY + "/"
+        + credential_scope + ", SignedHeaders=" + signed_headers
+        + ", Signature=" + signature,
+        "Content-Type": "application/json",
+    }
+
+
+def rate(fn, seconds):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            fn()
+        count += 100
+    return count / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--payload-kb", type=int, default=64)
+    args = parser.parse_args()
+
+    payload = json.dumps({"inputs": [0.5] * (args.payload_kb * 1024 // 5)})
+    payload_hash = hash_payload(payload)
+    signer = SigV4Signer(ACCESS_KEY, SECRET_KEY, region=REGION, host=HOST)
+
+    # both paths must produce the same signature
+    now = datetime.now(timezone.utc)
+    assert signer.sign(ENDPOINT, payload, now=now) == legacy_header(
+        payload, ENDPOINT, now=now
+    )
+
+    before = rate(lambda: legacy_header(payload, ENDPOINT), args.seconds)
+    after = rate(lambda: signer.sign(ENDPOINT, payload), args.seconds)
+    after_hashed = rate(
+        lambda: signer.sign(ENDPOINT, payload_hash=payload_hash), args.seconds
+    )
+
+    print(f"payload: {len(payload) / 1024:.0f} KiB")
+    print(f"before (get_header)          {before:12,.0f} sig/s")
+    print(f"after  (SigV4Signer)         {after:12,.0f} sig/s  x{after / before:.2f}")
+    print(
+        f"after  (pre-hashed payload)  {after_hashed:12,.0f} sig/s  x{after_hashed / before:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Process startup cost of the web app and the Celery workers.
+
+    python -m benchmarks.bench_startup [--runs 5] [--indexes]
+
+Every run starts a fresh interpreter and times importing app.models.models,
+building the Flask app with init_app and importing the Celery worker module.
+None of them should touch MongoDB anymore, the first query pays for the
+connection instead. --indexes also times create_indexes, the work every
+process used to do on import before it moved to migrate_db.sh; it needs a
+reachable DATABASE_URI.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, time
+timings = {}
+
+started = time.perf_counter()
+import app.models.models as models
+timings["import_models"] = time.perf_counter() - started
+
+started = time.perf_counter()
+from app.app import init_app
+init_app()
+timings["init_app"] = time.perf_counter() - started
+
+started = time.perf_counter()
+import app.jobs.model_registry_worker
+timings["import_worker"] = time.perf_counter() - started
+
+timings["client_created"] = models._client is not None
+
+if INDEXES:
+    started = time.perf_counter()
+    models.create_indexes()
+    timings["create_indexes"] = time.perf_counter() - started
+
+print(json.dumps(timings))
+"""
+
+
+def run_probe(indexes) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", f"INDEXES = {indexes}\n{PROBE}"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--indexes", action="store_true")
+    args = parser.parse_args()
+
+    runs = [run_probe(args.indexes) for _ in range(args.runs)]
+
+    print(f"{'step':<16}{'median ms':>12}{'max ms':>12}")
+    for step in ("import_models", "init_app", "import_worker", "create_indexes"):
+        samples = [run[step] * 1000 for run in runs if step in run]
+        if samples:
+            print(
+                f"{step:<16}{statistics.median(samples):>12.1f}{max(samples):>12.1f}"
+            )
+    print(f"MongoClient created at startup: {any(run['client_created'] for run in runs)}")
+
+
+if __name__ == "__main__":
+    main()
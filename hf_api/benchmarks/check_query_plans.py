@@ -0,0 +1,407 @@
+"""
+Query plan regression check of the DAO queries in app/models/models.py.
+
+    python -m benchmarks.check_query_plans [--uri mongodb://localhost:27017/scratch] \
+        [--users 1000] [--update-baseline] [--tolerance 0.25] [--max-ratio 4]
+
+Seeds a generated dataset into a scratch database (dropped first and at the
+end, never point it at real data), creates the declared INDEXES and runs every
+DAO query below once. Each command a query sends is captured with a command
+listener and explained with executionStats. The check fails when a query
+raises, when a plan scans a collection, or when the documents examined per
+document returned grew past the tolerance of the baseline in
+benchmarks/query_plans.json, or past --max-ratio for a query without a
+baseline; the ranked search scores up to SEARCH_CANDIDATES_PER_GRAM models
+per query gram and is only compared to its baseline.
+--update-baseline records the current ratios instead, run it after an intended
+query change. tests/test_query_plans.py runs the same check on a small dataset.
+
+Maintenance reads that walk a whole collection on purpose (reconcile,
+rebuild_run_counts, rebuild_search_index, reconcile_contributions,
+get_all_models, count_model_runs) are not checked.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import uuid
+from functools import partial
+
+from pymongo import monitoring
+
+BASELINE = os.path.join(os.path.dirname(__file__), "query_plans.json")
+EXPLAINABLE = {"find", "aggregate", "update", "delete", "count", "distinct"}
+# driver and session fields explain does not accept
+STRIPPED = {"lsid", "txnNumber", "writeConcern", "$clusterTime", "$readPreference"}
+# ranked queries examine up to SEARCH_CANDIDATES_PER_GRAM candidates per query
+# gram, far more than the page they return
+UNBOUNDED = {"model.search_prefix", "model.search_typo"}
+WORDS = [
+    "resnet", "bert", "vision", "transformer", "classifier", "detector", "yolo",
+    "sentiment", "segmentation", "mobilenet", "whisper", "speech", "forecast",
+]
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """Keeps the commands started while `commands` is a list"""
+
+    def __init__(self):
+        self.commands = None
+
+    def started(self, event):
+        if self.commands is not None and event.command_name in EXPLAINABLE:
+            self.commands.append((event.database_name, dict(event.command)))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def seed(models, users):
+    """Inserts `users` users with models, registry records, inferences and jobs"""
+    rng = random.Random(42)
+    user_docs, model_docs, registry_docs, inference_docs, job_docs = [], [], [], [], []
+    for i in range(users):
+        user = models.UserModel(f"user{i}", f"user{i}@example.com", "hash")
+        user_docs.append(user.__dict__)
+        for j in range(3):
+            model = models.MLModel(
+                user.user_uuid,
+                "-".join(rng.sample(WORDS, 2)) + f"-{i}-{j}",
+                rng.choice(["tensorflow", "pytorch"]),
+                f"s3://bench/{i}/{j}",
+            )
+            model.search_grams = models.MLModel.compute_search_grams(
+                model.__dict__, user.username
+            )
+            model_docs.append(model.__dict__)
+            if rng.random() < 0.5:
+                continue
+            registry = models.ModelRegistryModel(
+                model.model_uuid, 1, "InService", f"endpoint-{model.model_uuid}"
+            )
+            registry_docs.append(registry.__dict__)
+            for _ in range(rng.randint(0, 20)):
+                inference = models.InferenceModel(
+                    user.user_uuid, registry.model_registry_uuid, "SUCCESS"
+                )
+                inference_docs.append(inference.__dict__)
+        for _ in range(rng.randint(0, 5)):
+            job = models.JobsModel(
+                str(uuid.uuid4()), user.user_uuid, "register", "SUCCESS", None
+            )
+            job_docs.append(job.__dict__)
+
+    for collection, docs in (
+        (models.UserModel.collection, user_docs),
+        (models.MLModel.collection, model_docs),
+        (models.ModelRegistryModel.collection, registry_docs),
+        (models.InferenceModel.collection, inference_docs),
+        (models.JobsModel.collection, job_docs),
+    ):
+        for start in range(0, len(docs), 5000):
+            collection.insert_many(docs[start : start + 5000], ordered=False)
+    # the leaderboard copies the registry counters
+    models.rebuild_run_counts()
+    models.LeaderboardModel.reconcile()
+    models.UserModel.reconcile_contributions()
+
+    user = user_docs[len(user_docs) // 2]
+    model = next(m for m in model_docs if m["user_uuid"] == user["user_uuid"])
+    registry = registry_docs[len(registry_docs) // 2]
+    return {
+        "user": user,
+        "model": model,
+        "registry": registry,
+        "inference": next(
+            i
+            for i in inference_docs
+            if i["model_registry_uuid"] == registry["model_registry_uuid"]
+        ),
+        "job": job_docs[len(job_docs) // 2],
+    }
+
+
+def cases(models, data):
+    """(name, query) of every checked DAO query"""
+    user, model, registry = data["user"], data["model"], data["registry"]
+    inference, job = data["inference"], data["job"]
+    users, ml_models = models.UserModel, models.MLModel
+    registries, inferences = models.ModelRegistryModel, models.InferenceModel
+
+    def resolve_endpoint():
+        models.endpoint_cache.invalidate(registry["model_registry_uuid"])
+        registries.resolve_endpoint(registry["model_registry_uuid"])
+
+    def update_model_type():
+        # the seeded models have no version, the update is still sent and explained
+        try:
+            ml_models.update_model_type(model["model_uuid"], "pytorch", 0)
+        except Exception as e:
+            if "Version mismatch" not in str(e):
+                raise
+
+    return [
+        (
+            "user.get_user_by_email",
+            partial(users.get_user_by_email, user["email"]),
+        ),
+        (
+            "user.get_user_by_username",
+            partial(users.get_user_by_username, user["username"]),
+        ),
+        (
+            "user.get_user_record_by_uuid",
+            partial(users.get_user_record_by_uuid, user["user_uuid"]),
+        ),
+        ("user.user_exists", partial(users.user_exists, user["user_uuid"])),
+        (
+            "user.create_user",
+            partial(users.create_user, user["username"], user["email"], "hash"),
+        ),
+        (
+            "user.update_user",
+            partial(users.update_user, user["user_uuid"], email=user["email"]),
+        ),
+        (
+            "user.contributors_top",
+            partial(users.get_contributors_with_contributions, 10),
+        ),
+        (
+            "user.contributors_page",
+            partial(users.get_contributors_with_contributions, None, 20),
+        ),
+        (
+            "user.record_contribution",
+            partial(users.record_contribution, user["user_uuid"], job["job_datetime"]),
+        ),
+        (
+            "model.get_record_by_uuid",
+            partial(ml_models.get_record_by_uuid, model["model_uuid"]),
+        ),
+        (
+            "model.get_all_models_by_user_uuid",
+            partial(ml_models.get_all_models_by_user_uuid, user["user_uuid"], 20),
+        ),
+        ("model.update_model_type", update_model_type),
+        ("model.search_prefix", partial(models.search_for_models, "res", 20)),
+        ("model.search_typo", partial(models.search_for_models, "sentimnt", 20)),
+        (
+            "model.registered_by_user",
+            partial(models.get_registered_model_by_user_uuid, user["user_uuid"], 20),
+        ),
+        (
+            "registry.get_record_by_uuid",
+            partial(registries.get_record_by_uuid, registry["model_registry_uuid"]),
+        ),
+        ("registry.resolve_endpoint", resolve_endpoint),
+        (
+            "registry.update_record_by_uuid",
+            partial(
+                registries.update_record_by_uuid,
+                registry["model_registry_uuid"],
+                cache_enabled=True,
+            ),
+        ),
+        (
+            "inference.get_record_by_uuid",
+            partial(inferences.get_record_by_uuid, inference["inference_uuid"]),
+        ),
+        (
+            "inference.get_record_by_model_registry_uuid",
+            partial(
+                inferences.get_record_by_model_registry_uuid,
+                registry["model_registry_uuid"],
+            ),
+        ),
+        (
+            "inference.update_record_by_uuid",
+            partial(
+                inferences.update_record_by_uuid,
+                inference["inference_uuid"],
+                inference_status="SUCCESS",
+            ),
+        ),
+        ("inference.record_runs", partial(inferences.record_runs, [inference])),
+        (
+            "job.get_record_by_uuid",
+            partial(models.JobsModel.get_record_by_uuid, job["job_uuid"]),
+        ),
+        (
+            "job.update_task_status",
+            partial(models.JobsModel.update_task_status, job["job_uuid"], "SUCCESS"),
+        ),
+        (
+            "leaderboard.top",
+            partial(models.get_model_run_counts_with_details_filter, 10),
+        ),
+        (
+            "leaderboard.page",
+            partial(models.get_model_run_counts_with_details, 20),
+        ),
+        (
+            "leaderboard.set_registry",
+            partial(
+                models.LeaderboardModel.set_registry,
+                registry["model_uuid"],
+                registry["model_registry_uuid"],
+                1,
+            ),
+        ),
+        (
+            "cache_version.get_version",
+            partial(models.CacheVersionModel.get_version, "user_model"),
+        ),
+        (
+            "cache_version.get_changes",
+            partial(models.CacheVersionModel.get_changes, "ml_model", 0, 1),
+        ),
+        # destructive, keep last
+        (
+            "inference.delete_by_model_registry_uuid",
+            partial(
+                inferences.delete_records_by_model_registry_uuid,
+                registry["model_registry_uuid"],
+            ),
+        ),
+    ]
+
+
+def explain(client, database, command) -> dict:
+    command = {key: value for key, value in command.items() if key not in STRIPPED}
+    command.pop("$db", None)
+    # explain takes a single write statement
+    for statements in ("updates", "deletes"):
+        if statements in command:
+            command[statements] = command[statements][:1]
+    return client[database].command("explain", command, verbosity="executionStats")
+
+
+def walk(node):
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from walk(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from walk(value)
+
+
+def plan_summary(plan) -> dict:
+    nodes = list(walk(plan))
+    scans = any(node.get("stage") == "COLLSCAN" for node in nodes) or any(
+        node.get("collectionScans", 0) > 0 for node in nodes
+    )
+    examined = sum(node.get("totalDocsExamined", 0) for node in nodes)
+    if plan.get("stages"):
+        returned = plan["stages"][-1].get("nReturned")
+        if returned is None:
+            returned = plan["stages"][0]["$cursor"]["executionStats"]["nReturned"]
+    else:
+        stats = plan.get("executionStats", {})
+        returned = stats.get("nReturned", 0)
+        # writes return nothing, count the documents they would change
+        for node in nodes:
+            returned = max(
+                returned, node.get("nWouldModify", 0), node.get("nWouldDelete", 0)
+            )
+    return {
+        "collscan": scans,
+        "examined": examined,
+        "returned": returned,
+        "ratio": round(examined / max(returned, 1), 2),
+    }
+
+
+def load_baseline() -> dict:
+    if not os.path.exists(BASELINE):
+        return {}
+    with open(BASELINE) as f:
+        return json.load(f)
+
+
+def check(models, recorder, users, baseline, tolerance=0.25, max_ratio=4.0):
+    """
+    Seeds `users` users into the empty database of `models`, then runs and
+    explains every case. Returns the ratio of every command and the failed ones.
+    `recorder` must be registered before the client of `models` is created.
+    """
+    client = models.get_client()
+    results, failures = {}, []
+    models.create_indexes()
+    data = seed(models, users)
+    for name, query in cases(models, data):
+        recorder.commands = []
+        try:
+            query()
+        except Exception as e:
+            print(f"{name} raised: {e!r}")
+            failures.append(name)
+        commands, recorder.commands = recorder.commands, None
+        for i, (db_name, command) in enumerate(commands):
+            command_name = next(iter(command))
+            key = f"{name}[{i}] {command_name} {command[command_name]}"
+            summary = plan_summary(explain(client, db_name, command))
+            results[key] = summary["ratio"]
+            status = "ok"
+            if summary["collscan"]:
+                status = "COLLSCAN"
+            elif key in baseline:
+                if summary["ratio"] > max(
+                    baseline[key] * (1 + tolerance), baseline[key] + 1
+                ):
+                    status = f"REGRESSED from {baseline[key]}"
+            elif name not in UNBOUNDED and summary["ratio"] > max_ratio:
+                status = f"ABOVE {max_ratio}"
+            if status != "ok":
+                failures.append(key)
+            print(
+                f"{key:<80}{summary['examined']:>8}{summary['returned']:>8}"
+                f"{summary['ratio']:>8}  {status}"
+            )
+    return results, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--uri", default="mongodb://localhost:27017/ezai_query_plans")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--max-ratio", type=float, default=4.0)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    recorder = CommandRecorder()
+    monitoring.register(recorder)
+    os.environ["DATABASE_URI"] = args.uri
+    # check the MongoDB queries behind the in-memory model catalog
+    os.environ["MODEL_CATALOG"] = "false"
+    import app.models.models as models
+
+    client = models.get_client()
+    database = models.get_db().name
+    client.drop_database(database)
+
+    baseline = {} if args.update_baseline else load_baseline()
+    try:
+        results, failures = check(
+            models, recorder, args.users, baseline, args.tolerance, args.max_ratio
+        )
+    finally:
+        client.drop_database(database)
+
+    if args.update_baseline:
+        with open(BASELINE, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {BASELINE}")
+
+    if failures:
+        print(f"{len(failures)} queries failed the plan check")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+# Loaded by gunicorn from the working directory, e.g.
+#     gunicorn server:app --workers 4 --bind 0.0.0.0:5000
+from app.core.metrics import mark_process_dead
+
+
+def child_exit(server, worker):
+    mark_process_dead(worker.pid)
@@ -1,19 +1,21 @@
-#!bin/bash
+#!/bin/bash
 
-# check if the -m argument is passed
-if [ "$1" == "-m" ]; then
-    # check if the message is passed
-    if [ -z "$2" ]; then
-        echo "Please provide a message for the migration"
-    else
-        # run the migration
-        # create the flask migration folder to track the migration versions
-        # Note: This is only done once and if the docker container and the volume is destroyed, this will be lost
-        # flask db init
-        flask db migrate -m "$2"
-        flask db upgrade
-        echo "Migration successful"
-    fi
-else
-    echo "Please provide a message for the migration"
-fi
\ No newline at end of file
+# Creates the MongoDB indexes, the application no longer does this on import,
+# builds the model leaderboard for existing models and the contribution
+# counters of existing users.
+# Run once per deployment, before or after starting the server:
+#   bash migrate_db.sh
+# Pass -r to also rebuild the model run counters from the inference history
+# and the search terms of every model.
+set -e
+
+flask --app server create-indexes
+flask --app server reconcile-leaderboard
+flask --app server reconcile-contributors
+
+if [ "$1" == "-r" ]; then
+    flask --app server rebuild-run-counts
+    flask --app server rebuild-search-index
+fi
+
+echo "Migration successful"
@@ -0,0 +1,44 @@
+"""
+Scratch MongoDB database for the tests that need a server. The database of
+TEST_DATABASE_URI is dropped by the tests, never point it at real data.
+"""
+import os
+
+# the tests check the MongoDB queries, which the model catalog would answer
+os.environ.setdefault("MODEL_CATALOG", "false")
+
+TEST_DATABASE_URI = os.environ.get(
+    "TEST_DATABASE_URI", "mongodb://localhost:27017/ezai_test"
+)
+
+
+def scratch_database_uri():
+    """TEST_DATABASE_URI when the app dependencies and a server are available"""
+    try:
+        # the client is created on first use, importing needs no server
+        import app.models.models  # noqa: F401
+        from pymongo import MongoClient
+        from pymongo.errors import PyMongoError
+    except ImportError:
+        return None
+    client = MongoClient(TEST_DATABASE_URI, serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        return None
+    finally:
+        client.close()
+    return TEST_DATABASE_URI
+
+
+def load_models(uri):
+    """
+    app.models.models on a freshly dropped scratch database, with a new client
+    that picks up the command listeners registered so far
+    """
+    os.environ["DATABASE_URI"] = uri
+    import app.models.models as models
+
+    models._reset_client()
+    models.get_client().drop_database(models.get_db().name)
+    return models
@@ -0,0 +1,113 @@
+import threading
+import time
+import unittest
+
+from app.core.batcher import MicroBatcher
+
+KEY = "model"
+
+
+class RecordingEndpoint:
+    """invoke_fn doubling every row, or answering `response` when set"""
+
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+        self.calls = []
+
+    def __call__(self, target, inputs):
+        self.calls.append(list(inputs))
+        if self.error is not None:
+            raise self.error
+        if self.response is not None:
+            return self.response
+        return 200, {"outputs": [row * 2 for row in inputs]}
+
+
+def submit_together(batcher, requests):
+    """Submits `requests` from one thread each, all joining the first window"""
+    results = [None] * len(requests)
+
+    def run(i, inputs):
+        try:
+            results[i] = batcher.submit(KEY, "endpoint", inputs)
+        except Exception as e:
+            results[i] = e
+
+    threads = []
+    for i, inputs in enumerate(requests):
+        thread = threading.Thread(target=run, args=(i, inputs))
+        thread.start()
+        threads.append(thread)
+        if i == 0:
+            # let the leader open the window before the others join it
+            while KEY not in batcher._open:
+                time.sleep(0.001)
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+class MicroBatcherTest(unittest.TestCase):
+    def test_single_request_is_sent_as_is(self):
+        endpoint = RecordingEndpoint()
+        batcher = MicroBatcher(endpoint, max_batch_size=4, max_wait_ms=1)
+
+        self.assertEqual(
+            batcher.submit(KEY, "endpoint", [1, 2]), (200, {"outputs": [2, 4]})
+        )
+        self.assertEqual(endpoint.calls, [[1, 2]])
+
+    def test_rows_are_split_back_to_each_caller(self):
+        endpoint = RecordingEndpoint()
+        batcher = MicroBatcher(endpoint, max_batch_size=3, max_wait_ms=5000)
+
+        results = submit_together(batcher, [[1], [2, 3]])
+
+        self.assertEqual(endpoint.calls, [[1, 2, 3]])
+        self.assertEqual(
+            results, [(200, {"outputs": [2]}), (200, {"outputs": [4, 6]})]
+        )
+
+    def test_full_window_is_dispatched_without_waiting(self):
+        endpoint = RecordingEndpoint()
+        batcher = MicroBatcher(endpoint, max_batch_size=2, max_wait_ms=60000)
+
+        started = time.monotonic()
+        result = batcher.submit(KEY, "endpoint", [1, 2, 3])
+
+        self.assertEqual(result, (200, {"outputs": [2, 4, 6]}))
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertNotIn(KEY, batcher._open)
+
+    def test_exception_is_raised_in_every_caller(self):
+        error = ConnectionError("endpoint down")
+        endpoint = RecordingEndpoint(error=error)
+        batcher = MicroBatcher(endpoint, max_batch_size=2, max_wait_ms=5000)
+
+        results = submit_together(batcher, [[1], [2]])
+
+        self.assertEqual(results, [error, error])
+        self.assertEqual(len(endpoint.calls), 1)
+
+    def test_error_response_fails_every_caller_once(self):
+        endpoint = RecordingEndpoint(response=(503, {"error": "overloaded"}))
+        batcher = MicroBatcher(endpoint, max_batch_size=2, max_wait_ms=5000)
+
+        results = submit_together(batcher, [[1], [2]])
+
+        self.assertEqual(results, [(503, {"error": "overloaded"})] * 2)
+        self.assertEqual(endpoint.calls, [[1, 2]])
+
+    def test_unsplittable_response_falls_back_to_single_calls(self):
+        endpoint = RecordingEndpoint(response=(200, {"outputs": "not per row"}))
+        batcher = MicroBatcher(endpoint, max_batch_size=2, max_wait_ms=5000)
+
+        results = submit_together(batcher, [[1], [2]])
+
+        self.assertEqual(results, [(200, {"outputs": "not per row"})] * 2)
+        self.assertEqual(sorted(endpoint.calls), [[1], [1, 2], [2]])
+
+
+if __name__ == "__main__":
+    unittest.main()
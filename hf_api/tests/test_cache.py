@@ -0,0 +1,126 @@
+import time
+import unittest
+
+from app.core.cache import LRUCache, VersionedCache, VersionStamp
+
+
+class LRUCacheTest(unittest.TestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LRUCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_size_bound(self):
+        cache = LRUCache(max_bytes=10)
+        cache.set("a", 1, size=6)
+        cache.set("b", 2, size=6)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
+        self.assertEqual(cache.stats()["bytes"], 6)
+
+    def test_entry_larger_than_the_cache_is_not_stored(self):
+        cache = LRUCache(max_bytes=10)
+        cache.set("a", 1, size=4)
+        cache.set("b", 2, size=11)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+
+    def test_entries_expire(self):
+        cache = LRUCache(ttl=0.01)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=60)
+        time.sleep(0.02)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_delete_where(self):
+        cache = LRUCache()
+        for key in (("m1", "x"), ("m1", "y"), ("m2", "x")):
+            cache.set(key, True)
+
+        self.assertEqual(cache.delete_where(lambda key: key[0] == "m1"), 2)
+        self.assertEqual(len(cache), 1)
+        self.assertTrue(cache.get(("m2", "x")))
+
+
+class VersionStampTest(unittest.TestCase):
+    def test_first_load_is_not_a_change(self):
+        stamp = VersionStamp(lambda: 1, check_interval=0)
+        self.assertFalse(stamp.check())
+
+    def test_loads_at_most_every_interval(self):
+        loads = []
+        stamp = VersionStamp(lambda: loads.append(1) or len(loads), check_interval=60)
+
+        stamp.check()
+        self.assertFalse(stamp.due())
+        self.assertFalse(stamp.check())
+        self.assertEqual(len(loads), 1)
+
+    def test_failed_load_keeps_the_version(self):
+        def fail():
+            raise ConnectionError
+
+        stamp = VersionStamp(fail, check_interval=0)
+        self.assertFalse(stamp.check())
+        self.assertFalse(stamp.update(1))
+        self.assertTrue(stamp.update(2))
+
+
+class VersionedCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.version = 1
+        self.cache = VersionedCache(
+            max_entries=10,
+            ttl=60,
+            version_loader=lambda: self.version,
+            version_check_interval=0,
+        )
+
+    def test_invalidate_drops_one_key(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.invalidate("a")
+
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("b"), 2)
+        self.assertEqual(self.cache.stats()["invalidations"], 1)
+
+    def test_changed_version_drops_every_key(self):
+        self.cache.get("a")
+        self.cache.set("a", 1)
+        self.assertEqual(self.cache.get("a"), 1)
+
+        self.version = 2
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.stats()["version_invalidations"], 1)
+
+    def test_version_loaded_by_the_caller(self):
+        self.cache.update_version(1)
+        self.cache.set("a", 1)
+
+        self.cache.update_version(1)
+        self.assertEqual(self.cache.get("a", check_version=False), 1)
+        self.cache.update_version(2)
+        self.assertIsNone(self.cache.get("a", check_version=False))
+
+    def test_entries_expire(self):
+        cache = VersionedCache(max_entries=10, ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
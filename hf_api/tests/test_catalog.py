@@ -0,0 +1,92 @@
+import time
+import unittest
+
+try:
+    from app.core.catalog import Catalog, CatalogSource
+except ImportError:  # app dependencies not installed
+    Catalog = None
+
+
+class FakeCollection:
+    def __init__(self, documents=()):
+        self.documents = list(documents)
+        self.reads = 0
+
+    def _matches(self, query, document):
+        for field, condition in query.items():
+            if isinstance(condition, dict):
+                if document.get(field) not in condition["$in"]:
+                    return False
+            elif document.get(field) != condition:
+                return False
+        return True
+
+    def find(self, query, projection=None):
+        self.reads += 1
+        return [dict(d) for d in self.documents if self._matches(query, d)]
+
+    def find_one(self, query, projection=None):
+        found = self.find(query, projection)
+        return found[0] if found else None
+
+
+@unittest.skipIf(Catalog is None, "app dependencies are not installed")
+class CatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.models = FakeCollection([{"_id": 1, "model_uuid": "a", "name": "A"}])
+        self.catalog = Catalog(
+            sources={
+                "ml_model": CatalogSource(
+                    collection=lambda: self.models,
+                    key_field="model_uuid",
+                    fields=("name",),
+                )
+            },
+            version_loader=lambda: (0,),
+            poll_interval=60,
+            watch=False,
+            missing_ttl=60,
+        )
+
+    def tearDown(self):
+        self.catalog.close()
+
+    def test_unknown_key_is_read_once(self):
+        self.assertEqual(self.catalog.get("ml_model", "a")["name"], "A")
+        reads = self.models.reads
+
+        self.assertIsNone(self.catalog.get("ml_model", "missing"))
+        self.assertIsNone(self.catalog.get("ml_model", "missing"))
+        self.assertEqual(self.models.reads, reads + 1)
+        self.assertEqual(self.catalog.stats()["missing_hits"], 1)
+
+    def test_refresh_forgets_a_missing_key(self):
+        self.assertIsNone(self.catalog.get("ml_model", "b"))
+        self.models.documents.append({"_id": 2, "model_uuid": "b", "name": "B"})
+
+        self.catalog.refresh("ml_model", "b")
+        self.assertEqual(self.catalog.get("ml_model", "b")["name"], "B")
+
+    def test_missing_keys_expire(self):
+        self.catalog.close()
+        self.catalog = Catalog(
+            sources=self.catalog.sources,
+            version_loader=lambda: (0,),
+            poll_interval=60,
+            watch=False,
+            missing_ttl=0.01,
+        )
+        self.assertIsNone(self.catalog.get("ml_model", "b"))
+        self.models.documents.append({"_id": 2, "model_uuid": "b", "name": "B"})
+
+        time.sleep(0.02)
+        self.assertEqual(self.catalog.get("ml_model", "b")["name"], "B")
+
+    def test_disable(self):
+        self.assertTrue(self.catalog.enabled)
+        self.catalog.disable()
+        self.assertFalse(self.catalog.enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from scratch_db import load_models, scratch_database_uri
+
+DATABASE_URI = scratch_database_uri()
+
+
+@unittest.skipUnless(DATABASE_URI, "needs a MongoDB server, see tests/scratch_db.py")
+class CreateIndexesTest(unittest.TestCase):
+    def setUp(self):
+        self.models = load_models(DATABASE_URI)
+        self.db = self.models.get_db()
+
+    def tearDown(self):
+        self.models.get_client().drop_database(self.db.name)
+
+    def test_legacy_unique_inference_index_is_dropped(self):
+        from pymongo import DESCENDING
+
+        # as created by earlier versions
+        inferences = self.db["inference_model"]
+        inferences.create_index([("model_registry_uuid", DESCENDING)], unique=True)
+
+        _, dropped, undeclared = self.models.create_indexes()
+
+        self.assertIn("inference_model.model_registry_uuid_-1", dropped)
+        self.assertNotIn("model_registry_uuid_-1", inferences.index_information())
+        self.assertEqual(undeclared, [])
+        inferences.insert_many(
+            [
+                {"inference_uuid": "a", "model_registry_uuid": "m"},
+                {"inference_uuid": "b", "model_registry_uuid": "m"},
+            ]
+        )
+
+    def test_undeclared_indexes_are_kept_unless_requested(self):
+        self.db["jobs_model"].create_index("job_status")
+
+        _, _, undeclared = self.models.create_indexes()
+        self.assertEqual(undeclared, ["jobs_model.job_status_1"])
+
+        _, dropped, _ = self.models.create_indexes(drop_undeclared=True)
+        self.assertEqual(dropped, ["jobs_model.job_status_1"])
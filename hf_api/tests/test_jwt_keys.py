@@ -0,0 +1,89 @@
+import unittest
+from unittest import mock
+
+try:
+    from app.core.jwt_keys import KeyRing, parse_keys
+except ImportError:  # app dependencies not installed
+    KeyRing = None
+
+try:
+    import jwt
+
+    from app.core import auth_utils
+except ImportError:
+    auth_utils = None
+
+
+@unittest.skipIf(KeyRing is None, "app dependencies are not installed")
+class KeyRingTest(unittest.TestCase):
+    def test_parse_keys(self):
+        self.assertEqual(
+            parse_keys(" k1:s1, k2:s:2 ,broken, :x"), {"k1": "s1", "k2": "s:2"}
+        )
+
+    def test_active_key_signs(self):
+        ring = KeyRing({"k1": "s1", "k2": "s2"}, active_kid="k2")
+        self.assertEqual(ring.signing_key(), ("k2", "s2"))
+        self.assertEqual(KeyRing({"k1": "s1"}).signing_key(), ("k1", "s1"))
+
+    def test_verification_key_by_kid(self):
+        ring = KeyRing({"k1": "s1", "k2": "s2"}, active_kid="k2")
+        self.assertEqual(ring.verification_key("k1"), "s1")
+        self.assertEqual(ring.verification_key("k2"), "s2")
+        self.assertIsNone(ring.verification_key("k3"))
+
+    def test_tokens_without_kid_use_the_default_key(self):
+        ring = KeyRing({"default": "old", "k2": "new"}, active_kid="k2")
+        self.assertEqual(ring.verification_key(None), "old")
+        ring = KeyRing({"k1": "s1", "k2": "s2"}, active_kid="k2")
+        self.assertEqual(ring.verification_key(None), "s2")
+
+    def test_misconfigured_rings(self):
+        with self.assertRaises(RuntimeError):
+            KeyRing({})
+        with self.assertRaises(RuntimeError):
+            KeyRing({"k1": "s1"}, active_kid="k2")
+
+
+@unittest.skipIf(auth_utils is None, "app dependencies are not installed")
+class TokenRotationTest(unittest.TestCase):
+    def setUp(self):
+        auth_utils.token_cache.clear()
+
+    def use_ring(self, keys, active_kid):
+        return mock.patch.object(
+            auth_utils, "get_key_ring", return_value=KeyRing(keys, active_kid)
+        )
+
+    def test_token_carries_the_active_kid(self):
+        with self.use_ring({"k1": "s1", "k2": "s2"}, "k2"):
+            token = auth_utils.generate_token("user")
+            self.assertEqual(jwt.get_unverified_header(token)["kid"], "k2")
+            self.assertEqual(auth_utils.decode_token(token), "user")
+
+    def test_rotation_keeps_tokens_of_the_previous_key(self):
+        with self.use_ring({"k1": "s1"}, "k1"):
+            old_token = auth_utils.generate_token("user")
+
+        with self.use_ring({"k1": "s1", "k2": "s2"}, "k2"):
+            new_token = auth_utils.generate_token("user")
+            self.assertEqual(auth_utils.decode_token(old_token), "user")
+            self.assertEqual(auth_utils.decode_token(new_token), "user")
+
+        auth_utils.token_cache.clear()
+        with self.use_ring({"k2": "s2"}, "k2"):
+            self.assertEqual(auth_utils.decode_token(new_token), "user")
+            with self.assertRaises(jwt.InvalidTokenError):
+                auth_utils.decode_token(old_token)
+
+    def test_kid_of_another_key_is_rejected(self):
+        token = jwt.encode(
+            {"user_id": "user"}, "s1", algorithm="HS256", headers={"kid": "k2"}
+        )
+        with self.use_ring({"k1": "s1", "k2": "s2"}, "k2"):
+            with self.assertRaises(jwt.InvalidSignatureError):
+                auth_utils.decode_token(token)
+
+
+if __name__ == "__main__":
+    unittest.main()
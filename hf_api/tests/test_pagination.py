@@ -0,0 +1,139 @@
+import base64
+import unittest
+from datetime import datetime
+
+try:
+    from pymongo import ASCENDING
+
+    from app.constants import PaginationConstants
+    from app.core.pagination import (
+        InvalidCursor,
+        collect_page,
+        decode_cursor,
+        encode_cursor,
+        keyset_filter,
+        page_size_or_default,
+    )
+except ImportError:  # app dependencies not installed
+    collect_page = None
+
+# the leaderboard order, LeaderboardModel.SORT
+SORT = [("run_count", -1), ("model_uuid", 1)]
+
+
+def matches(document, query) -> bool:
+    """The subset of MongoDB matching keyset_filter produces"""
+    if "$or" in query:
+        return any(matches(document, clause) for clause in query["$or"])
+    for field, condition in query.items():
+        value = document.get(field)
+        if isinstance(condition, dict):
+            if "$gt" in condition and not value > condition["$gt"]:
+                return False
+            if "$lt" in condition and not value < condition["$lt"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def find(documents, cursor, page_size):
+    """A keyset paginated read of `documents`, already in SORT order"""
+    after = keyset_filter(SORT, decode_cursor(cursor))
+    found = [document for document in documents if matches(document, after)]
+    return collect_page(found[: page_size + 1], SORT, page_size)
+
+
+@unittest.skipIf(collect_page is None, "app dependencies are not installed")
+class CursorTest(unittest.TestCase):
+    def test_round_trip(self):
+        values = {"run_count": 3, "model_uuid": "a", "at": datetime(2024, 1, 2, 3, 4)}
+        self.assertEqual(decode_cursor(encode_cursor(values)), values)
+
+    def test_no_cursor(self):
+        self.assertIsNone(decode_cursor(None))
+        self.assertIsNone(decode_cursor(""))
+        self.assertEqual(keyset_filter(SORT, None), {})
+
+    def test_invalid_cursors(self):
+        not_a_dict = base64.urlsafe_b64encode(b"[1, 2]").decode("ascii")
+        for cursor in ("not base64!", not_a_dict):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+        with self.assertRaises(InvalidCursor):
+            keyset_filter(SORT, {"run_count": 1})
+
+    def test_keyset_filter(self):
+        self.assertEqual(
+            keyset_filter(SORT, {"run_count": 5, "model_uuid": "m"}),
+            {
+                "$or": [
+                    {"run_count": {"$lt": 5}},
+                    {"run_count": 5, "model_uuid": {"$gt": "m"}},
+                ]
+            },
+        )
+        self.assertEqual(
+            keyset_filter([("model_uuid", ASCENDING)], {"model_uuid": "m"}),
+            {"model_uuid": {"$gt": "m"}},
+        )
+
+    def test_page_size_bounds(self):
+        default = PaginationConstants.DEFAULT_PAGE_SIZE
+        self.assertEqual(page_size_or_default(None), default)
+        self.assertEqual(page_size_or_default("x"), default)
+        self.assertEqual(page_size_or_default(0), 1)
+        self.assertEqual(
+            page_size_or_default(10**6), PaginationConstants.MAX_PAGE_SIZE
+        )
+
+
+@unittest.skipIf(collect_page is None, "app dependencies are not installed")
+class PageBoundaryTest(unittest.TestCase):
+    def setUp(self):
+        # ties on run_count are broken by model_uuid
+        self.documents = sorted(
+            (
+                {"run_count": count, "model_uuid": f"m{i:02}"}
+                for i, count in enumerate([3, 1, 3, 0, 2, 3, 1])
+            ),
+            key=lambda d: (-d["run_count"], d["model_uuid"]),
+        )
+
+    def walk(self, page_size):
+        pages, cursor = [], None
+        while True:
+            items, cursor = find(self.documents, cursor, page_size)
+            pages.append(items)
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_every_document_once(self):
+        for page_size in range(1, len(self.documents) + 2):
+            pages = self.walk(page_size)
+            self.assertEqual([d for page in pages for d in page], self.documents)
+            self.assertTrue(all(len(page) <= page_size for page in pages))
+
+    def test_last_full_page_has_no_cursor(self):
+        pages = self.walk(len(self.documents))
+        self.assertEqual(len(pages), 1)
+
+    def test_missing_sort_value_is_stored_as_none(self):
+        _, cursor = collect_page([{"model_uuid": "a"}, {"model_uuid": "b"}], SORT, 1)
+        self.assertEqual(
+            decode_cursor(cursor), {"run_count": None, "model_uuid": "a"}
+        )
+
+    def test_cursor_is_read_before_serialize(self):
+        items, cursor = collect_page(
+            [{"run_count": 1, "model_uuid": "a"}, {"run_count": 0, "model_uuid": "b"}],
+            SORT,
+            1,
+            serialize=lambda d: {"uuid": d.pop("model_uuid")},
+        )
+        self.assertEqual(items, [{"uuid": "a"}])
+        self.assertEqual(decode_cursor(cursor), {"run_count": 1, "model_uuid": "a"})
+
+
+if __name__ == "__main__":
+    unittest.main()
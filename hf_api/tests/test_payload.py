@@ -0,0 +1,71 @@
+import hashlib
+import io
+import unittest
+
+from app.core.payload import (
+    InvalidPayload,
+    has_top_level_key,
+    hash_body,
+    parse_json,
+    read_payload,
+)
+
+
+class HashBodyTest(unittest.TestCase):
+    def test_digest_matches_sha256(self):
+        body = b'{"inputs": [[1, 2, 3]]}' * 100000
+        self.assertEqual(hash_body(body), hashlib.sha256(body).hexdigest())
+        self.assertEqual(hash_body(body, chunk_size=7), hashlib.sha256(body).hexdigest())
+
+    def test_read_payload_returns_body_and_digest(self):
+        body = b'{"inputs": [[1, 2, 3]]}'
+        read, digest = read_payload(io.BytesIO(body))
+        self.assertEqual(read, body)
+        self.assertEqual(digest, hashlib.sha256(body).hexdigest())
+
+    def test_read_payload_hashes_while_streaming(self):
+        body = bytes(range(256)) * 1000
+        read, digest = read_payload(io.BytesIO(body), chunk_size=1000)
+        self.assertEqual(read, body)
+        self.assertEqual(digest, hashlib.sha256(body).hexdigest())
+
+
+class HasTopLevelKeyTest(unittest.TestCase):
+    def test_top_level_key(self):
+        self.assertTrue(has_top_level_key(b'{"inputs": [[1, 2]]}', "inputs"))
+        self.assertTrue(has_top_level_key(b' \n\t{"inputs" : 1}', "inputs"))
+        self.assertTrue(has_top_level_key(b'{"a": {"b": [1]}, "inputs": 1}', "inputs"))
+
+    def test_nested_key(self):
+        self.assertFalse(has_top_level_key(b'{"data": {"inputs": 1}}', "inputs"))
+        self.assertFalse(has_top_level_key(b'{"a": [{"inputs": 1}], "b": 2}', "inputs"))
+
+    def test_key_inside_strings(self):
+        self.assertFalse(has_top_level_key(b'{"note": "inputs"}', "inputs"))
+        self.assertFalse(has_top_level_key(b'{"note": "x inputs: y"}', "inputs"))
+        self.assertFalse(has_top_level_key(b'{"inputs_old": 1}', "inputs"))
+
+    def test_escaped_quotes(self):
+        self.assertFalse(
+            has_top_level_key(b'{"note": "say \\"inputs\\": 1"}', "inputs")
+        )
+        self.assertTrue(has_top_level_key(b'{"a\\"b": 1, "inputs": 2}', "inputs"))
+
+    def test_non_object_top_level(self):
+        self.assertFalse(has_top_level_key(b'[{"inputs": 1}]', "inputs"))
+        self.assertFalse(has_top_level_key(b'"inputs"', "inputs"))
+        self.assertFalse(has_top_level_key(b"", "inputs"))
+
+
+class ParseJsonTest(unittest.TestCase):
+    def test_malformed_json_is_an_invalid_payload(self):
+        for body in (b'{"inputs": [1, 2}', b"\xff\xfe", b""):
+            with self.assertRaises(InvalidPayload):
+                parse_json(body)
+
+    def test_valid_json(self):
+        self.assertEqual(parse_json(b'{"inputs": [1]}'), {"inputs": [1]})
+
+
+if __name__ == "__main__":
+    unittest.main()
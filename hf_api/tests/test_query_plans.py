@@ -0,0 +1,29 @@
+import unittest
+
+from scratch_db import load_models, scratch_database_uri
+
+DATABASE_URI = scratch_database_uri()
+
+
+@unittest.skipUnless(DATABASE_URI, "needs a MongoDB server, see tests/scratch_db.py")
+class QueryPlanTest(unittest.TestCase):
+    """benchmarks/check_query_plans.py on a small dataset"""
+
+    def test_queries_use_indexes(self):
+        from pymongo import monitoring
+
+        from benchmarks import check_query_plans
+
+        recorder = check_query_plans.CommandRecorder()
+        monitoring.register(recorder)
+        models = load_models(DATABASE_URI)
+        try:
+            results, failures = check_query_plans.check(
+                models, recorder, 200, check_query_plans.load_baseline()
+            )
+        finally:
+            models.get_client().drop_database(models.get_db().name)
+            models._reset_client()
+
+        self.assertTrue(results)
+        self.assertEqual(failures, [])
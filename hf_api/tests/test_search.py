@@ -0,0 +1,60 @@
+import unittest
+
+try:
+    from app.constants import SearchConstants
+    from app.core.search import index_grams, query_grams, search_pipeline
+except ImportError:  # app dependencies not installed
+    search_pipeline = None
+
+PROJECTION = {"_id": 0, "model_uuid": 1, "model_name": 1}
+
+
+def score_terms(pipeline):
+    """(prefix weight, trigram term) of the score stage"""
+    stage = next(s for s in pipeline if "score" in s.get("$addFields", {}))
+    prefix, typo = stage["$addFields"]["score"]["$add"]
+    return prefix["$multiply"][1], typo
+
+
+@unittest.skipIf(search_pipeline is None, "app dependencies are not installed")
+class SearchPipelineTest(unittest.TestCase):
+    def test_prefix_hit_outranks_every_trigram(self):
+        for query in ("res", "sentimnt", "vision transformer classifier"):
+            _, typo_grams = query_grams(query)
+            prefix_weight, typo_term = score_terms(
+                search_pipeline("ml_model", query, PROJECTION)
+            )
+            self.assertEqual(typo_term, "$typo_hits")
+            self.assertGreater(prefix_weight, len(typo_grams))
+
+    def test_every_gram_reads_a_bounded_candidate_set(self):
+        query = "vision transformer"
+        prefixes, typo_grams = query_grams(query)
+        pipeline = search_pipeline("ml_model", query, PROJECTION)
+        branches = [pipeline[:3]] + [
+            stage["$unionWith"]["pipeline"]
+            for stage in pipeline
+            if "$unionWith" in stage
+        ]
+
+        self.assertEqual(
+            sorted(branch[0]["$match"]["search_grams"] for branch in branches),
+            sorted(prefixes + typo_grams),
+        )
+        for branch in branches:
+            self.assertEqual(
+                branch[1], {"$limit": SearchConstants.CANDIDATES_PER_GRAM}
+            )
+
+    def test_query_grams_are_indexed(self):
+        grams = set(index_grams("resnet-50", "pytorch"))
+        prefixes, typo_grams = query_grams("resnet")
+        self.assertTrue(set(prefixes) <= grams)
+        self.assertTrue(set(typo_grams) <= grams)
+
+    def test_query_without_words_has_no_pipeline(self):
+        self.assertIsNone(search_pipeline("ml_model", "--", PROJECTION))
+
+
+if __name__ == "__main__":
+    unittest.main()
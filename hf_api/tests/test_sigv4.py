@@ -0,0 +1,55 @@
+import unittest
+from datetime import datetime, timezone
+
+try:
+    from app.core.sigv4 import SigV4Signer, hash_payload
+    from benchmarks.bench_sigv4 import (
+        ACCESS_KEY,
+        ENDPOINT,
+        HOST,
+        REGION,
+        SECRET_KEY,
+        legacy_header,
+    )
+except ImportError:  # app dependencies not installed
+    SigV4Signer = None
+
+
+@unittest.skipIf(SigV4Signer is None, "app dependencies are not installed")
+class SigV4SignerTest(unittest.TestCase):
+    def setUp(self):
+        self.signer = SigV4Signer(ACCESS_KEY, SECRET_KEY, region=REGION, host=HOST)
+
+    def test_headers_match_the_legacy_signer(self):
+        for payload in ('{"inputs": [[1, 2, 3]]}', "", '{"inputs": ["é"]}'):
+            for now in (
+                datetime(2024, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+                datetime(2024, 2, 29, 23, 59, 59, tzinfo=timezone.utc),
+            ):
+                self.assertEqual(
+                    self.signer.sign(ENDPOINT, payload, now=now),
+                    legacy_header(payload, ENDPOINT, now=now),
+                )
+
+    def test_pre_hashed_payload(self):
+        payload = '{"inputs": [[0.5, 0.25]]}'
+        now = datetime(2024, 5, 1, 12, 0, 0, tzinfo=timezone.utc)
+        self.assertEqual(
+            self.signer.sign(ENDPOINT, payload_hash=hash_payload(payload), now=now),
+            legacy_header(payload, ENDPOINT, now=now),
+        )
+
+    def test_signing_key_rotates_daily(self):
+        for day in (1, 2):
+            now = datetime(2024, 5, day, 12, 0, 0, tzinfo=timezone.utc)
+            self.assertEqual(
+                self.signer.sign(ENDPOINT, "{}", now=now),
+                legacy_header("{}", ENDPOINT, now=now),
+            )
+        self.assertEqual(
+            list(self.signer._signing_keys), [("20240502", REGION, "sagemaker")]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()